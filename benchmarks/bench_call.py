@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+
+"""bench_call.py
+Micro-benchmark of cache hit latency for `memoize_function` and
+`memoize_method`
+
+The precompiled key builders are compared against the original call path,
+which ran `inspect.getcallargs` and `getfullargspec` on every call. Run from
+the repository root:
+
+    python benchmarks/bench_call.py
+
+"""
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+import os
+import sys
+from timeit import repeat
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from memoize import memoize_function, memoize_method  # noqa
+from memoize.memoize import getcallargs, getfullargspec  # noqa
+
+
+class _HashableDict(dict):
+    """The cache key type used by the original call path"""
+
+    def __hash__(self):
+        return hash((frozenset(self.keys()), frozenset(self.values())))
+
+
+class legacy_memoize_function(memoize_function):
+    """The `memoize_function` call path before key builders were precompiled"""
+
+    def __call__(self, *args, **kwargs):
+        f = self.f
+        callargs = getcallargs(f, *args, **kwargs)
+        varkw = getfullargspec(f)[2]
+        if varkw is not None:
+            callargs[varkw] = _HashableDict(callargs[varkw])
+        key = _HashableDict(callargs)
+        cache = getattr(self, self.cache_name)
+        try:
+            if key in cache:
+                return cache[key]
+            else:
+                cache[key] = res = f(*args, **kwargs)
+                return res
+        except TypeError:
+            return f(*args, **kwargs)
+
+
+def positional(a, b, c):
+    return a + b + c
+
+
+def defaults(a, b=2, c=3):
+    return a + b + c
+
+
+def variadic(a, *args, **kwargs):
+    return a
+
+
+CASES = [
+    ('positional', positional, (1, 2, 3), {}),
+    ('keywords', positional, (1,), {'c': 3, 'b': 2}),
+    ('defaults', defaults, (1,), {}),
+    ('variadic', variadic, (1, 2), {'x': 3}),
+]
+
+
+def best_of(stmt, number=20000, repeats=5):
+    return min(repeat(stmt, number=number, repeat=repeats)) / number
+
+
+def main():
+    print("{:<12} {:>12} {:>12} {:>8}".format(
+        'signature', 'legacy [us]', 'new [us]', 'speedup'))
+    for (name, f, args, kwargs) in CASES:
+        old = legacy_memoize_function(f)
+        new = memoize_function(f)
+        old(*args, **kwargs)
+        new(*args, **kwargs)
+        t_old = best_of(lambda: old(*args, **kwargs))
+        t_new = best_of(lambda: new(*args, **kwargs))
+        print("{:<12} {:>12.3f} {:>12.3f} {:>7.1f}x".format(
+            name, 1e6 * t_old, 1e6 * t_new, t_old / t_new))
+
+    class Adder(object):
+        base = 3
+
+        @memoize_method
+        def add(self, addend):
+            return self.base + addend
+
+    adder = Adder()
+    adder.add(4)
+    t = best_of(lambda: adder.add(4))
+    print("{:<12} {:>12} {:>12.3f}".format('method', '-', 1e6 * t))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+
+"""bench_compress.py
+Benchmark of result compression with `memoize_function(compress=...)`: the
+memory saved against the latency of hits and misses
+
+Results are NumPy arrays of quantized samples, which compress moderately, and
+nested lists. Requires NumPy. Run from the repository root:
+
+    python benchmarks/bench_compress.py
+
+"""
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+import os
+import sys
+from timeit import default_timer
+
+import numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from memoize import memoize_function  # noqa
+
+
+def samples(size):
+    rng = numpy.random.RandomState(size)
+    return numpy.round(rng.standard_normal(size), 2)
+
+
+def table(size):
+    return [[row, 'label {}'.format(row % 10), float(row)]
+            for row in range(size // 10)]
+
+
+def time_once(f, *args):
+    start = default_timer()
+    f(*args)
+    return default_timer() - start
+
+
+def main():
+    print("{:<8} {:>10} {:<6} {:>12} {:>12} {:>10} {:>10}".format(
+        'result', 'size', 'method', 'raw [kB]', 'stored [kB]', 'miss [ms]',
+        'hit [ms]'))
+    for (name, function) in [('array', samples), ('table', table)]:
+        for size in (10 ** 4, 10 ** 5):
+            for method in (None, 'zlib', 'lzma'):
+                memoized = memoize_function(function, compress=method,
+                                            compress_threshold=0)
+                miss = time_once(memoized, size)
+                hit = time_once(memoized, size)
+                info = memoized.storage_info()
+                raw = stored = float('nan')
+                if info is not None:
+                    raw, stored = info.raw_size, info.stored_size
+                print("{:<8} {:>10} {:<6} {:>12.1f} {:>12.1f} {:>10.3f} "
+                      "{:>10.3f}".format(name, size, method or '-', raw / 1e3,
+                                         stored / 1e3, 1e3 * miss, 1e3 * hit))
+
+
+if __name__ == '__main__':
+    main()
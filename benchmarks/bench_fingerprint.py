@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+
+"""bench_fingerprint.py
+Benchmark of content fingerprints of NumPy arrays and lists, compared with
+recomputing typical results from them
+
+Requires NumPy. Run from the repository root:
+
+    python benchmarks/bench_fingerprint.py
+
+"""
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+import os
+import sys
+from timeit import repeat
+
+import numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from memoize import fingerprint, memoize_function  # noqa
+
+
+def sort(values):
+    return numpy.sort(values)
+
+
+def best_of(stmt, number=5, repeats=5):
+    return min(repeat(stmt, number=number, repeat=repeats)) / number
+
+
+def main():
+    print("{:>10} {:>16} {:>12} {:>12} {:>12} {:>12}".format(
+        'size', 'input', 'print [ms]', 'sum [ms]', 'sort [ms]',
+        'hit [ms]'))
+    for size in (10 ** 3, 10 ** 5, 10 ** 7):
+        array = numpy.random.RandomState(0).standard_normal(size)
+        inputs = [
+            ('array', array),
+            ('strided array', array[::2]),
+            ('list', array[:size // 100].tolist()),
+        ]
+        for (name, value) in inputs:
+            memoized = memoize_function(sort, content_keys=True)
+            memoized(value)
+            print("{:>10} {:>16} {:>12.4f} {:>12.4f} {:>12.4f} {:>12.4f}"
+                  .format(len(value), name,
+                          1e3 * best_of(lambda: fingerprint(value)),
+                          1e3 * best_of(lambda: numpy.sum(value)),
+                          1e3 * best_of(lambda: numpy.sort(value)),
+                          1e3 * best_of(lambda: memoized(value))))
+
+
+if __name__ == '__main__':
+    main()
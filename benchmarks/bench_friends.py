@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+
+"""bench_friends.py
+Benchmark of cache clearance on large graphs of friends
+
+Times `memoize_method.clear_cache` on a chain, on a random graph with cycles
+and on a batch of roots, each of 10**5 objects. The original recursive
+traversal exceeded the recursion limit on the chain, and never terminated on
+cycles longer than two objects. Run from the repository root:
+
+    python benchmarks/bench_friends.py
+
+"""
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+import os
+import random
+import sys
+from timeit import default_timer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from memoize import memoize_method  # noqa
+
+NNODES = 10 ** 5
+NFRIENDS = 3
+
+
+class Node(object):
+
+    @memoize_method
+    def value(self, x):
+        return x
+
+
+def fill(nodes):
+    for node in nodes:
+        node.value(1)
+
+
+def chain(nnodes):
+    nodes = [Node() for _ in range(nnodes)]
+    for node, friend in zip(nodes, nodes[1:]):
+        memoize_method.register_friend(node, friend)
+    return nodes
+
+
+def random_graph(nnodes, nfriends, seed=0):
+    rng = random.Random(seed)
+    nodes = [Node() for _ in range(nnodes)]
+    # A ring, so that every node is reachable, plus random friends
+    for node, friend in zip(nodes, nodes[1:] + nodes[:1]):
+        memoize_method.register_friend(node, friend)
+    for node in nodes:
+        for friend in rng.sample(nodes, nfriends - 1):
+            memoize_method.register_friend(node, friend)
+    return nodes
+
+
+def time_clear(nodes, roots):
+    fill(nodes)
+    start = default_timer()
+    memoize_method.clear_cache(*roots)
+    duration = default_timer() - start
+    assert not any(node._memoize_method_cache for node in nodes)
+    return duration
+
+
+def main():
+    print("{:>24} {:>10} {:>10}".format('graph', 'nodes', 'clear [s]'))
+    nodes = chain(NNODES)
+    print("{:>24} {:>10} {:>10.4f}".format(
+        'chain', NNODES, time_clear(nodes, nodes[:1])))
+    nodes = random_graph(NNODES, NFRIENDS)
+    print("{:>24} {:>10} {:>10.4f}".format(
+        'random, {} friends'.format(NFRIENDS), NNODES,
+        time_clear(nodes, nodes[:1])))
+    # Unconnected objects cleared in one batch
+    nodes = [Node() for _ in range(NNODES)]
+    print("{:>24} {:>10} {:>10.4f}".format(
+        'batch of roots', NNODES, time_clear(nodes, nodes)))
+
+
+if __name__ == '__main__':
+    main()
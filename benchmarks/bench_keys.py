@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+
+"""bench_keys.py
+Benchmark of cache keys on grid sweeps with permuted argument values
+
+The flat tuple keys are compared against the original `_HashableDict` keys,
+which hashed the frozensets of parameter names and of argument values
+separately, so that all calls whose values are permutations of each other
+collided. Run from the repository root:
+
+    python benchmarks/bench_keys.py
+
+"""
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+import os
+import sys
+from itertools import permutations
+from timeit import default_timer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from memoize import memoize_function  # noqa
+from memoize.memoize import getcallargs  # noqa
+
+
+class _HashableDict(dict):
+    """The cache key type used by the original call path"""
+
+    def __hash__(self):
+        return hash((frozenset(self.keys()), frozenset(self.values())))
+
+
+def sweep(a, b, c, d, e):
+    return a
+
+
+def grid(nvalues):
+    """All permutations of 5 out of `nvalues` distinct values"""
+    return list(permutations(range(nvalues), 5))
+
+
+def time_fill_and_hit(make_key, calls):
+    cache = {}
+    start = default_timer()
+    for args in calls:
+        key = make_key(args)
+        if key not in cache:
+            cache[key] = sweep(*args)
+    fill = default_timer() - start
+    start = default_timer()
+    for args in calls:
+        cache[make_key(args)]
+    hit = default_timer() - start
+    return fill, hit, len(set(hash(key) for key in cache))
+
+
+def main():
+    builder = memoize_function(sweep)._make_key
+
+    def legacy(args):
+        return _HashableDict(getcallargs(sweep, *args))
+
+    def flat(args):
+        return builder(args, {})
+
+    print("{:>8} {:>8} {:>14} {:>14} {:>14} {:>14}".format(
+        'calls', 'keys', 'legacy hashes', 'flat hashes', 'legacy [s]',
+        'flat [s]'))
+    for nvalues in (6, 8, 10):
+        calls = grid(nvalues)
+        l_fill, l_hit, l_hashes = time_fill_and_hit(legacy, calls)
+        f_fill, f_hit, f_hashes = time_fill_and_hit(flat, calls)
+        print("{:>8} {:>8} {:>14} {:>14} {:>14.4f} {:>14.4f}".format(
+            len(calls), len(set(calls)), l_hashes, f_hashes,
+            l_fill + l_hit, f_fill + f_hit))
+
+
+if __name__ == '__main__':
+    main()
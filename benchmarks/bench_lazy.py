@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+
+"""bench_lazy.py
+Benchmark of eager cache clearing against lazy invalidation by generation
+counting (`memoize_method(lazy=True)`) under mutation-heavy workloads
+
+Each write is a `Memparams` assignment on an object whose memoized method has
+cached `size` results. Run from the repository root:
+
+    python benchmarks/bench_lazy.py
+
+"""
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+import os
+import sys
+from timeit import default_timer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from memoize import Memparams, memoize_method  # noqa
+
+
+def make_class(lazy):
+    class Model(object):
+        scale = Memparams(float, 'scale')
+
+        @memoize_method(lazy=lazy)
+        def value(self, x):
+            return self.scale * x
+
+    return Model
+
+
+def time_first_write(cls, size):
+    """Time of the write that invalidates a full cache"""
+    model = cls()
+    model.scale = 1.0
+    for x in range(size):
+        model.value(x)
+    start = default_timer()
+    model.scale = 2.0
+    return default_timer() - start
+
+
+def main():
+    print("{:>10} {:>16} {:>16}".format(
+        'entries', 'eager [us]', 'lazy [us]'))
+    for size in (10 ** 2, 10 ** 4, 10 ** 6):
+        print("{:>10} {:>16.1f} {:>16.1f}".format(
+            size, *[1e6 * time_first_write(make_class(lazy), size)
+                    for lazy in (False, True)]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+
+"""bench_map.py
+Benchmark of batch calls through `memoize_function.map` compared with calls
+in turn, for batches with a share of cached results and repeated arguments
+
+Requires NumPy. Run from the repository root:
+
+    python benchmarks/bench_map.py
+
+"""
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+import math
+import os
+import sys
+from timeit import default_timer
+
+import numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from memoize import memoize_function  # noqa
+
+
+COEFFICIENTS = (-1.26551223, 1.00002368, 0.37409196, 0.09678418,
+                -0.18628806, 0.27886807, -1.13520398, 1.48851587,
+                -0.82215223, 0.17087277)
+
+
+def erf(x, exp=math.exp):
+    """Rational approximation of the error function"""
+    t = 1.0 / (1.0 + 0.5 * abs(x))
+    poly = 0.0
+    for coefficient in reversed(COEFFICIENTS):
+        poly = coefficient + t * poly
+    y = 1.0 - t * exp(-x * x + poly)
+    return y if x >= 0 else -y
+
+
+def vectorized_erf(args_list):
+    """`erf` vectorized over a batch of argument tuples"""
+    x = numpy.array(args_list)[:, 0]
+    return erf_array(x).tolist()
+
+
+def erf_array(x):
+    t = 1.0 / (1.0 + 0.5 * numpy.abs(x))
+    poly = numpy.zeros_like(x)
+    for coefficient in reversed(COEFFICIENTS):
+        poly = coefficient + t * poly
+    y = 1.0 - t * numpy.exp(-x * x + poly)
+    return numpy.where(x >= 0, y, -y)
+
+
+def batch(size, seed=0):
+    # Half of the arguments are repeated within the batch
+    values = numpy.random.RandomState(seed).randint(0, size // 2, size)
+    return [(value / size,) for value in values.tolist()]
+
+
+def time_calls(memoized, args_list, how):
+    memoized.clear_cache()
+    # Cache a tenth of the results beforehand
+    for args in args_list[::10]:
+        memoized(*args)
+    start = default_timer()
+    if how == 'loop':
+        [memoized(*args) for args in args_list]
+    elif how == 'map':
+        memoized.map(args_list)
+    else:
+        memoized.map(args_list, vectorized=vectorized_erf)
+    return default_timer() - start
+
+
+def main():
+    memoized = memoize_function(erf)
+    print("{:>10} {:>12} {:>12} {:>16}".format(
+        'calls', 'loop [ms]', 'map [ms]', 'vectorized [ms]'))
+    for size in (10 ** 3, 10 ** 4, 10 ** 5):
+        args_list = batch(size)
+        print("{:>10} {:>12.3f} {:>12.3f} {:>16.3f}".format(
+            size, *[1e3 * time_calls(memoized, args_list, how)
+                    for how in ('loop', 'map', 'vectorized')]))
+
+
+if __name__ == '__main__':
+    main()
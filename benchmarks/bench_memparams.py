@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+
+"""bench_memparams.py
+Benchmark of memory use and assignment latency of `Memparams` storage, with
+and without `compact=True`
+
+Requires Python >= 3.4 for `tracemalloc`. Run from the repository root:
+
+    python benchmarks/bench_memparams.py
+
+"""
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+import os
+import sys
+import tracemalloc
+from timeit import default_timer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from memoize import Memparams, memoize_method  # noqa
+
+NOBJECTS = 10 ** 5
+
+
+def make_class(compact):
+    class Params(object):
+        alpha = Memparams(float, 'alpha', compact=compact)
+        steps = Memparams(int, 'steps', compact=compact)
+        grid = Memparams(list, 'grid', compact=compact)
+
+        @memoize_method
+        def total(self):
+            return self.alpha * self.steps + sum(self.grid)
+
+    return Params
+
+
+def assign(objects):
+    start = default_timer()
+    for obj in objects:
+        obj.alpha = 0.5
+        obj.steps = 10
+        obj.grid = [1.0, 2.0]
+    return (default_timer() - start) / (3 * len(objects))
+
+
+def measure(compact):
+    cls = make_class(compact)
+    objects = [cls() for _ in range(NOBJECTS)]
+    tracemalloc.start()
+    assign(objects)
+    memory = tracemalloc.get_traced_memory()[0] / NOBJECTS
+    tracemalloc.stop()
+    objects = [cls() for _ in range(NOBJECTS)]
+    latency = assign(objects)
+    for obj in objects:
+        obj.total()
+    start = default_timer()
+    for obj in objects:
+        obj.grid.append(3.0)
+    mutate = (default_timer() - start) / NOBJECTS
+    return memory, latency, mutate
+
+
+def main():
+    print("{:<10} {:>16} {:>14} {:>14}".format(
+        'storage', 'memory [B/obj]', 'assign [us]', 'mutate [us]'))
+    for compact in (False, True):
+        memory, latency, mutate = measure(compact)
+        print("{:<10} {:>16.0f} {:>14.3f} {:>14.3f}".format(
+            'compact' if compact else 'default', memory, 1e6 * latency,
+            1e6 * mutate))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+
+"""bench_method.py
+Micro-benchmark of cache hit latency for instance methods memoized with
+`memoize_method` and for `memoize_property`
+
+Bound method objects, created once per instance, are compared against the
+original access path, which created a `functools.partial` on every lookup
+and went through `memoize_method.__call__`. Run from the repository root:
+
+    python benchmarks/bench_method.py
+
+"""
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+import os
+import sys
+from functools import partial
+from timeit import repeat
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from memoize import MemoizeSlots, memoize_method, memoize_property  # noqa
+
+
+class Adder(object):
+    base = 3
+
+    @memoize_method
+    def add(self, addend):
+        return self.base + addend
+
+    @memoize_method(stats=True)
+    def add_counted(self, addend):
+        return self.base + addend
+
+    @memoize_method
+    def total(self):
+        return self.base + 4
+
+    @memoize_property
+    def total_property(self):
+        return self.base + 4
+
+
+class SlottedAdder(MemoizeSlots):
+    __slots__ = ('base', '_total')
+
+    def __init__(self):
+        self.base = 3
+
+    @memoize_method
+    def add(self, addend):
+        return self.base + addend
+
+    @memoize_property(slot='_total')
+    def total_property(self):
+        return self.base + 4
+
+
+def best_of(stmt, number=100000, repeats=5):
+    return min(repeat(stmt, number=number, repeat=repeats)) / number
+
+
+def main():
+    adder, slotted = Adder(), SlottedAdder()
+    memoizer = vars(Adder)['add']
+    add = adder.add
+    cases = [
+        ('partial (legacy)', lambda: partial(memoizer, adder)(4)),
+        ('lookup only', lambda: adder.add),
+        ('lookup and call', lambda: adder.add(4)),
+        ('prebound call', lambda: add(4)),
+        ('keyword call', lambda: adder.add(addend=4)),
+        ('with stats', lambda: adder.add_counted(4)),
+        ('__slots__', lambda: slotted.add(4)),
+        ('no arguments', lambda: adder.total()),
+        ('property', lambda: adder.total_property),
+        ('property in slot', lambda: slotted.total_property),
+        ('plain attribute', lambda: adder.base),
+    ]
+    print("{:<20} {:>10}".format('access', 'hit [us]'))
+    for (name, stmt) in cases:
+        stmt()
+        print("{:<20} {:>10.3f}".format(name, 1e6 * best_of(stmt)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+
+"""bench_recursive.py
+Benchmark of memoized dynamic programming recurrences: `memoize_function`
+against `memoize_recursive` called recursively, trampolined and bottom up
+
+Reports the time per state of a Fibonacci recurrence modulo a prime, for
+depths that plain recursion can and cannot reach. Run from the repository
+root:
+
+    python benchmarks/bench_recursive.py
+
+"""
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+import os
+import sys
+from timeit import default_timer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from memoize import memoize_function, memoize_recursive  # noqa
+
+PRIME = 1000000007
+
+
+def make_recursive(decorator):
+    @decorator
+    def fib(n):
+        if n < 2:
+            return n
+        return (fib(n - 1) + fib(n - 2)) % PRIME
+
+    return fib
+
+
+def make_trampolined():
+    @memoize_recursive
+    def fib(n):
+        if n < 2:
+            return n
+        return ((yield n - 1) + (yield n - 2)) % PRIME
+
+    return fib
+
+
+def time_per_state(run, n):
+    start = default_timer()
+    run(n)
+    return (default_timer() - start) / n
+
+
+def main():
+    # (name, run, whether the evaluation is not limited by the stack)
+    cases = [
+        ('memoize_function', lambda n: make_recursive(memoize_function)(n),
+         False),
+        ('memoize_recursive', lambda n: make_recursive(memoize_recursive)(n),
+         False),
+        ('trampolined', lambda n: make_trampolined()(n), True),
+        ('bottom_up', lambda n: make_recursive(memoize_recursive).bottom_up(
+            range(n + 1)), True),
+    ]
+    # Each level of plain recursion takes a few stack frames
+    shallow = sys.getrecursionlimit() // 4
+    sizes = (shallow, 10 ** 5, 10 ** 6)
+    print("{:<20}".format('states') +
+          ''.join("{:>12}".format(n) for n in sizes))
+    for (name, run, deep) in cases:
+        row = "{:<20}".format(name)
+        for n in sizes:
+            if deep or n <= shallow:
+                row += "{:>9.2f} us".format(1e6 * time_per_state(run, n))
+            else:
+                row += "{:>12}".format('-')
+        print(row)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+
+"""bench_transport.py
+Benchmark of pickling objects with `memoize_method` caches and `Memparams`
+for each cache transport (see `memoize_method.set_transport`)
+
+Reports the pickled size and the time to pickle and unpickle a batch of
+models, as when sending them to a process pool. Run from the repository root:
+
+    python benchmarks/bench_transport.py
+
+"""
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+import os
+import pickle
+import sys
+from timeit import default_timer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from memoize import Memparams, memoize_method  # noqa
+
+
+class Model(object):
+    scale = Memparams(float, 'scale')
+    grid = Memparams(list, 'grid')
+
+    def __init__(self, scale):
+        self.scale = scale
+        self.grid = [0.1 * i for i in range(10)]
+
+    @memoize_method
+    def profile(self, n):
+        return [self.scale * x for x in range(n)]
+
+    @memoize_method
+    def value(self, x):
+        return self.scale * x
+
+
+def make_models(count=2000):
+    models = [Model(float(i)) for i in range(count)]
+    for model in models:
+        model.profile(200)
+        for x in range(20):
+            model.value(x)
+    return models
+
+
+def best_of(f, repeats=3):
+    times = []
+    for _ in range(repeats):
+        start = default_timer()
+        f()
+        times.append(default_timer() - start)
+    return min(times)
+
+
+def main():
+    models = make_models()
+    print("{:<10} {:>12} {:>12} {:>12}".format(
+        'transport', 'size [kB]', 'dump [ms]', 'load [ms]'))
+    for transport in ('full', 'compact', 'none'):
+        for model in models:
+            memoize_method.set_transport(model, transport)
+        data = pickle.dumps(models, pickle.HIGHEST_PROTOCOL)
+        dump = best_of(lambda: pickle.dumps(models, pickle.HIGHEST_PROTOCOL))
+        load = best_of(lambda: pickle.loads(data))
+        print("{:<10} {:>12.0f} {:>12.1f} {:>12.1f}".format(
+            transport, len(data) / 1e3, 1e3 * dump, 1e3 * load))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+
+"""bench_weak.py
+Benchmark of `memoize_function` with weak and identity keys
+
+Compares hit latency with ordinary keys, and shows that cached entries go
+away with the objects they were computed from, with no `clear_cache`. Run
+from the repository root:
+
+    python benchmarks/bench_weak.py
+
+"""
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+import gc
+import os
+import sys
+from timeit import repeat
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from memoize import memoize_function  # noqa
+
+
+class Model(object):
+    """Stand-in for a large object used as an argument"""
+
+    def __init__(self, size):
+        self.data = list(range(size))
+
+
+def total(model, scale):
+    return sum(model.data) * scale
+
+
+def hit_time(memoized, model, number=100000, repeats=5):
+    return min(repeat(lambda: memoized(model, 2), number=number,
+                      repeat=repeats)) / number
+
+
+def main():
+    options = [('ordinary', {}), ('weak_keys', {'weak_keys': True}),
+               ('identity_keys', {'identity_keys': True})]
+    print("{:<14} {:>10} {:>14} {:>14}".format(
+        'keys', 'hit [us]', 'entries alive', 'entries freed'))
+    for (name, kwargs) in options:
+        memoized = memoize_function(total, **kwargs)
+        models = [Model(1000) for _ in range(1000)]
+        for model in models:
+            memoized(model, 2)
+        t = hit_time(memoized, models[0])
+        alive = len(memoized._memoize_function_cache)
+        del models, model
+        gc.collect()
+        print("{:<14} {:>10.3f} {:>14} {:>14}".format(
+            name, 1e6 * t, alive,
+            alive - len(memoized._memoize_function_cache)))
+
+
+if __name__ == '__main__':
+    main()
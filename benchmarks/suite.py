@@ -0,0 +1,362 @@
+#!/usr/bin/env python
+
+"""suite.py
+Benchmark suite covering the hot paths of `memoize_function`,
+`memoize_method` and `Memparams`, writing machine-readable results
+
+Measures hit latency, miss overhead, key building by signature shape,
+invalidation cost against friend graph size, memory per cached entry and the
+cost of mutating Memparams storage. Run from the repository root:
+
+    python benchmarks/suite.py [--quick] [--output results.json]
+                               [--compare baseline.json] [--filter PREFIX]
+
+Results are written as JSON with a list of `{"name", "value", "unit"}`
+records and metadata on the run. With `--compare`, each result is printed
+along with its ratio to the same result in an earlier run. Memory is only
+measured on Python >= 3.4, where `tracemalloc` is available.
+
+"""
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from timeit import default_timer, repeat
+try:
+    # Python >= 3.4
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+sys.path.insert(0, ROOT)
+
+from memoize import (Memparams, memoize_function, memoize_method,  # noqa
+                     MemoizeSlots)
+from memoize.memoize import getcallargs, getfullargspec  # noqa
+
+
+class _HashableDict(dict):
+    """The cache key type used by the original call path"""
+
+    def __hash__(self):
+        return hash((frozenset(self.keys()), frozenset(self.values())))
+
+
+def legacy_key(f, args, kwargs):
+    """The cache key built by the original call path"""
+    callargs = getcallargs(f, *args, **kwargs)
+    varkw = getfullargspec(f)[2]
+    if varkw is not None:
+        callargs[varkw] = _HashableDict(callargs[varkw])
+    return _HashableDict(callargs)
+
+
+def positional(a, b, c):
+    return a
+
+
+def defaults(a, b=2, c=3):
+    return a
+
+
+def variadic(a, *args, **kwargs):
+    return a
+
+
+def identity(x):
+    return x
+
+
+# (name, function, args, kwargs, memoize_function options)
+SIGNATURES = [
+    ('positional', positional, (1, 2, 3), {}, {}),
+    ('keywords', positional, (1,), {'c': 3, 'b': 2}, {}),
+    ('defaults', defaults, (1,), {}, {}),
+    ('variadic', variadic, (1, 2), {'x': 3}, {}),
+    ('content_keys', positional, ([1.0] * 100, 2, 3), {},
+     {'content_keys': True}),
+]
+
+
+class Suite(object):
+    """
+    Collection of benchmark results
+
+    Parameters
+    ----------
+    quick : bool
+        If True, fewer repetitions and smaller sizes are used.
+    prefix : str, optional
+        Only benchmarks whose name starts with `prefix` are run.
+
+    """
+
+    def __init__(self, quick=False, prefix=''):
+        self.quick = quick
+        self.prefix = prefix
+        self.results = []
+
+    def wanted(self, name):
+        return name.startswith(self.prefix)
+
+    def record(self, name, value, unit):
+        self.results.append({'name': name, 'value': value, 'unit': unit})
+        print("{:<48} {:>14.4f} {}".format(name, value, unit))
+
+    def time(self, name, stmt, number=None):
+        """Record the best time per execution of `stmt` in microseconds"""
+        if not self.wanted(name):
+            return
+        number = number or (2000 if self.quick else 20000)
+        repeats = 3 if self.quick else 7
+        stmt()
+        best = min(repeat(stmt, number=number, repeat=repeats)) / number
+        self.record(name, 1e6 * best, 'us')
+
+    def sizes(self, full):
+        return full[:2] if self.quick else full
+
+
+def bench_hits(suite):
+    for (name, f, args, kwargs, options) in SIGNATURES:
+        memoized = memoize_function(f, **options)
+        suite.time('hit/function/' + name, lambda: memoized(*args, **kwargs))
+
+    class Adder(MemoizeSlots):
+        __slots__ = ('base',)
+
+        def __init__(self):
+            self.base = 3
+
+        @memoize_method
+        def add(self, addend):
+            return self.base + addend
+
+        @memoize_method(stats=True)
+        def add_counted(self, addend):
+            return self.base + addend
+
+        @memoize_method(lazy=True)
+        def add_lazy(self, addend):
+            return self.base + addend
+
+    adder = Adder()
+    suite.time('hit/method/bound', lambda: adder.add(4))
+    suite.time('hit/method/keywords', lambda: adder.add(addend=4))
+    suite.time('hit/method/stats', lambda: adder.add_counted(4))
+    suite.time('hit/method/lazy', lambda: adder.add_lazy(4))
+
+
+def bench_misses(suite):
+    """Overhead of a miss over calling the function itself"""
+    n = 2000 if suite.quick else 20000
+    args = [(i, i, i) for i in range(n)]
+    for (name, options) in [('plain', {}), ('lru', {'maxsize': n // 2}),
+                            ('stats', {'stats': True}),
+                            ('threadsafe', {'threadsafe': True})]:
+        full_name = 'miss/function/' + name
+        if not suite.wanted(full_name):
+            continue
+        memoized = memoize_function(positional, **options)
+        best = float('inf')
+        for _ in range(3 if suite.quick else 7):
+            memoized.clear_cache()
+            start = default_timer()
+            for a in args:
+                memoized(*a)
+            memoized_time = default_timer() - start
+            start = default_timer()
+            for a in args:
+                positional(*a)
+            best = min(best, memoized_time - (default_timer() - start))
+        suite.record(full_name, 1e6 * best / n, 'us')
+
+
+def bench_keys(suite):
+    for (name, f, args, kwargs, options) in SIGNATURES:
+        make_key = memoize_function(f, **options)._make_key
+        suite.time('key/' + name, lambda: make_key(args, kwargs))
+        if not options:
+            suite.time('key/legacy/' + name,
+                       lambda: hash(legacy_key(f, args, kwargs)))
+
+
+def bench_invalidation(suite):
+    class Node(object):
+        scale = Memparams(float, 'scale')
+
+        @memoize_method
+        def value(self, x):
+            return x
+
+    for size in suite.sizes([10, 1000, 100000]):
+        name = 'invalidate/chain/{}'.format(size)
+        if not suite.wanted(name):
+            continue
+        nodes = [Node() for _ in range(size)]
+        for (node, friend) in zip(nodes, nodes[1:]):
+            memoize_method.register_friend(node, friend)
+        best = float('inf')
+        for _ in range(3):
+            for node in nodes:
+                node.value(1)
+            start = default_timer()
+            memoize_method.clear_cache(nodes[0])
+            best = min(best, default_timer() - start)
+        suite.record(name, 1e6 * best, 'us')
+
+    for lazy in (False, True):
+        class Model(object):
+            scale = Memparams(float, 'scale')
+
+            @memoize_method(lazy=lazy)
+            def value(self, x):
+                return self.scale * x
+
+        for size in suite.sizes([100, 10000, 1000000]):
+            name = 'invalidate/{}/{}'.format('lazy' if lazy else 'eager',
+                                             size)
+            if not suite.wanted(name):
+                continue
+            best = float('inf')
+            for _ in range(3):
+                model = Model()
+                model.scale = 1.0
+                for x in range(size):
+                    model.value(x)
+                start = default_timer()
+                model.scale = 2.0
+                best = min(best, default_timer() - start)
+                del model
+            suite.record(name, 1e6 * best, 'us')
+
+
+def bench_memory(suite):
+    if tracemalloc is None:
+        return
+    n = 10000 if suite.quick else 100000
+
+    class Holder(object):
+        @memoize_method
+        def value(self, x):
+            return x
+
+    holder = Holder()
+    fills = [
+        ('function/dict', memoize_function(identity)),
+        ('function/lru', memoize_function(identity, maxsize=n)),
+        ('function/lfu', memoize_function(identity, maxsize=n, policy='lfu')),
+        ('method/dict', holder.value),
+    ]
+    for (name, memoized) in fills:
+        name = 'memory/' + name
+        if not suite.wanted(name):
+            continue
+        # Results already exist, so only cache entries are counted
+        values = [float(x) for x in range(n)]
+        memoized(0.5)
+        gc.collect()
+        tracemalloc.start()
+        for value in values:
+            memoized(value)
+        used = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        suite.record(name, used / n, 'B/entry')
+
+
+def bench_memparams(suite):
+    for compact in (False, True):
+        class Params(object):
+            grid = Memparams(list, 'grid', compact=compact)
+            alpha = Memparams(float, 'alpha', compact=compact)
+
+            @memoize_method
+            def total(self):
+                return sum(self.grid)
+
+        kind = 'compact' if compact else 'default'
+        params = Params()
+        params.grid = []
+        params.alpha = 1.0
+
+        def mutate():
+            params.grid.append(1.0)
+            params.total()
+
+        suite.time('memparams/{}/append'.format(kind), mutate,
+                   number=1000 if suite.quick else 5000)
+        suite.time('memparams/{}/assign'.format(kind),
+                   lambda: setattr(params, 'alpha', 2.0))
+        suite.time('memparams/{}/read'.format(kind), lambda: params.alpha)
+
+
+BENCHMARKS = [bench_hits, bench_misses, bench_keys, bench_invalidation,
+              bench_memory, bench_memparams]
+
+
+def metadata(quick):
+    try:
+        commit = subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], cwd=ROOT,
+            stderr=subprocess.STDOUT).decode('ascii').strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'commit': commit,
+        'quick': quick,
+        'date': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+    }
+
+
+def compare(results, path):
+    with open(path) as f:
+        baseline = dict((result['name'], result)
+                        for result in json.load(f)['results'])
+    print()
+    print("{:<48} {:>14} {:>14} {:>8}".format('benchmark', 'baseline', 'now',
+                                              'ratio'))
+    for result in results:
+        old = baseline.get(result['name'])
+        if old is None or old['unit'] != result['unit'] or not old['value']:
+            continue
+        print("{:<48} {:>14.4f} {:>14.4f} {:>7.2f}x".format(
+            result['name'], old['value'], result['value'],
+            result['value'] / old['value']))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--quick', action='store_true',
+                        help="fewer repetitions and smaller sizes")
+    parser.add_argument('--output', '-o', help="JSON file to write")
+    parser.add_argument('--compare', '-c',
+                        help="JSON file of an earlier run to compare with")
+    parser.add_argument('--filter', '-f', default='',
+                        help="only run benchmarks starting with this prefix")
+    args = parser.parse_args(argv)
+
+    suite = Suite(quick=args.quick, prefix=args.filter)
+    for benchmark in BENCHMARKS:
+        benchmark(suite)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'metadata': metadata(args.quick),
+                       'results': suite.results}, f, indent=2, sort_keys=True)
+    if args.compare:
+        compare(suite.results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,14 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
+from .backends import *
+from .caches import *
+from .fingerprints import *
 from .memoize import *
 from .memparams import *
+from .recursive import *
+from .stats import *
+try:
+    # Python >= 3.5
+    from .coroutines import *
+except SyntaxError:
+    pass
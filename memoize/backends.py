@@ -0,0 +1,803 @@
+#!/usr/bin/env python
+
+"""backends.py
+Module providing storage backends for `memoize_function`, on disk and in
+shared memory
+
+A backend is a callable that takes the function being memoized and returns
+the cache to store its results in. Like the caches in `caches.py`, the cache
+must support `get(key, default)`, item assignment and `clear()`.
+
+"""
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+import hashlib
+import inspect
+import mmap
+import os
+import pickle
+import sqlite3
+import struct
+import tempfile
+from threading import Lock
+try:
+    # Python >= 3.3
+    from collections.abc import MutableMapping
+except ImportError:
+    # Python 2
+    from collections import MutableMapping
+try:
+    # POSIX
+    import fcntl
+except ImportError:
+    fcntl = None
+try:
+    # Python >= 3.8
+    from multiprocessing import resource_tracker, shared_memory
+except ImportError:
+    resource_tracker = shared_memory = None
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+__all__ = [str(name) for name in ('DiskBackend', 'DiskCache',
+                                  'SharedMemoryBackend', 'SharedMemoryCache',
+                                  'function_name', 'function_fingerprint',
+                                  'stable_digest')]
+
+
+class DiskBackend(object):
+    """
+    Backend storing results on disk, so that they survive process restarts
+
+    Each memoized function gets its own `DiskCache` in a subdirectory of
+    `directory` named after the function's module and qualified name. The
+    cache is invalidated whenever the function's source code or `version`
+    changes.
+
+    Parameters
+    ----------
+    directory : str
+        Directory to store caches in. Created if necessary.
+    version : str, optional
+        User-supplied version of the memoized functions. Changing it
+        invalidates the caches.
+    mmap_threshold : int, optional
+        Size in bytes from which `bytes` and NumPy array results are stored
+        raw rather than pickled.
+    zero_copy : bool, optional
+        Return raw results as read-only views of the memory-mapped cache file
+        rather than copies, see `DiskCache`.
+
+    Examples
+    --------
+    >>> @memoize_function(backend=DiskBackend('/var/cache/myapp'))
+    >>> def expensive(x):
+    >>>     ...
+
+    """
+
+    def __init__(self, directory, version=None, mmap_threshold=4096,
+                 zero_copy=False):
+        self.directory = directory
+        self.version = version
+        self.mmap_threshold = mmap_threshold
+        self.zero_copy = zero_copy
+
+    def __call__(self, f):
+        return DiskCache(os.path.join(self.directory, function_name(f)),
+                         fingerprint=function_fingerprint(f, self.version),
+                         mmap_threshold=self.mmap_threshold,
+                         zero_copy=self.zero_copy)
+
+
+class DiskCache(MutableMapping):
+    """
+    Mapping stored on disk in a directory, shared between processes
+
+    Values are appended to a data file, and an SQLite index maps a stable
+    digest of each key (see `stable_digest`) to the offset and length of its
+    value. The data file is memory-mapped for reading. `bytes` values and
+    NumPy arrays of at least `mmap_threshold` bytes are stored raw, and
+    copied out of the mapping without unpickling. All other values are
+    pickled. With `zero_copy`, raw values are instead returned without
+    copying, as a read-only `memoryview` or a read-only array backed by the
+    mapping, respectively.
+
+    Keys must be hashable. Since only digests of keys are stored, iteration
+    yields the digests.
+
+    Parameters
+    ----------
+    path : str
+        Directory to store the cache in. Created if necessary.
+    fingerprint : str, optional
+        Identifies the version of the cached data. If it differs from the
+        fingerprint stored in an existing cache, the cache is cleared.
+    mmap_threshold : int, optional
+        Size in bytes from which `bytes` and NumPy array values are stored
+        raw rather than pickled.
+    zero_copy : bool, optional
+        Return raw values as read-only views of the memory map. The views
+        are not of the stored type, so callers must expect a `memoryview` in
+        place of `bytes` and must not write to arrays.
+
+    """
+    _PICKLE, _BYTES, _ARRAY = range(3)
+    _ALIGNMENT = 64
+
+    def __init__(self, path, fingerprint=None, mmap_threshold=4096,
+                 zero_copy=False):
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        self.path = path
+        self.mmap_threshold = mmap_threshold
+        self.zero_copy = zero_copy
+        self._lock = Lock()
+        self._mmap = None
+        self._mmap_generation = None
+        self._db = db = sqlite3.connect(
+            os.path.join(path, 'index.sqlite'), timeout=60,
+            isolation_level=None, check_same_thread=False)
+        with self._transaction():
+            db.execute("CREATE TABLE IF NOT EXISTS meta "
+                       "(name TEXT PRIMARY KEY, value TEXT)")
+            db.execute("CREATE TABLE IF NOT EXISTS entries "
+                       "(key BLOB PRIMARY KEY, kind INTEGER, "
+                       "offset INTEGER, length INTEGER, info BLOB)")
+            db.execute("INSERT OR IGNORE INTO meta VALUES ('generation', 0)")
+            stored = self._meta('fingerprint')
+            if fingerprint is not None and stored != fingerprint:
+                self._clear()
+                db.execute("INSERT OR REPLACE INTO meta VALUES "
+                           "('fingerprint', ?)", (fingerprint,))
+
+    def _transaction(self, write=True):
+        return _Transaction(self._db, self._lock, write)
+
+    def _meta(self, name):
+        row = self._db.execute("SELECT value FROM meta WHERE name = ?",
+                               (name,)).fetchone()
+        return None if row is None else row[0]
+
+    def _data_path(self, generation):
+        return os.path.join(self.path, 'data-{}.bin'.format(generation))
+
+    def _clear(self):
+        # A new data file is started rather than truncating the old one, which
+        # may still be mapped by this or other processes
+        generation = int(self._meta('generation'))
+        self._db.execute("DELETE FROM entries")
+        self._db.execute("UPDATE meta SET value = ? WHERE name = "
+                         "'generation'", (str(generation + 1),))
+        try:
+            os.remove(self._data_path(generation))
+        except OSError:
+            pass
+
+    def _map(self, generation, end):
+        mm = self._mmap
+        if mm is None or self._mmap_generation != generation or len(mm) < end:
+            with open(self._data_path(generation), 'rb') as datafile:
+                mm = mmap.mmap(datafile.fileno(), 0, access=mmap.ACCESS_READ)
+            # Views of the previous map keep it alive as long as needed
+            self._mmap, self._mmap_generation = mm, generation
+        return mm
+
+    def get(self, key, default=None):
+        digest = stable_digest(key)
+        with self._transaction(write=False):
+            row = self._db.execute(
+                "SELECT kind, offset, length, info FROM entries WHERE key = ?",
+                (digest,)).fetchone()
+            if row is None:
+                return default
+            generation = self._meta('generation')
+            kind, offset, length, info = row
+            mm = self._map(generation, offset + length)
+        if kind == self._BYTES:
+            if self.zero_copy:
+                return memoryview(mm)[offset:offset + length]
+            return mm[offset:offset + length]
+        if kind == self._ARRAY:
+            dtype, shape = pickle.loads(info)
+            count = length // numpy.dtype(dtype).itemsize
+            array = numpy.frombuffer(mm, dtype=dtype, count=count,
+                                     offset=offset).reshape(shape)
+            return array if self.zero_copy else array.copy()
+        return pickle.loads(mm[offset:offset + length])
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        digest = stable_digest(key)
+        kind, info, data = self._serialize(value)
+        with self._transaction():
+            generation = self._meta('generation')
+            with open(self._data_path(generation), 'ab') as datafile:
+                offset = datafile.tell()
+                if kind == self._ARRAY:
+                    padding = -offset % self._ALIGNMENT
+                    datafile.write(b'\0' * padding)
+                    offset += padding
+                datafile.write(data)
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                (digest, kind, offset, len(data), info))
+
+    def _serialize(self, value):
+        # bytearray values are pickled, so that they are returned as such
+        if isinstance(value, bytes):
+            if len(value) >= self.mmap_threshold:
+                return self._BYTES, None, value
+        elif (numpy is not None and isinstance(value, numpy.ndarray) and
+                value.nbytes >= self.mmap_threshold and
+                not value.dtype.hasobject):
+            info = pickle.dumps((value.dtype.str, value.shape), protocol=2)
+            return (self._ARRAY, sqlite3.Binary(info),
+                    numpy.ascontiguousarray(value).tobytes())
+        return (self._PICKLE, None,
+                pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def __delitem__(self, key):
+        with self._transaction():
+            cursor = self._db.execute("DELETE FROM entries WHERE key = ?",
+                                      (stable_digest(key),))
+            if not cursor.rowcount:
+                raise KeyError(key)
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __iter__(self):
+        with self._transaction(write=False):
+            digests = [row[0] for row in
+                       self._db.execute("SELECT key FROM entries")]
+        return iter(digests)
+
+    def __len__(self):
+        with self._transaction(write=False):
+            return self._db.execute(
+                "SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def clear(self):
+        with self._transaction():
+            self._clear()
+
+    def close(self):
+        self._db.close()
+        self._mmap = None
+
+
+class _Transaction(object):
+    """
+    Context manager running an SQLite transaction, serialized with other
+    threads through `lock`
+
+    Write transactions take the database's write lock right away, so that
+    they do not fail halfway through. Read transactions are deferred, so that
+    they only take a shared lock and run alongside readers in other
+    processes.
+
+    """
+
+    def __init__(self, db, lock, write=True):
+        self.db = db
+        self.lock = lock
+        self.write = write
+
+    def __enter__(self):
+        self.lock.acquire()
+        try:
+            self.db.execute("BEGIN IMMEDIATE" if self.write else
+                            "BEGIN DEFERRED")
+        except BaseException:
+            self.lock.release()
+            raise
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            self.db.execute("COMMIT" if exc_type is None else "ROLLBACK")
+        finally:
+            self.lock.release()
+
+
+class SharedMemoryBackend(object):
+    """
+    Backend storing results in shared memory, so that all processes on the
+    host share one cache
+
+    The results of all functions memoized with the backend are pickled into a
+    single `multiprocessing.shared_memory` arena named `name`, with an index
+    protected by a lock file. The first process to use the name creates the
+    arena, and every other process, be it a forked or spawned child or an
+    unrelated process, attaches to it without copying anything. This makes
+    for a warm start: a parent process can fill the cache before starting
+    its workers, whose memoized functions then hit right away.
+
+    When the arena runs out of data space or index slots, it is cleared and
+    starts over. Requires Python >= 3.8 and a POSIX system.
+
+    Parameters
+    ----------
+    name : str
+        Name of the shared memory arena.
+    size : int, optional
+        Size in bytes of the data region, used when creating the arena.
+    slots : int, optional
+        Number of index slots, used when creating the arena. At most 3/4 of
+        them are filled before the arena is cleared.
+
+    Examples
+    --------
+    >>> backend = SharedMemoryBackend('myapp-cache')
+    >>>
+    >>> @memoize_function(backend=backend)
+    >>> def expensive(x):
+    >>>     ...
+    >>>
+    >>> [expensive(x) for x in inputs]  # warm up in the parent process
+    >>> with ProcessPoolExecutor() as pool:
+    >>>     pool.map(expensive, inputs)  # workers hit the parent's results
+    >>> backend.unlink()
+
+    """
+
+    def __init__(self, name, size=2 ** 26, slots=2 ** 16):
+        self.name = name
+        self.size = size
+        self.slots = slots
+        self._arena = None
+
+    @property
+    def arena(self):
+        if self._arena is None:
+            self._arena = _SharedArena(self.name, self.size, self.slots)
+        return self._arena
+
+    def __call__(self, f):
+        return SharedMemoryCache(self.arena, function_name(f))
+
+    def __getstate__(self):
+        # The arena is attached anew in the receiving process
+        state = self.__dict__.copy()
+        state['_arena'] = None
+        return state
+
+    def unlink(self):
+        """
+        Destroy the shared memory arena
+
+        Processes attached to the arena keep using it until they exit, but
+        it can no longer be attached to.
+
+        """
+        self.arena.unlink()
+
+
+class SharedMemoryCache(MutableMapping):
+    """
+    Mapping stored in a shared memory arena, under a namespace
+
+    Keys must be hashable, and are stored as digests (see `stable_digest`)
+    tagged with a digest of `namespace`. Values are stored pickled, so every
+    lookup returns a new copy. Iteration is not supported.
+
+    Parameters
+    ----------
+    arena : _SharedArena
+        The arena to store entries in.
+    namespace : str
+        Namespace of the entries within the arena.
+
+    """
+
+    def __init__(self, arena, namespace):
+        self.arena = arena
+        self.namespace = namespace
+        self._tag = stable_digest(namespace)[:8]
+
+    def _digest(self, key):
+        return self._tag + stable_digest((self.namespace, key))[:24]
+
+    def get(self, key, default=None):
+        data = self.arena.get(self._digest(key))
+        if data is None:
+            return default
+        return pickle.loads(data)
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self.arena.set(self._digest(key),
+                       pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def __delitem__(self, key):
+        if not self.arena.delete(self._digest(key)):
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        return self.arena.get(self._digest(key)) is not None
+
+    def __iter__(self):
+        raise TypeError("SharedMemoryCache does not support iteration")
+
+    def __len__(self):
+        return self.arena.count(self._tag)
+
+    def clear(self):
+        """
+        Delete the entries of this namespace, leaving those of others
+
+        """
+        self.arena.delete_prefix(self._tag)
+
+
+class _SharedArena(object):
+    """
+    Hash table of byte strings in a named shared memory block
+
+    The block consists of a header, an open-addressing index of `slots` slots
+    and a data region of `size` bytes that values are appended to. Access is
+    serialized between processes by an exclusive lock on a lock file and
+    between threads by a thread lock.
+
+    The block is destroyed when the `multiprocessing` resource tracker of the
+    creating process shuts down, unless it is unlinked first. Processes
+    sharing that tracker, such as the creator's children, leave their
+    registration with it, while other processes unregister from their own
+    tracker, so that their exit does not destroy the block.
+
+    """
+    _MAGIC = b'memoize2'
+    _HEADER = struct.Struct('<8sqqqq')  # magic, slots, size, used, filled
+    # Identifies the creator's resource tracker, see _tracker_id
+    _TRACKER = struct.Struct('<q')
+    _SLOT = struct.Struct('<32sqq')  # digest, offset, length
+    _HEADER_SIZE = 64
+    _EMPTY = b'\0' * 32
+    _DELETED = -1
+
+    def __init__(self, name, size, slots):
+        if shared_memory is None or fcntl is None:
+            raise RuntimeError("Shared memory caches require Python >= 3.8 "
+                               "on a POSIX system")
+        self.name = name
+        self._unregistered = False
+        self._lockpath = os.path.join(tempfile.gettempdir(),
+                                      '{}.memoize.lock'.format(name))
+        self._pid = None
+        with self._locked():
+            try:
+                total = self._HEADER_SIZE + slots * self._SLOT.size + size
+                self._shm = shared_memory.SharedMemory(name, create=True,
+                                                       size=total)
+            except FileExistsError:
+                self._shm = self._attach(name)
+            else:
+                self._shm.buf[:self._HEADER_SIZE] = (
+                    b'\0' * self._HEADER_SIZE)
+                self._HEADER.pack_into(self._shm.buf, 0, self._MAGIC, slots,
+                                       size, 0, 0)
+                self._TRACKER.pack_into(self._shm.buf, self._HEADER.size,
+                                        _tracker_id())
+                self._data_start = self._HEADER_SIZE + slots * self._SLOT.size
+                self._clear()
+            magic, self.slots, self.size, _, _ = self._HEADER.unpack_from(
+                self._shm.buf, 0)
+        if magic != self._MAGIC:
+            raise ValueError("{!r} is not a memoize shared memory arena"
+                             .format(name))
+        self._data_start = self._HEADER_SIZE + self.slots * self._SLOT.size
+
+    def _attach(self, name):
+        try:
+            # Python >= 3.13
+            return shared_memory.SharedMemory(name, track=False)
+        except TypeError:
+            pass
+        shm = shared_memory.SharedMemory(name)
+        creator = self._TRACKER.unpack_from(shm.buf, self._HEADER.size)[0]
+        if _tracker_id() != creator:
+            # Keep this process's own tracker from destroying the block
+            resource_tracker.unregister(shm._name, 'shared_memory')
+            self._unregistered = True
+        return shm
+
+    def _locked(self):
+        if self._pid != os.getpid():
+            # flock locks belong to the open file description, which forked
+            # children share with their parent, so every process opens the
+            # lock file anew. A thread lock held across the fork would never
+            # be released in the child.
+            self._pid = os.getpid()
+            self._thread_lock = Lock()
+            self._lockfile = open(self._lockpath, 'a')
+        return _FileLock(self._lockfile, self._thread_lock)
+
+    def _find(self, digest):
+        """
+        Return the slot index holding `digest`, or the empty slot ending its
+        probe sequence
+
+        """
+        buf, slot = self._shm.buf, self._SLOT
+        # The leading bytes of digests may be shared by a namespace
+        index = struct.unpack_from('<Q', digest, 8)[0] % self.slots
+        while True:
+            position = self._HEADER_SIZE + index * slot.size
+            stored = bytes(buf[position:position + 32])
+            if stored == digest or stored == self._EMPTY:
+                return index
+            index = (index + 1) % self.slots
+
+    def _slot(self, index):
+        return self._SLOT.unpack_from(
+            self._shm.buf, self._HEADER_SIZE + index * self._SLOT.size)
+
+    def get(self, digest):
+        with self._locked():
+            stored, offset, length = self._slot(self._find(digest))
+            if stored == self._EMPTY or offset == self._DELETED:
+                return None
+            start = self._data_start + offset
+            return bytes(self._shm.buf[start:start + length])
+
+    def set(self, digest, data):
+        length = len(data)
+        if length > self.size:
+            return
+        with self._locked():
+            buf = self._shm.buf
+            _, slots, size, used, filled = self._HEADER.unpack_from(buf, 0)
+            index = self._find(digest)
+            new = self._slot(index)[0] == self._EMPTY
+            if used + length > size or (new and 4 * (filled + 1) > 3 * slots):
+                self._clear()
+                used = filled = 0
+                index = self._find(digest)
+                new = True
+            start = self._data_start + used
+            buf[start:start + length] = data
+            self._SLOT.pack_into(
+                buf, self._HEADER_SIZE + index * self._SLOT.size, digest,
+                used, length)
+            self._HEADER.pack_into(buf, 0, self._MAGIC, slots, size,
+                                   used + length, filled + new)
+
+    def delete(self, digest):
+        with self._locked():
+            index = self._find(digest)
+            stored, offset, length = self._slot(index)
+            if stored == self._EMPTY or offset == self._DELETED:
+                return False
+            # Leave a tombstone to keep probe sequences intact
+            self._SLOT.pack_into(
+                self._shm.buf, self._HEADER_SIZE + index * self._SLOT.size,
+                digest, self._DELETED, 0)
+            return True
+
+    def delete_prefix(self, prefix):
+        """
+        Delete the entries whose digest starts with `prefix`
+
+        """
+        with self._locked():
+            buf = self._shm.buf
+            for index in range(self.slots):
+                stored, offset, _ = self._slot(index)
+                if (stored != self._EMPTY and offset != self._DELETED and
+                        stored.startswith(prefix)):
+                    self._SLOT.pack_into(
+                        buf, self._HEADER_SIZE + index * self._SLOT.size,
+                        stored, self._DELETED, 0)
+
+    def count(self, prefix=b''):
+        """
+        Return the number of entries whose digest starts with `prefix`
+
+        """
+        with self._locked():
+            count = 0
+            for index in range(self.slots):
+                stored, offset, _ = self._slot(index)
+                count += (stored != self._EMPTY and offset != self._DELETED and
+                          stored.startswith(prefix))
+            return count
+
+    def _clear(self):
+        buf = self._shm.buf
+        buf[self._HEADER_SIZE:self._data_start] = (
+            b'\0' * (self._data_start - self._HEADER_SIZE))
+        magic, slots, size, _, _ = self._HEADER.unpack_from(buf, 0)
+        self._HEADER.pack_into(buf, 0, magic, slots, size, 0, 0)
+
+    def clear(self):
+        with self._locked():
+            self._clear()
+
+    def unlink(self):
+        if self._unregistered:
+            # SharedMemory.unlink unregisters the block
+            resource_tracker.register(self._shm._name, 'shared_memory')
+            self._unregistered = False
+        self._shm.unlink()
+        try:
+            os.remove(self._lockpath)
+        except OSError:
+            pass
+
+
+class _FileLock(object):
+    """
+    Context manager holding `thread_lock` and an exclusive lock on `lockfile`
+
+    """
+
+    def __init__(self, lockfile, thread_lock):
+        self.lockfile = lockfile
+        self.thread_lock = thread_lock
+
+    def __enter__(self):
+        self.thread_lock.acquire()
+        try:
+            fcntl.flock(self.lockfile, fcntl.LOCK_EX)
+        except BaseException:
+            self.thread_lock.release()
+            raise
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            fcntl.flock(self.lockfile, fcntl.LOCK_UN)
+        finally:
+            self.thread_lock.release()
+
+
+_MISSING = object()
+
+
+def _tracker_id():
+    """
+    Return an identifier of the `multiprocessing` resource tracker this
+    process reports to, the same in every process sharing the tracker, or 0
+    if there is none
+
+    """
+    # Processes sharing a tracker hold the write end of the same pipe to it
+    fd = getattr(resource_tracker._resource_tracker, '_fd', None)
+    if fd is None:
+        return 0
+    try:
+        return os.fstat(fd).st_ino
+    except OSError:
+        return 0
+
+
+def function_name(f):
+    """
+    Return the qualified name of `f`, including the module name
+
+    The main module has the same name in `multiprocessing` children as in the
+    parent process.
+
+    """
+    module = getattr(f, '__module__', None)
+    if module == '__mp_main__':
+        module = '__main__'
+    return '{}.{}'.format(module, getattr(f, '__qualname__', f.__name__))
+
+
+def function_fingerprint(f, version=None):
+    """
+    Return a string identifying the implementation of `f`
+
+    The fingerprint is a digest of the source code of `f` (or of its bytecode,
+    if the source is unavailable) and `version`.
+
+    """
+    try:
+        code = inspect.getsource(f).encode('utf-8')
+    except (IOError, OSError, TypeError):
+        code = getattr(getattr(f, '__code__', None), 'co_code', b'')
+    digest = hashlib.sha256(code)
+    if version is not None:
+        digest.update(b'\0' + str(version).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def stable_digest(key):
+    """
+    Return a digest of `key` that is the same in every process
+
+    Unlike `hash`, the digest does not depend on hash randomization or on the
+    iteration order of sets. Built-in scalars, strings, tuples and frozensets
+    are encoded structurally, other objects by pickling them.
+
+    Raises
+    ------
+    TypeError
+        If `key` is not hashable.
+
+    """
+    digest = hashlib.sha256()
+    _encode_key(key, digest.update)
+    return digest.digest()
+
+
+def _encode_key(key, write):
+    keytype = type(key)
+    if keytype is tuple:
+        write(b'(' + struct.pack('<q', len(key)))
+        for item in key:
+            _encode_key(item, write)
+    elif keytype is frozenset:
+        items = []
+        for item in key:
+            parts = []
+            _encode_key(item, parts.append)
+            items.append(b''.join(parts))
+        items.sort()
+        write(b'{' + struct.pack('<q', len(items)) + b''.join(items))
+    elif keytype is bytes:
+        write(b'b' + struct.pack('<q', len(key)) + key)
+    elif keytype is type(''):
+        data = key.encode('utf-8')
+        write(b's' + struct.pack('<q', len(data)) + data)
+    elif key is None or keytype in (bool, int, float, complex):
+        data = '{}:{!r}'.format(keytype.__name__, key).encode('ascii')
+        write(b'n' + struct.pack('<q', len(data)) + data)
+    else:
+        hash(key)
+        data = pickle.dumps(key, protocol=2)
+        write(b'p' + struct.pack('<q', len(data)) + data)
+
+
+_SNAPSHOT_FORMAT = 'memoize-snapshot-1'
+
+
+def _write_snapshot(file, header, items):
+    """
+    Write `header` and the (key, value) pairs in `items` to the binary file
+    `file`, one pickle per record, returning the number of pairs
+
+    """
+    protocol = pickle.HIGHEST_PROTOCOL
+    pickle.dump((_SNAPSHOT_FORMAT, header), file, protocol)
+    count = 0
+    for item in items:
+        pickle.dump(item, file, protocol)
+        count += 1
+    return count
+
+
+def _read_snapshot(file):
+    """
+    Return the header of the snapshot in the binary file `file` and an
+    iterator over its (key, value) pairs, read one at a time
+
+    """
+    try:
+        fmt, header = pickle.load(file)
+    except (EOFError, TypeError, ValueError, pickle.UnpicklingError):
+        fmt = header = None
+    if fmt != _SNAPSHOT_FORMAT:
+        raise ValueError("Not a memoize cache snapshot")
+    return header, _iter_records(file)
+
+
+def _iter_records(file):
+    while True:
+        try:
+            yield pickle.load(file)
+        except EOFError:
+            return
@@ -0,0 +1,673 @@
+#!/usr/bin/env python
+
+"""caches.py
+Module providing bounded cache containers with pluggable eviction policies
+
+"""
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+import pickle
+import zlib
+from collections import OrderedDict, namedtuple
+from timeit import default_timer as _clock
+try:
+    # Python >= 3.3
+    from collections.abc import MutableMapping
+except ImportError:
+    # Python 2
+    from collections import MutableMapping
+try:
+    # Python >= 3.3
+    from time import monotonic as _timer
+except ImportError:
+    # Python 2
+    from time import time as _timer
+try:
+    # Python >= 3.3
+    import lzma
+except ImportError:
+    lzma = None
+
+__all__ = [str(name) for name in ('LRUCache', 'WeightedCache', 'LFUCache',
+                                  'TTLCache', 'StorageInfo', 'CompressedCache',
+                                  'POLICIES', 'cache_factory')]
+
+
+class _Cache(MutableMapping):
+    """
+    Base class of the bounded caches
+
+    If `on_evict` is set to a callable, it is called with the key of every
+    entry the cache evicts or expires, but not of entries deleted explicitly.
+    It is not pickled.
+
+    """
+    on_evict = None
+
+    def _evicted(self, key):
+        if self.on_evict is not None:
+            self.on_evict(key)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('on_evict', None)
+        return state
+
+
+class LRUCache(_Cache):
+    """
+    Mapping that holds at most `maxsize` entries, evicting the least recently
+    used entry when full
+
+    Lookups through `get` or item access count as a use. Both hits and
+    insertions are O(1).
+
+    Parameters
+    ----------
+    maxsize : int
+        Maximum number of entries. Nothing is stored if it is 0 or less.
+
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+
+    def _touch(self, key):
+        data = self._data
+        try:
+            data.move_to_end(key)
+        except AttributeError:
+            # Python 2
+            data[key] = data.pop(key)
+
+    def _evict(self):
+        key, _ = self._data.popitem(last=False)
+        self._evicted(key)
+
+    def get(self, key, default=None):
+        try:
+            value = self._data[key]
+        except KeyError:
+            return default
+        self._touch(key)
+        return value
+
+    def __getitem__(self, key):
+        value = self._data[key]
+        self._touch(key)
+        return value
+
+    def __setitem__(self, key, value):
+        data = self._data
+        if key in data:
+            self._touch(key)
+        else:
+            if self.maxsize <= 0:
+                return
+            while data and len(data) >= self.maxsize:
+                self._evict()
+        data[key] = value
+
+    def __delitem__(self, key):
+        del self._data[key]
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def clear(self):
+        self._data.clear()
+
+
+class WeightedCache(LRUCache):
+    """
+    Mapping whose entries have a total weight of at most `maxsize`, evicting
+    the least recently used entries when full
+
+    Values that alone weigh more than `maxsize` are not stored.
+
+    Parameters
+    ----------
+    maxsize : number
+        Maximum total weight of the entries. Nothing is stored if it is 0 or
+        less.
+    sizeof : callable
+        Function returning the weight of a value, e.g., `sys.getsizeof`.
+
+    """
+
+    def __init__(self, maxsize, sizeof):
+        super(WeightedCache, self).__init__(maxsize)
+        self.sizeof = sizeof
+        self.weight = 0
+        self._weights = {}
+
+    def _evict(self):
+        key, _ = self._data.popitem(last=False)
+        self.weight -= self._weights.pop(key)
+        self._evicted(key)
+
+    def __setitem__(self, key, value):
+        if type(value) is _Compressed:
+            # Weighed by CompressedCache before compression
+            weight = value.weight
+        else:
+            weight = self.sizeof(value)
+        if key in self._data:
+            del self[key]
+        if weight > self.maxsize or self.maxsize <= 0:
+            return
+        while self._data and self.weight + weight > self.maxsize:
+            self._evict()
+        self._data[key] = value
+        self._weights[key] = weight
+        self.weight += weight
+
+    def __delitem__(self, key):
+        del self._data[key]
+        self.weight -= self._weights.pop(key)
+
+    def clear(self):
+        self._data.clear()
+        self._weights.clear()
+        self.weight = 0
+
+
+class LFUCache(_Cache):
+    """
+    Mapping that holds at most `maxsize` entries, evicting the least
+    frequently used entry when full
+
+    Ties are broken by evicting the least recently used of the least
+    frequently used entries. Both hits and insertions are O(1).
+
+    Parameters
+    ----------
+    maxsize : int
+        Maximum number of entries. Nothing is stored if it is 0 or less.
+
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = {}
+        self._counts = {}
+        # Use count -> keys with that count, in order of last use
+        self._buckets = {}
+        self._mincount = 0
+
+    def _touch(self, key):
+        counts, buckets = self._counts, self._buckets
+        count = counts[key]
+        bucket = buckets[count]
+        del bucket[key]
+        if not bucket:
+            del buckets[count]
+            if self._mincount == count:
+                self._mincount = count + 1
+        counts[key] = count = count + 1
+        buckets.setdefault(count, OrderedDict())[key] = None
+
+    def _evict(self):
+        buckets = self._buckets
+        if self._mincount not in buckets:
+            # Only after explicit deletions
+            self._mincount = min(buckets)
+        bucket = buckets[self._mincount]
+        key, _ = bucket.popitem(last=False)
+        if not bucket:
+            del buckets[self._mincount]
+        del self._data[key]
+        del self._counts[key]
+        self._evicted(key)
+
+    def get(self, key, default=None):
+        data = self._data
+        if key in data:
+            self._touch(key)
+            return data[key]
+        return default
+
+    def __getitem__(self, key):
+        value = self._data[key]
+        self._touch(key)
+        return value
+
+    def __setitem__(self, key, value):
+        data = self._data
+        if key in data:
+            self._touch(key)
+        else:
+            if self.maxsize <= 0:
+                return
+            while data and len(data) >= self.maxsize:
+                self._evict()
+            self._counts[key] = 1
+            self._buckets.setdefault(1, OrderedDict())[key] = None
+            self._mincount = 1
+        data[key] = value
+
+    def __delitem__(self, key):
+        del self._data[key]
+        count = self._counts.pop(key)
+        bucket = self._buckets[count]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[count]
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def clear(self):
+        self._data.clear()
+        self._counts.clear()
+        self._buckets.clear()
+        self._mincount = 0
+
+
+class TTLCache(_Cache):
+    """
+    Mapping whose entries expire `ttl` seconds after they were stored
+
+    Expired entries are dropped when they are looked up and, oldest first,
+    whenever a new entry is stored. If `maxsize` is given, the oldest entry is
+    evicted when the cache is full. Both hits and insertions are amortized
+    O(1).
+
+    Parameters
+    ----------
+    maxsize : int or None
+        Maximum number of entries, or None for no limit other than expiry.
+        Nothing is stored if it is 0 or less.
+    ttl : number
+        Time to live for each entry, in seconds.
+    timer : callable, optional
+        Function returning the current time in seconds. Defaults to
+        `time.monotonic` where available.
+
+    """
+
+    def __init__(self, maxsize, ttl, timer=_timer):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.timer = timer
+        # key -> (value, expiry time), in order of expiry
+        self._data = OrderedDict()
+
+    def expire(self):
+        """
+        Drop all expired entries
+
+        """
+        data = self._data
+        now = self.timer()
+        while data:
+            key = next(iter(data))
+            if data[key][1] > now:
+                break
+            del data[key]
+            self._evicted(key)
+
+    def get(self, key, default=None):
+        item = self._data.get(key)
+        if item is None:
+            return default
+        if item[1] <= self.timer():
+            del self._data[key]
+            self._evicted(key)
+            return default
+        return item[0]
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        data = self._data
+        data.pop(key, None)
+        self.expire()
+        maxsize = self.maxsize
+        if maxsize is not None:
+            if maxsize <= 0:
+                return
+            while data and len(data) >= maxsize:
+                evicted, _ = data.popitem(last=False)
+                self._evicted(evicted)
+        data[key] = (value, self.timer() + self.ttl)
+
+    def __delitem__(self, key):
+        del self._data[key]
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __iter__(self):
+        self.expire()
+        return iter(list(self._data))
+
+    def __len__(self):
+        return len(self._data)
+
+    def clear(self):
+        self._data.clear()
+
+
+class StorageInfo(namedtuple('StorageInfo', ['entries', 'compressed',
+                                             'raw_size', 'stored_size',
+                                             'compress_time',
+                                             'decompress_time'])):
+    """
+    Storage statistics of a `CompressedCache`
+
+    Attributes
+    ----------
+    entries : int
+        Number of entries.
+    compressed : int
+        Number of entries stored compressed.
+    raw_size : int
+        Total pickled size of the values in bytes, not counting values that
+        cannot be pickled.
+    stored_size : int
+        Total size of the values as stored in bytes, counting values stored
+        uncompressed by their pickled size, and not counting values that
+        cannot be pickled.
+    compress_time : float
+        Cumulative time in seconds spent pickling and compressing values.
+    decompress_time : float
+        Cumulative time in seconds spent decompressing and unpickling values.
+
+    """
+    __slots__ = ()
+
+
+class CompressedCache(_Cache):
+    """
+    Wrapper of a cache that stores values with a large pickled size in
+    compressed form
+
+    Every value is pickled when stored to measure its size. Values whose size
+    reaches `threshold` are stored as compressed pickles, and decompressed on
+    every lookup, while smaller values are stored as they are, as are values
+    that cannot be pickled, whose size is unknown. Where pickle
+    protocol 5 is available (Python >= 3.8), the data of objects supporting
+    out-of-band buffers, such as NumPy arrays, is compressed without being
+    copied into the pickle, and unpickled objects are backed by the
+    decompressed buffers. If `cache` is a `WeightedCache`, its `sizeof` weighs
+    values before they are compressed.
+
+    Parameters
+    ----------
+    cache : mapping
+        The cache to store the values in.
+    method : str, optional
+        Compression method: 'zlib' or 'lzma'.
+    threshold : int, optional
+        Pickled size in bytes from which values are compressed.
+    level : int, optional
+        Compression level, or preset for 'lzma'. Defaults to the method's
+        default.
+
+    """
+
+    def __init__(self, cache, method='zlib', threshold=2 ** 16, level=None):
+        if method not in _COMPRESSORS:
+            raise ValueError(
+                "Unknown compression method: {!r}".format(method))
+        if _COMPRESSORS[method] is None:
+            raise ValueError(
+                "Compression method {!r} is not available".format(method))
+        self._cache = cache
+        self.method = method
+        self.threshold = threshold
+        self.level = level
+        # key -> (raw size, stored size)
+        self._sizes = {}
+        self.compress_time = self.decompress_time = 0.0
+        if hasattr(cache, 'on_evict'):
+            cache.on_evict = self._evicted_inner
+
+    def get(self, key, default=None):
+        value = self._cache.get(key, _MISSING)
+        if value is _MISSING:
+            return default
+        if type(value) is _Compressed:
+            value = self._decompress(value)
+        return value
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        start = _clock()
+        try:
+            data, buffers = _dumps(value)
+        except Exception:
+            # Not picklable (pickle raises PicklingError, TypeError or
+            # AttributeError, depending on the object): stored as it is
+            self.compress_time += _clock() - start
+            self._store(key, value, (None, None))
+            return
+        raw_size = len(data) + sum(len(buffer) for buffer in buffers)
+        if raw_size >= self.threshold:
+            compress = _COMPRESSORS[self.method][0]
+            sizeof = getattr(self._cache, 'sizeof', None)
+            value = _Compressed(
+                self.method, compress(data, self.level),
+                [compress(buffer, self.level) for buffer in buffers],
+                raw_size, None if sizeof is None else sizeof(value))
+            stored_size = value.stored_size
+        else:
+            stored_size = raw_size
+        self.compress_time += _clock() - start
+        self._store(key, value, (raw_size, stored_size))
+
+    def _store(self, key, value, sizes):
+        self._cache[key] = value
+        if key in self._cache:
+            self._sizes[key] = sizes
+        else:
+            # Refused or evicted straight away by the wrapped cache
+            self._sizes.pop(key, None)
+
+    def __delitem__(self, key):
+        del self._cache[key]
+        self._sizes.pop(key, None)
+
+    def __contains__(self, key):
+        return key in self._cache
+
+    def __iter__(self):
+        return iter(self._cache)
+
+    def __len__(self):
+        return len(self._cache)
+
+    def clear(self):
+        self._cache.clear()
+        self._sizes.clear()
+
+    def entry_sizes(self):
+        """
+        Return a dict mapping the keys of the entries to their pickled and
+        stored sizes in bytes, as `(raw_size, stored_size)`, or `(None,
+        None)` for values that cannot be pickled
+
+        """
+        return dict((key, sizes) for (key, sizes) in self._sizes.items()
+                    if key in self._cache)
+
+    def storage_info(self):
+        """
+        Return the `StorageInfo` of the cache
+
+        """
+        entries = self.entry_sizes().values()
+        sizes = [(raw, stored) for (raw, stored) in entries
+                 if raw is not None]
+        return StorageInfo(len(entries),
+                           sum(1 for (raw, stored) in sizes if stored < raw),
+                           sum(raw for (raw, _) in sizes),
+                           sum(stored for (_, stored) in sizes),
+                           self.compress_time, self.decompress_time)
+
+    def _decompress(self, value):
+        start = _clock()
+        decompress = _COMPRESSORS[value.method][1]
+        buffers = [bytearray(decompress(buffer)) for buffer in value.buffers]
+        data = decompress(value.data)
+        value = (pickle.loads(data, buffers=buffers) if buffers
+                 else pickle.loads(data))
+        self.decompress_time += _clock() - start
+        return value
+
+    def _evicted_inner(self, key):
+        self._sizes.pop(key, None)
+        self._evicted(key)
+
+
+class _Compressed(object):
+    """
+    Compressed pickle of a value stored in a `CompressedCache`
+
+    When the wrapped cache is a `WeightedCache`, `weight` is the weight of
+    the value itself, which the cache uses instead of weighing the wrapper.
+
+    """
+    __slots__ = ('method', 'data', 'buffers', 'raw_size', 'weight')
+
+    def __init__(self, method, data, buffers, raw_size, weight=None):
+        self.method = method
+        self.data = data
+        self.buffers = buffers
+        self.raw_size = raw_size
+        self.weight = weight
+
+    @property
+    def stored_size(self):
+        return len(self.data) + sum(len(buffer) for buffer in self.buffers)
+
+    def __sizeof__(self):
+        return self.stored_size
+
+    def __reduce__(self):
+        return _Compressed, (self.method, self.data, self.buffers,
+                             self.raw_size, self.weight)
+
+
+def _dumps(value):
+    """
+    Return the pickle of `value` and the list of its out-of-band buffers as
+    bytes-like objects
+
+    """
+    if pickle.HIGHEST_PROTOCOL < 5:
+        return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), []
+    buffers = []
+    data = pickle.dumps(value, protocol=5, buffer_callback=buffers.append)
+    views = []
+    for buffer in buffers:
+        try:
+            views.append(buffer.raw())
+        except BufferError:
+            # Not contiguous
+            views.append(memoryview(bytes(buffer)))
+    return data, views
+
+
+def _zlib_compress(data, level):
+    return zlib.compress(data, -1 if level is None else level)
+
+
+def _lzma_compress(data, level):
+    return lzma.compress(data, preset=level)
+
+
+_COMPRESSORS = {
+    'zlib': (_zlib_compress, zlib.decompress),
+    'lzma': None if lzma is None else (_lzma_compress, lzma.decompress),
+}
+
+_MISSING = object()
+
+POLICIES = {
+    'lru': LRUCache,
+    'lfu': LFUCache,
+    'ttl': TTLCache,
+    'weight': WeightedCache,
+}
+
+
+def cache_factory(maxsize=None, policy=None, ttl=None, sizeof=None):
+    """
+    Return a function that creates empty caches according to the given
+    eviction settings
+
+    Parameters
+    ----------
+    maxsize : number, optional
+        Maximum number of entries, or maximum total weight for the 'weight'
+        policy. Caches with a `maxsize` of 0 or less store nothing. If None
+        and no other option is given, caches are plain, unbounded dicts.
+    policy : str or callable, optional
+        One of 'lru' (the default when `maxsize` is given), 'lfu', 'ttl' (the
+        default when `ttl` is given) and 'weight' (the default when `sizeof` is
+        given), or a callable taking `maxsize` and returning a new cache.
+        Custom caches must support `get(key, default)`, item assignment and
+        `clear()`.
+    ttl : number, optional
+        Time to live in seconds for the 'ttl' policy.
+    sizeof : callable, optional
+        Function returning the weight of a value for the 'weight' policy.
+
+    Returns
+    -------
+    callable
+        Function taking no arguments and returning a new, empty cache.
+
+    """
+    if policy is None:
+        if ttl is not None:
+            policy = 'ttl'
+        elif sizeof is not None:
+            policy = 'weight'
+        elif maxsize is not None:
+            policy = 'lru'
+        else:
+            return dict
+
+    if callable(policy):
+        return lambda: policy(maxsize)
+    if policy not in POLICIES:
+        raise ValueError("Unknown cache policy: {!r}".format(policy))
+    if policy == 'ttl':
+        if ttl is None:
+            raise ValueError("The 'ttl' policy requires 'ttl'")
+        return lambda: TTLCache(maxsize, ttl)
+    if maxsize is None:
+        raise ValueError(
+            "The {!r} policy requires 'maxsize'".format(policy))
+    if policy == 'weight':
+        if sizeof is None:
+            raise ValueError("The 'weight' policy requires 'sizeof'")
+        return lambda: WeightedCache(maxsize, sizeof)
+    cls = POLICIES[policy]
+    return lambda: cls(maxsize)
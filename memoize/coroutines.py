@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+
+"""coroutines.py
+Module providing memoize decorators for coroutine functions and methods
+
+Requires Python >= 3.5.
+
+"""
+
+from asyncio import Semaphore, ensure_future, gather, shield
+from functools import partial
+from .memoize import _MISSING, memoize_function, memoize_method
+from .stats import _timer
+
+__all__ = ['memoize_async_function', 'memoize_async_method']
+
+
+class memoize_async_function(memoize_function):
+    """Cache the awaited result of a coroutine function
+
+    Works like `memoize_function`, except that the decorated function returns
+    a coroutine, and what is cached is the result of awaiting the coroutine
+    returned by `f`. Concurrent awaiters of calls with the same arguments
+    share a single `asyncio.Task`. Cancelling one awaiter does not cancel the
+    task for the others. Results of tasks that fail or are cancelled are not
+    cached.
+
+    Parameters
+    ----------
+    f : coroutine function
+        Coroutine function to memoize. If omitted, a decorator accepting `f`
+        and using the remaining options is returned.
+    maxsize, policy, ttl, sizeof, stats
+        Cache eviction and statistics options, see `memoize_function`.
+
+    Examples
+    --------
+    >>> @memoize_async_function
+    >>> async def fetch(url):
+    >>>     ...
+    >>>
+    >>> await asyncio.gather(fetch(url), fetch(url))  # fetched once
+
+    """
+
+    def __init__(self, f, maxsize=None, policy=None, ttl=None, sizeof=None,
+                 stats=False):
+        super(memoize_async_function, self).__init__(
+            f, maxsize=maxsize, policy=policy, ttl=ttl, sizeof=sizeof,
+            stats=stats)
+        # key -> task in flight
+        self._tasks = {}
+
+    async def __call__(self, *args, **kwargs):
+        key = self._make_key(args, kwargs)
+        cache = getattr(self, self.cache_name)
+        return await _await_single_flight(
+            cache, self._tasks, key, key, self.f, args, kwargs, self._stats)
+
+    async def map(self, args_list):
+        """
+        Return the awaited results of calling the memoized coroutine function
+        with each of a sequence of argument tuples
+
+        The calls run concurrently, and calls with the same arguments share a
+        single task.
+
+        Parameters
+        ----------
+        args_list : iterable
+            Tuples of positional arguments.
+
+        Returns
+        -------
+        list
+            The results, in the order of `args_list`.
+
+        """
+        return list(await gather(*[self(*args) for args in args_list]))
+
+    async def prefill(self, args_list, max_workers=None):
+        """
+        Compute and cache the awaited results for a sequence of argument
+        tuples concurrently, e.g., to warm up the cache before serving
+        requests
+
+        Results that are already cached are not recomputed. See `map`.
+
+        Parameters
+        ----------
+        args_list : iterable
+            Tuples of positional arguments.
+        max_workers : int, optional
+            Maximum number of calls awaited at a time. By default, all calls
+            run concurrently.
+
+        """
+        if max_workers is None:
+            await self.map(args_list)
+            return
+        semaphore = Semaphore(max_workers)
+
+        async def call(args):
+            async with semaphore:
+                await self(*args)
+
+        await gather(*[call(args) for args in args_list])
+
+    def clear_cache(self):
+        """
+        Clear the memoize function's cache
+
+        Tasks in flight are forgotten, so their results will not be cached.
+
+        """
+        self._tasks.clear()
+        super(memoize_async_function, self).clear_cache()
+
+
+class memoize_async_method(memoize_method):
+    """Cache the awaited result of a coroutine method
+
+    Works like `memoize_method`, except that the decorated method returns a
+    coroutine, and what is cached is the result of awaiting the coroutine
+    returned by `f`. Concurrent awaiters of calls with the same arguments on
+    the same instance share a single `asyncio.Task`. Results of tasks that fail
+    or are cancelled are not cached.
+
+    The cache is stored alongside those of `memoize_method`, so it is cleared
+    by `memoize_method.clear_cache`. Tasks in flight when the cache is
+    cleared will not have their results cached.
+
+    Parameters
+    ----------
+    f : coroutine method
+        Coroutine method to memoize. If omitted, a decorator accepting `f` and
+        using the remaining options is returned.
+    maxsize, policy, ttl, sizeof, stats
+        Cache eviction and statistics options, see `memoize_method`.
+
+    """
+
+    def __init__(self, f, maxsize=None, policy=None, ttl=None, sizeof=None,
+                 stats=False):
+        super(memoize_async_method, self).__init__(
+            f, maxsize=maxsize, policy=policy, ttl=ttl, sizeof=sizeof,
+            stats=stats)
+        # (id(cache), key) -> task in flight
+        self._tasks = {}
+
+    async def __call__(self, *args, **kwargs):
+        key = self._make_key(args, kwargs)
+        cache = self._get_cache(args[0])
+        # Clearing the instance cache replaces the per-method cache, so keying
+        # tasks on the cache object keeps new calls from joining stale tasks.
+        # The cache is kept alive by the task's callback while in flight.
+        return await _await_single_flight(
+            cache, self._tasks, key, (id(cache), key), self.f, args, kwargs,
+            self._stats)
+
+    async def map(self, obj, args_list):
+        """
+        Return the awaited results of calling the memoized coroutine method on
+        an object with each of a sequence of argument tuples
+
+        Works like `memoize_async_function.map`.
+
+        """
+        return list(await gather(*[self(obj, *args) for args in args_list]))
+
+
+async def _await_single_flight(cache, tasks, key, task_key, f, args, kwargs,
+                               stats=None):
+    """
+    Return the result for `key` in `cache`, awaiting `f(*args, **kwargs)` in a
+    shared task if missing
+
+    Joining another awaiter's task counts as a hit in `stats`.
+
+    """
+    try:
+        res = cache.get(key, _MISSING)
+    except TypeError:
+        # Unhashable argument list
+        if stats is None:
+            return await f(*args, **kwargs)
+        start = _timer()
+        try:
+            return await f(*args, **kwargs)
+        finally:
+            stats.uncached(_timer() - start)
+    if res is not _MISSING:
+        if stats is not None:
+            stats.hit()
+        return res
+
+    task = tasks.get(task_key)
+    if task is None:
+        task = tasks[task_key] = ensure_future(f(*args, **kwargs))
+        task.add_done_callback(
+            partial(_finish_task, cache, tasks, key, task_key, stats,
+                    _timer()))
+    elif stats is not None:
+        stats.hit()
+    return await shield(task)
+
+
+def _finish_task(cache, tasks, key, task_key, stats, start, task):
+    if stats is not None:
+        stats.miss(_timer() - start)
+    if tasks.get(task_key) is task:
+        del tasks[task_key]
+    else:
+        # Forgotten by clear_cache
+        cache = None
+    # Retrieving the exception keeps asyncio from warning about it if all
+    # awaiters were cancelled
+    if task.cancelled() or task.exception() is not None:
+        return
+    if cache is not None:
+        cache[key] = task.result()
@@ -0,0 +1,240 @@
+#!/usr/bin/env python
+
+"""fingerprints.py
+Module providing content-based cache keys for unhashable arguments
+
+"""
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+import hashlib
+import struct
+from functools import partial
+from operator import itemgetter
+from .backends import _encode_key
+
+__all__ = [str(name) for name in ('Fingerprint', 'register_fingerprint',
+                                  'fingerprint', 'content_key')]
+
+_new_digest = getattr(hashlib, 'blake2b', None)
+if _new_digest is None:
+    # Python < 3.6
+    _new_digest = hashlib.sha1
+else:
+    _new_digest = partial(hashlib.blake2b, digest_size=20)
+
+_fingerprint_functions = {}
+
+
+class Fingerprint(bytes):
+    """
+    Digest of the content of an unhashable argument, standing in for the
+    argument in cache keys
+
+    Fingerprints only compare equal to other fingerprints.
+
+    """
+    __slots__ = ()
+
+    def __eq__(self, other):
+        return type(other) is Fingerprint and bytes.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = bytes.__hash__
+
+    def __repr__(self):
+        return 'Fingerprint({})'.format(bytes.__repr__(self))
+
+
+def register_fingerprint(cls, function):
+    """
+    Register a function computing the content fingerprint of a type
+
+    Parameters
+    ----------
+    cls : type
+        Type to fingerprint with `function`, including subclasses.
+    function : callable
+        Function taking an instance of `cls` and returning a bytes-like object
+        (anything supporting the buffer protocol) that identifies its content.
+
+    Examples
+    --------
+    >>> register_fingerprint(
+    >>>     pandas.DataFrame,
+    >>>     lambda df: pandas.util.hash_pandas_object(df).values)
+
+    """
+    _fingerprint_functions[cls] = function
+
+
+def fingerprint(value):
+    """
+    Return a `Fingerprint` digesting the content of `value`
+
+    Lists, tuples and dicts are walked recursively, where the order of dict
+    items does not matter. Objects supporting the buffer protocol, such as
+    NumPy arrays, are digested along with their format and shape without
+    copying their data, unless it is not contiguous. Strings, bytes, numbers
+    and None are digested by value, and other objects through the functions
+    added with `register_fingerprint`.
+
+    Raises
+    ------
+    TypeError
+        If some part of `value` cannot be digested by content, such as an
+        object that compares by identity.
+
+    """
+    digest, leaves = _fingerprint(value)
+    if leaves:
+        raise TypeError("Cannot fingerprint {!r} by content"
+                        .format(leaves[0]))
+    return digest
+
+
+def content_key(key):
+    """
+    Return the cache key `key` with unhashable elements replaced by their
+    fingerprints
+
+    Sets are replaced by frozensets. Other hashable objects nested in an
+    unhashable element, other than strings, bytes, numbers and None, are kept
+    as they are next to its fingerprint, so that they are compared by
+    equality rather than by content.
+
+    Raises
+    ------
+    TypeError
+        If some part of the key is neither hashable nor can be fingerprinted.
+
+    """
+    for value in key:
+        try:
+            hash(value)
+        except TypeError:
+            break
+    else:
+        return key
+    return tuple([_hashable(value) for value in key])
+
+
+def _hashable(value):
+    try:
+        hash(value)
+    except TypeError:
+        pass
+    else:
+        return value
+    if type(value) is set:
+        return frozenset(value)
+    digest, leaves = _fingerprint(value)
+    return (digest, leaves) if leaves else digest
+
+
+def _fingerprint(value):
+    """
+    Return the fingerprint of `value` and the tuple of the objects nested in
+    it that are kept by hash and equality, in the order they were digested
+
+    """
+    digest = _new_digest()
+    leaves = []
+    _update(digest, leaves, value)
+    return Fingerprint(digest.digest()), tuple(leaves)
+
+
+_SCALAR_TYPES = frozenset([type(None), bool, int, float, complex, bytes,
+                           type('')])
+
+
+def _update(digest, leaves, value):
+    cls = type(value)
+    update = digest.update
+    for base in cls.__mro__:
+        function = _fingerprint_functions.get(base)
+        if function is not None:
+            _update_buffer(digest, b'r' + _name(cls), function(value))
+            return
+
+    if cls is list or cls is tuple:
+        tag = b'[' if cls is list else b'('
+        update(tag + struct.pack('<q', len(value)))
+        if not _update_numbers(update, value):
+            for item in value:
+                _update(digest, leaves, item)
+    elif cls is dict:
+        items = [_fingerprint(item) for item in value.items()]
+        # Items digesting alike differ only in their leaves, which follow in
+        # the same order
+        items.sort(key=itemgetter(0))
+        update(b'{' + struct.pack('<q', len(items)))
+        for (item, item_leaves) in items:
+            update(item)
+            _update_leaves(update, leaves, item_leaves)
+    elif cls is set:
+        _update_leaves(update, leaves, (frozenset(value),))
+    elif cls in _SCALAR_TYPES:
+        _encode_key(value, update)
+    else:
+        try:
+            view = memoryview(value)
+        except (TypeError, ValueError):
+            # Kept by hash and equality, raising TypeError if unhashable
+            hash(value)
+            _update_leaves(update, leaves, (value,))
+        else:
+            info = '{}:{}:{}'.format(view.format, view.itemsize, view.shape)
+            _update_buffer(digest, b'b' + _name(cls) + info.encode('ascii'),
+                           view)
+
+
+def _update_leaves(update, leaves, new):
+    if new:
+        update(b'o' + struct.pack('<q', len(new)))
+        leaves.extend(new)
+
+
+def _update_numbers(update, values):
+    """
+    Digest a sequence of floats or small ints in one go, returning False if
+    the sequence is not of that kind
+
+    """
+    if not values:
+        return False
+    cls = type(values[0])
+    if cls is float:
+        code = 'd'
+    elif cls is int:
+        code = 'q'
+    else:
+        return False
+    for item in values:
+        if type(item) is not cls:
+            return False
+    try:
+        data = struct.pack('<{}{}'.format(len(values), code), *values)
+    except struct.error:
+        # ints out of range
+        return False
+    update(b'#' + code.encode('ascii') + data)
+    return True
+
+
+def _update_buffer(digest, header, data):
+    view = memoryview(data)
+    update = digest.update
+    update(header + struct.pack('<q', view.nbytes))
+    if 'O' in view.format:
+        # The buffer holds pointers to Python objects, not their content
+        raise TypeError("Cannot fingerprint a buffer of Python objects")
+    update(view if view.c_contiguous else view.tobytes())
+
+
+def _name(cls):
+    name = '{}.{}:'.format(cls.__module__, getattr(cls, '__qualname__',
+                                                   cls.__name__))
+    return name.encode('utf-8')
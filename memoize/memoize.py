@@ -10,15 +10,35 @@ http://code.activestate.com/recipes/577452-a-memoize-decorator-for-instance-meth
 
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
-from collections import Hashable, Mapping
+import pickle
+import zlib
+from contextlib import contextmanager
 from functools import partial, update_wrapper
-from inspect import getcallargs  # Python >= 2.7
+from inspect import getcallargs, ismethod  # Python >= 2.7
+from operator import itemgetter
+from threading import Event, Lock, local
+from weakref import WeakKeyDictionary, ref
+from .backends import (_read_snapshot, _write_snapshot, function_fingerprint,
+                       function_name)
+from .caches import CompressedCache, _Cache, cache_factory
+from .fingerprints import content_key
+from .stats import CacheInfo, _registry, _Stats, _timer
 try:
     # Python 3
     from inspect import getfullargspec
 except ImportError:
     # Python 2
     from inspect import getargspec as getfullargspec
+try:
+    # Python >= 3.3
+    from inspect import Parameter, signature
+except ImportError:
+    # Python 2
+    Parameter = signature = None
+
+# Names in __all__ must be native strings on Python 2
+__all__ = [str(name) for name in ('memoize_function', 'memoize_method',
+                                  'memoize_property', 'MemoizeSlots')]
 
 
 class memoize_function(object):
@@ -39,7 +59,68 @@ class memoize_function(object):
     Parameters
     ----------
     f : callable
-        Function to memoize.
+        Function to memoize. If omitted, a decorator accepting `f` and using
+        the remaining options is returned.
+    maxsize : number, optional
+        Maximum number of cached results, or maximum total weight for
+        the 'weight' policy. If 0 or less, nothing is cached. By default, the
+        cache is unbounded.
+    policy : str or callable, optional
+        Eviction policy: 'lru' (the default when `maxsize` is given), 'lfu',
+        'ttl' or 'weight', or a callable taking `maxsize` and returning a new
+        cache. See `cache_factory`.
+    ttl : number, optional
+        Time to live in seconds for cached results (implies the 'ttl' policy).
+    sizeof : callable, optional
+        Function returning the weight of a result (implies the 'weight'
+        policy).
+    threadsafe : bool, optional
+        If True, lookups are synchronized and concurrent calls with the same
+        uncached arguments wait for a single computation of the result, while
+        calls with different arguments never wait for each other. Exceptions
+        are raised in every waiting caller and not cached, and neither are
+        results of computations in flight when the cache is cleared.
+    content_keys : bool, optional
+        If True, unhashable arguments such as lists, dicts and NumPy arrays are
+        represented in the cache key by a fingerprint of their content (see
+        `content_key`), so that their results are cached too. Calls whose
+        arguments cannot be fingerprinted are computed without caching.
+    stats : bool, optional
+        If True, hits, misses, uncacheable calls, evictions and the time spent
+        in `f` are counted, see `cache_info` and `add_stats_hook`.
+    backend : callable, optional
+        Storage backend: a callable taking `f` and returning the cache to use
+        instead of an in-memory one, e.g., a `DiskBackend`. Cannot be combined
+        with the eviction options.
+    weak_keys : bool, optional
+        If True, arguments that support weak references are held in the cache
+        key by weak reference, and results are evicted as soon as any of their
+        arguments is garbage collected. Arguments are still compared by value.
+        Values passed through `*args` or `**kwargs` are held as usual. Cannot
+        be combined with `backend` or `content_keys`.
+    identity_keys : bool, optional
+        If True, arguments that support weak references are compared by
+        identity rather than by value, so they need not be hashable. Implies
+        `weak_keys`.
+    compress : str, optional
+        If given, results whose pickled size reaches `compress_threshold` are
+        stored compressed with this method, 'zlib' or 'lzma', and decompressed
+        on every hit. See `CompressedCache` and `storage_info`.
+    compress_threshold : int, optional
+        Pickled size in bytes from which results are compressed.
+    ignore : iterable of str, optional
+        Names of parameters left out of the cache key, e.g., flags or loggers
+        that do not affect the result. Calls that differ only in these
+        arguments share a cached result.
+    key_transforms : dict, optional
+        Mapping of parameter names to functions applied to the argument before
+        it enters the cache key, e.g., to round floats so that nearby inputs
+        share a cached result. The function still receives the argument as
+        passed.
+    key : callable, optional
+        Function taking the arguments of a call and returning its cache key,
+        replacing the key built from the signature of `f`. Cannot be combined
+        with `ignore`, `key_transforms` or `content_keys`.
 
     Examples
     --------
@@ -54,6 +135,21 @@ class memoize_function(object):
     >>> types([1], key=set('value'))  # result will not be cached
     ([list], {'key': set})
 
+    >>> @memoize_function(maxsize=2)
+    >>> def square(x):
+    >>>     return x * x
+    >>>
+    >>> [square(x) for x in (1, 2, 3)]  # only results for 2 and 3 are kept
+    [1, 4, 9]
+
+    >>> @memoize_function(ignore=('verbose',),
+    >>>                   key_transforms={'x': lambda x: round(x, 9)})
+    >>> def sine(x, verbose=False):
+    >>>     return math.sin(x)
+    >>>
+    >>> sine(0.1, verbose=True) == sine(0.1 + 1e-12)  # computed once
+    True
+
     """
     # Copyright (c) 2012 Daniel Miller
     # Copyright (c) 2015 Daniel Wennberg
@@ -79,34 +175,232 @@ class memoize_function(object):
 
     cache_name = '_memoize_function_cache'
 
-    def __init__(self, f):
+    def __new__(cls, f=None, *args, **kwargs):
+        if f is None:
+            return partial(cls, *args, **kwargs)
+        return super(memoize_function, cls).__new__(cls)
+
+    def __init__(self, f, maxsize=None, policy=None, ttl=None, sizeof=None,
+                 threadsafe=False, backend=None, content_keys=False,
+                 stats=False, weak_keys=False, identity_keys=False,
+                 compress=None, compress_threshold=2 ** 16, ignore=(),
+                 key_transforms=None, key=None):
+        weak_keys = weak_keys or identity_keys
+        if weak_keys and (backend is not None or content_keys):
+            raise ValueError("Weak keys cannot be combined with a storage "
+                             "backend or content keys")
         self.f = f
-        setattr(self, self.cache_name, {})
+        self.maxsize = maxsize
+        # Backends do not iterate over their keys, and weak keys do not
+        # survive the process, so neither kind of cache can be exported
+        self._exportable = backend is None and not weak_keys
+        self._make_key = _make_key_builder(
+            f, content_keys=content_keys, ignore=ignore,
+            key_transforms=key_transforms, key=key)
+        if weak_keys:
+            self._make_key = _make_weak_key_builder(self._make_key,
+                                                    identity_keys)
+        self._single_flight = _SingleFlight() if threadsafe else None
+        self._stats = _Stats(self) if stats else None
+        if backend is None:
+            cache = cache_factory(maxsize, policy, ttl, sizeof)()
+        elif (maxsize, policy, ttl, sizeof) != (None, None, None, None):
+            raise ValueError("Eviction options cannot be combined with a "
+                             "storage backend")
+        else:
+            cache = backend(f)
+        if compress is not None:
+            cache = CompressedCache(cache, compress, compress_threshold)
+        if weak_keys:
+            cache = _WeakArgsCache(cache)
+        if stats and hasattr(cache, 'on_evict'):
+            cache.on_evict = self._stats.evicted
+        setattr(self, self.cache_name, cache)
         update_wrapper(self, f)
+        _registry.add(self)
 
     def __call__(self, *args, **kwargs):
-        # Get internal state from argument list
         f = self.f
-        callargs = getcallargs(f, *args, **kwargs)
-        varkw = getfullargspec(f)[2]
-
-        # Make callargs a _HashableDict and create cache key
-        if varkw is not None:
-            callargs[varkw] = _HashableDict(callargs[varkw])
-        key = _HashableDict(callargs)
+        key = self._make_key(args, kwargs)
 
         # Get cache dict
         cache = getattr(self, self.cache_name)
+        if self._single_flight is not None:
+            return self._single_flight(cache, key, f, args, kwargs,
+                                       self._stats)
+        if self._stats is not None:
+            return self._stats.lookup(cache, key, f, args, kwargs)
 
-        # Lookup/compute result
+        # Lookup/compute result. Only the lookup is guarded: a TypeError
+        # raised by f itself must propagate rather than trigger a second call.
         try:
-            if key in cache:
-                return cache[key]
-            else:
-                cache[key] = res = f(*args, **kwargs)
-                return res
+            res = cache.get(key, _MISSING)
         except TypeError:
             return f(*args, **kwargs)
+        if res is _MISSING:
+            cache[key] = res = f(*args, **kwargs)
+        return res
+
+    def map(self, args_list, vectorized=None, executor=None):
+        """
+        Return the results of calling the memoized function with each of a
+        sequence of argument tuples
+
+        All cached results are looked up first. The missing results are then
+        computed together, each distinct argument tuple once, and cached.
+        Calls are not synchronized with concurrent calls with the same
+        arguments, even if the function is memoized with `threadsafe=True`.
+
+        Parameters
+        ----------
+        args_list : iterable
+            Tuples of positional arguments.
+        vectorized : callable, optional
+            Function taking a list of argument tuples and returning the
+            sequence of results for them, e.g., by stacking them in a NumPy
+            array. Used to compute the missing results in one call.
+        executor : concurrent.futures.Executor, optional
+            Executor on which to compute the missing results, e.g., a
+            `ThreadPoolExecutor`. With a `ProcessPoolExecutor`, the function
+            is sent to the workers by its qualified name, so it must be
+            defined at the top level of a module. Ignored if `vectorized` is
+            given. By default, the results are computed in turn.
+
+        Returns
+        -------
+        list
+            The results, in the order of `args_list`.
+
+        Examples
+        --------
+        >>> @memoize_function
+        >>> def norm(x, y):
+        >>>     return math.hypot(x, y)
+        >>>
+        >>> norm.map([(3, 4), (1, 0), (3, 4)],
+        >>>          vectorized=lambda xy: numpy.hypot(*numpy.transpose(xy)))
+        [5.0, 1.0, 5.0]
+
+        """
+        # The undecorated function is not picklable by name, since its name
+        # refers to the memoize function
+        f = self.f if executor is None else partial(_call_undecorated, self)
+        compute = partial(_call_batch, f, vectorized=vectorized,
+                          executor=executor)
+        return _map(getattr(self, self.cache_name), self._make_key, args_list,
+                    compute, self._stats)
+
+    def __reduce__(self):
+        # Pickled by reference, like the function it decorates
+        name = getattr(self, '__qualname__', self.__name__)
+        if _lookup(self.__module__, name) is not self:
+            raise pickle.PicklingError(
+                "Can't pickle {!r}: it's not found as {}.{}".format(
+                    self, self.__module__, name))
+        return _lookup, (self.__module__, name)
+
+    def prefill(self, args_list, executor=None, max_workers=None):
+        """
+        Compute and cache the results for a sequence of argument tuples
+        concurrently, e.g., to warm up the cache before serving requests
+
+        Results that are already cached are not recomputed. See `map`.
+
+        Parameters
+        ----------
+        args_list : iterable
+            Tuples of positional arguments.
+        executor : concurrent.futures.Executor, optional
+            Executor on which to compute the results. By default, a
+            `ThreadPoolExecutor` with `max_workers` threads is used.
+        max_workers : int, optional
+            Number of threads of the default executor.
+
+        """
+        if executor is not None:
+            self.map(args_list, executor=executor)
+            return
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers) as executor:
+            self.map(args_list, executor=executor)
+
+    def export_cache(self, file, version=None):
+        """
+        Write the memoize function's cached results to a snapshot file
+
+        Entries are pickled one at a time, so the cache is not copied in
+        memory. Keys are written as built by the memoize function, so the
+        entries hit when loaded with `import_cache` into a fresh process.
+
+        Parameters
+        ----------
+        file : str or file
+            Path or binary file to write to.
+        version : str, optional
+            User-supplied version of the function, checked by `import_cache`
+            together with its source code.
+
+        Returns
+        -------
+        int
+            Number of entries written.
+
+        Raises
+        ------
+        TypeError
+            If the results are stored by a backend or with weak keys.
+
+        """
+        if not self._exportable:
+            raise TypeError("Caches of storage backends or with weak keys "
+                            "cannot be exported")
+        cache = getattr(self, self.cache_name)
+        header = (function_name(self.f), function_fingerprint(self.f, version))
+        with _open(file, 'wb') as fileobj:
+            return _write_snapshot(fileobj, header, _cache_items(cache))
+
+    def import_cache(self, file, version=None):
+        """
+        Load the results in a snapshot file written by `export_cache` into
+        the memoize function's cache
+
+        Entries are read one at a time and added like newly computed results,
+        so the cache's eviction policy applies to them.
+
+        Only import snapshots from trusted sources, since loading them can
+        execute arbitrary code.
+
+        Parameters
+        ----------
+        file : str or file
+            Path or binary file to read from.
+        version : str, optional
+            Version of the function, see `export_cache`.
+
+        Returns
+        -------
+        int
+            Number of entries loaded.
+
+        Raises
+        ------
+        ValueError
+            If the snapshot is not of this function, or was written by a
+            different version of it.
+
+        """
+        cache = getattr(self, self.cache_name)
+        header = (function_name(self.f), function_fingerprint(self.f, version))
+        count = 0
+        with _open(file, 'rb') as fileobj:
+            snapshot_header, records = _read_snapshot(fileobj)
+            if snapshot_header != header:
+                raise ValueError("Snapshot of {} does not match this version "
+                                 "of {}".format(snapshot_header[0], header[0]))
+            for key, value in records:
+                cache[key] = value
+                count += 1
+        return count
 
     def clear_cache(self):
         """
@@ -125,7 +419,48 @@ class memoize_function(object):
         >>> types.clear_cache()  # cache on 'types' cleared
 
         """
-        getattr(self, self.cache_name).clear()
+        single_flight = self._single_flight
+        if single_flight is None:
+            getattr(self, self.cache_name).clear()
+            return
+        # Results computed meanwhile would be stale
+        with single_flight.lock:
+            single_flight.forget()
+            getattr(self, self.cache_name).clear()
+
+    def cache_info(self):
+        """
+        Return the statistics of the memoize function's cache
+
+        Returns
+        -------
+        CacheInfo
+            Statistics of the cache. Counters are None unless the function was
+            memoized with `stats=True`.
+
+        """
+        cache = getattr(self, self.cache_name)
+        try:
+            currsize = len(cache)
+        except TypeError:
+            currsize = None
+        if self._stats is None:
+            return CacheInfo(None, None, None, None, self.maxsize, currsize,
+                             None)
+        return self._stats.info(self.maxsize, currsize)
+
+    def storage_info(self):
+        """
+        Return the storage statistics of the memoize function's cache
+
+        Returns
+        -------
+        StorageInfo or None
+            Statistics of the sizes of the cached results, or None unless the
+            function was memoized with `compress`.
+
+        """
+        return _storage_info(getattr(self, self.cache_name))
 
 
 class memoize_method(object):
@@ -142,19 +477,81 @@ class memoize_method(object):
     If a memoized method is invoked directly on its class the result will not
     be cached.
 
+    Looking the method up on an instance returns a lightweight bound method
+    object, whose calls with positional arguments look up the instance's
+    cache directly.
+    The caches are stored in instance attributes, so classes with `__slots__`
+    must provide slots for them by deriving from `MemoizeSlots` or by
+    including `memoize_method.slots` in their `__slots__`.
+
     This decorator has been adapted from
     http://code.activestate.com/recipes/577452-a-memoize-decorator-for-instance-methods/  # noqa
     with mostly minor aesthetic modifications, plus the support for unhashable
     argument lists and a method for clearing the cahce on an instance.
 
-    ..note:: due to the reliance on circular references, this memoizer can not
-    be used on methods of classes with custom `__hash__()` methods when support
-    for pickling and unpickling is required.
-
     Parameters
     ----------
     f : method
-        Method to memoize.
+        Method to memoize. If omitted, a decorator accepting `f` and using the
+        remaining options is returned.
+    maxsize : number, optional
+        Maximum number of cached results per instance, or maximum total
+        weight for the 'weight' policy. If 0 or less, nothing is cached. By
+        default, the cache is unbounded.
+    policy : str or callable, optional
+        Eviction policy: 'lru' (the default when `maxsize` is given), 'lfu',
+        'ttl' or 'weight', or a callable taking `maxsize` and returning a new
+        cache. See `cache_factory`.
+    ttl : number, optional
+        Time to live in seconds for cached results (implies the 'ttl' policy).
+    sizeof : callable, optional
+        Function returning the weight of a result (implies the 'weight'
+        policy).
+    threadsafe : bool, optional
+        If True, lookups are synchronized and concurrent calls with the same
+        uncached arguments wait for a single computation of the result, while
+        calls with different arguments never wait for each other. Exceptions
+        are raised in every waiting caller and not cached, and neither are
+        results of computations in flight when the cache is cleared.
+    content_keys : bool, optional
+        If True, unhashable arguments such as lists, dicts and NumPy arrays are
+        represented in the cache key by a fingerprint of their content (see
+        `content_key`), so that their results are cached too. Calls whose
+        arguments cannot be fingerprinted are computed without caching.
+    stats : bool, optional
+        If True, hits, misses, uncacheable calls, evictions and the time spent
+        in `f` are counted, see `cache_info` and `add_stats_hook`.
+    track_dependencies : bool, optional
+        If True, the Memparams (see `memoize_method.record_read`) and memoized
+        methods read while computing each result are recorded, so that
+        `memoize_method.invalidate` only evicts the results that depend on
+        what changed. Results of methods without tracking are cleared
+        entirely on any change.
+    lazy : bool, optional
+        If True, the cache is invalidated by generation counting rather than
+        cleared: `clear_cache` and `invalidate` only increment a counter on
+        each object they reach, and a cache computed at an earlier generation
+        is detected as stale and dropped at the next lookup. Writes then cost
+        O(1) per object regardless of the size of the caches. Stale caches
+        that are never looked up again are freed along with the instance.
+        Cannot be combined with `track_dependencies`.
+    compress : str, optional
+        If given, results whose pickled size reaches `compress_threshold` are
+        stored compressed with this method, 'zlib' or 'lzma', and decompressed
+        on every hit. See `CompressedCache` and `storage_info`.
+    compress_threshold : int, optional
+        Pickled size in bytes from which results are compressed.
+    ignore, key_transforms : optional
+        Parameters left out of the cache key and functions applied to
+        arguments before they enter it, see `memoize_function`.
+    key : callable, optional
+        Function taking the arguments of a call, not including the instance,
+        and returning its cache key. See `memoize_function`.
+    transport : str, optional
+        How the cache is pickled along with the instance, e.g., when sending
+        it to a worker process: 'full' (the default) as is, 'compact' as a
+        single compressed blob, or 'none' not at all. Can be overridden per
+        instance, see `set_transport`.
 
     Examples
     --------
@@ -194,67 +591,276 @@ class memoize_method(object):
     # USE OR OTHER DEALINGS IN THE SOFTWARE.
 
     cache_name = '_memoize_method_cache'
+    tracked_cache_name = '_memoize_method_tracked_cache'
+    dependents_name = '_memoize_method_dependents'
+    lazy_cache_name = '_memoize_method_lazy_cache'
+    generation_name = '_memoize_method_generation'
     friend_list_name = 'memoize_friends'
+    # Instance attributes used by memoize_method, for classes with __slots__
+    slots = (cache_name, tracked_cache_name, dependents_name, lazy_cache_name,
+             generation_name, friend_list_name)
 
-    def __init__(self, f):
+    def __new__(cls, f=None, *args, **kwargs):
+        if f is None:
+            return partial(cls, *args, **kwargs)
+        return super(memoize_method, cls).__new__(cls)
+
+    def __init__(self, f, maxsize=None, policy=None, ttl=None, sizeof=None,
+                 threadsafe=False, content_keys=False, stats=False,
+                 track_dependencies=False, lazy=False, compress=None,
+                 compress_threshold=2 ** 16, ignore=(), key_transforms=None,
+                 key=None, transport='full'):
+        if lazy and track_dependencies:
+            raise ValueError("Lazy invalidation cannot be combined with "
+                             "dependency tracking")
+        if transport not in _TRANSPORTS:
+            raise ValueError("Unknown transport: {!r}".format(transport))
         self.f = f
+        self.maxsize = maxsize
+        self._name = f.__name__
+        self._track = track_dependencies
+        self._lazy = lazy
+        self._transport = transport
+        if track_dependencies:
+            self._cache_attr = self.tracked_cache_name
+        elif lazy:
+            self._cache_attr = self.lazy_cache_name
+        else:
+            self._cache_attr = self.cache_name
+        self._new_cache = cache_factory(maxsize, policy, ttl, sizeof)
+        if compress is not None:
+            new_cache = self._new_cache
+            self._new_cache = lambda: CompressedCache(
+                new_cache(), compress, compress_threshold)
+            # Fail early on unknown methods
+            self._new_cache()
+        self._single_flight = _SingleFlight() if threadsafe else None
+        self._stats = _Stats(self) if stats else None
+        # The calling instance (the 'self' parameter) is left out of the key.
+        # This is crucial: we don't want to rely on the calling instance being
+        # hashable.
+        self._make_key = _make_key_builder(
+            f, skip_first=True, content_keys=content_keys, ignore=ignore,
+            key_transforms=key_transforms, key=key)
+        # Number of arguments, not counting the instance, of calls that bound
+        # methods look up directly, with the argument tuple as the key. -1 if
+        # all calls go through __call__.
+        plain = (not (threadsafe or content_keys or stats or
+                      track_dependencies or lazy or ignore or key_transforms or
+                      key is not None) and
+                 type(self).__call__ is memoize_method.__call__)
+        self._nbound = _positional_arity(f) - 1 if plain else -1
         update_wrapper(self, f)
+        _registry.add(self)
 
     def __get__(self, obj, otype=None):
         if obj is None:
             return self.f
-        return partial(self, obj)
+        # Not cached on the instance, since the bound method refers to the
+        # instance and would keep it alive until a cyclic collection
+        return _BoundMethod(self, obj)
 
     def __call__(self, *args, **kwargs):
-        # Get internal state from argument list
         f = self.f
-        callargs = getcallargs(f, *args, **kwargs)
-        varkw = getfullargspec(f)[2]
+        key = self._make_key(args, kwargs)
 
-        # Remove calling instance (the 'self' parameter) from callargs.
-        # This is crucial: we don't want to rely on the calling instance being
-        # hashable.
         obj = args[0]
-        for (key, value) in callargs.items():
-            if value is obj:
-                del callargs[key]
-                break
-
-        # Make callargs a _HashableDict and create cache key
-        if varkw is not None:
-            callargs[varkw] = _HashableDict(callargs[varkw])
-        key = (f.__name__, _HashableDict(callargs))
-
-        # Get/set cache dict
-        if hasattr(obj, self.cache_name):
-            cache = getattr(obj, self.cache_name)
-        else:
-            cache = {}
-            setattr(obj, self.cache_name, cache)
+        if _tracking_active:
+            self.record_read(obj, ('method', self._name))
+        if self._track:
+            f = partial(_compute_tracked, f, obj, self._name, key)
+        single_flight = self._single_flight
+        if single_flight is not None:
+            with single_flight.lock:
+                cache = self._get_cache(obj)
+            # Clearing or invalidating the instance's caches replaces the
+            # cache, so later calls do not join computations started before
+            return single_flight(cache, key, f, args, kwargs, self._stats)
+        cache = self._get_cache(obj)
+        if self._stats is not None:
+            return self._stats.lookup(cache, key, f, args, kwargs)
 
         # Lookup or compute result
         try:
-            if key in cache:
-                return cache[key]
-            else:
-                cache[key] = res = f(*args, **kwargs)
-                return res
+            res = cache.get(key, _MISSING)
         except TypeError:
             return f(*args, **kwargs)
+        if res is _MISSING:
+            cache[key] = res = f(*args, **kwargs)
+        return res
+
+    def map(self, obj, args_list, vectorized=None, executor=None):
+        """
+        Return the results of calling the memoized method on an object with
+        each of a sequence of argument tuples
+
+        Works like `memoize_function.map`. The memoizer is found in the class
+        dict, e.g., `vars(type(obj))[name]`.
+
+        Parameters
+        ----------
+        obj : object
+            The instance to call the method on.
+        args_list : iterable
+            Tuples of positional arguments, not including `obj`.
+        vectorized : callable, optional
+            Function called as `vectorized(obj, args_list)`, with `args_list` a
+            list of argument tuples not including `obj`, and returning the
+            sequence of results for them.
+        executor : concurrent.futures.Executor, optional
+            Executor on which to compute the missing results.
+
+        Returns
+        -------
+        list
+            The results, in the order of `args_list`.
+
+        """
+        if _tracking_active:
+            self.record_read(obj, ('method', self._name))
+        f = self.f
+        if vectorized is not None:
+            vectorized = partial(_strip_first, partial(vectorized, obj))
+        if self._track:
+            if vectorized is None and executor is not None:
+                # Dependencies are recorded per thread, so each result is
+                # computed in a tracking frame of its own
+                f = partial(_compute_tracked, f, obj, self._name)
+                compute = partial(_call_batch_keyed, f, executor=executor)
+            else:
+                compute = partial(_call_batch_tracked, f, obj, self._name,
+                                  vectorized)
+        else:
+            compute = partial(_call_batch, f, vectorized=vectorized,
+                              executor=executor)
+        with_obj = ((obj,) + tuple(args) for args in args_list)
+        if self._single_flight is not None:
+            with self._single_flight.lock:
+                cache = self._get_cache(obj)
+        else:
+            cache = self._get_cache(obj)
+        return _map(cache, self._make_key, with_obj, compute, self._stats)
+
+    def _get_caches(self, obj):
+        # Get/set the instance's dict of caches. The instance holds one cache
+        # per memoized method, so that size limits apply to each method
+        # separately. Caches of methods with dependency tracking or lazy
+        # invalidation are held separately.
+        cache_attr = self._cache_attr
+        caches = getattr(obj, cache_attr, None)
+        if caches is None:
+            caches = _TrackedCaches() if self._track else _Caches()
+            _setattr(obj, cache_attr, caches)
+        return caches
+
+    def _get_cache(self, obj):
+        # Get/set the cache of this method on the instance
+        caches = self._get_caches(obj)
+        name = self._name
+        cache = caches.get(name)
+        if self._lazy:
+            # Lazy caches are stored along with the generation of the
+            # instance they were computed at
+            generation = getattr(obj, self.generation_name, 0)
+            if cache is not None:
+                if cache[0] == generation:
+                    return cache[1]
+                # Stale
+                cache = None
+        if cache is None:
+            cache = self._new_cache()
+            caches[name] = (generation, cache) if self._lazy else cache
+            if self._stats is not None and hasattr(cache, 'on_evict'):
+                cache.on_evict = self._stats.evicted
+            if self._track and hasattr(cache, 'on_evict'):
+                cache.on_evict = partial(_evicted_tracked, ref(caches), name,
+                                         cache.on_evict)
+            if self._transport != 'full' and isinstance(caches, _Caches):
+                caches.set_default_transport(name, self._transport)
+        return cache
+
+    def cache_info(self, obj=None):
+        """
+        Return the statistics of the memoized method's cache
+
+        The counters cover all instances, while the current size can only be
+        given for a single instance.
+
+        Parameters
+        ----------
+        obj : object, optional
+            Instance whose cache size to report.
+
+        Returns
+        -------
+        CacheInfo
+            Statistics of the cache. Counters are None unless the method was
+            memoized with `stats=True`.
+
+        Examples
+        --------
+        >>> class AddToThree(object):
+        >>>     base = 3
+        >>>     @memoize_method(stats=True)
+        >>>     def add(self, addend):
+        >>>         return self.base + addend
+        >>>
+        >>> adder = AddToThree()
+        >>> adder.add(4)
+        7
+        >>> vars(AddToThree)['add'].cache_info(adder).misses
+        1
+
+        """
+        currsize = None
+        if obj is not None:
+            cache = getattr(obj, self._cache_attr, {}).get(self._name)
+            if self._lazy and cache is not None:
+                stale = cache[0] != getattr(obj, self.generation_name, 0)
+                cache = None if stale else cache[1]
+            currsize = 0 if cache is None else len(cache)
+        if self._stats is None:
+            return CacheInfo(None, None, None, None, self.maxsize, currsize,
+                             None)
+        return self._stats.info(self.maxsize, currsize)
+
+    def storage_info(self, obj):
+        """
+        Return the storage statistics of the memoized method's cache on an
+        object
+
+        Parameters
+        ----------
+        obj : object
+            Instance whose cache to report on.
+
+        Returns
+        -------
+        StorageInfo or None
+            Statistics of the sizes of the cached results, or None unless the
+            method was memoized with `compress`.
+
+        """
+        return _storage_info(self._get_cache(obj))
 
     @classmethod
-    def clear_cache(cls, obj):
+    def clear_cache(cls, *objs):
         """
-        Clear the memoizer's cache on an object
+        Clear the memoizer's cache on one or more objects
 
         The cache can optionally be cleared recursively on a graph of related
         objects by storing a sequence of objects related to `obj` at
-        `getattr(obj, memoize_method.friend_list_name)`.
+        `getattr(obj, memoize_method.friend_list_name)`, see `register_friend`.
+        The graph is traversed iteratively, visiting each object once, so it
+        may be arbitrarily deep and contain cycles. Clearing the cache on
+        several objects at once visits objects shared between their graphs
+        only once.
 
         Parameters
         ----------
-        obj : object
-              The cache for all memoized methods on `obj` will be cleared.
+        *objs : object
+              The cache for all memoized methods on each of `objs` will be
+              cleared.
 
         Examples
         --------
@@ -270,15 +876,179 @@ class memoize_method(object):
         >>> memoize_method.clear_cache(adder)  # cache on 'adder' cleared
 
         """
-        # For debugging:
-        #print("Clearing cache on {}".format(obj))
-        if hasattr(obj, cls.cache_name):
-            getattr(obj, cls.cache_name).clear()
+        pending = getattr(_deferred, 'pending', None)
+        if pending is not None:
+            for obj in objs:
+                pending.cleared[id(obj)] = obj
+            return
+        cls._clear_caches((objs, (cls.cache_name, cls.tracked_cache_name)))
+
+    @classmethod
+    def _clear_caches(cls, *groups):
+        # groups: (roots, cache_names) pairs, walked in order in a single pass
+        # in which each object is visited once, so a group should not clear
+        # more caches than the groups before it.
+        # Objects are identified by id, so they need not be hashable. They are
+        # kept in 'visited' to keep their ids from being reused meanwhile.
+        visited = {}
+        worklist = []
+        for (roots, cache_names) in groups:
+            cls._clear_group(roots, cache_names, visited, worklist)
+        cls._invalidate_dependents(worklist)
+
+    @classmethod
+    def _clear_group(cls, roots, cache_names, visited, worklist):
+        stack = list(roots)
+        while stack:
+            obj = stack.pop()
+            if id(obj) in visited:
+                continue
+            visited[id(obj)] = obj
+            # For debugging:
+            #print("Clearing cache on {}".format(obj))
+            for cache_name in cache_names:
+                caches = getattr(obj, cache_name, None)
+                if caches:
+                    if hasattr(obj, cls.dependents_name):
+                        # Results computed from the cleared ones are stale too
+                        worklist.extend((obj, ('method', name))
+                                        for name in caches)
+                    caches.clear()
+            caches = getattr(obj, cls.lazy_cache_name, None)
+            if caches:
+                # Stale from now on
+                if hasattr(obj, cls.dependents_name):
+                    worklist.extend((obj, ('method', name)) for name in caches)
+                setattr(obj, cls.generation_name,
+                        getattr(obj, cls.generation_name, 0) + 1)
+            if _properties_enabled:
+                properties = _properties(type(obj))
+                for prop in properties:
+                    prop._clear(obj)
+                if properties and hasattr(obj, cls.dependents_name):
+                    worklist.extend((obj, ('property', prop.name))
+                                    for prop in properties)
+            friends = getattr(obj, cls.friend_list_name, None)
+            if friends:
+                stack.extend(friends)
+
+    @classmethod
+    def record_read(cls, obj, dependency):
+        """
+        Record that the result being computed depends on some state of an
+        object
+
+        Does nothing unless called while a memoized method with dependency
+        tracking computes a result. `Memparams` call this whenever they are
+        read while such a result is computed, with `dependency` equal to
+        `('memparams', key)`, and memoized methods whenever they are called
+        then, with `dependency` equal to `('method', name)`.
+
+        Parameters
+        ----------
+        obj : object
+            The object whose state is read.
+        dependency : hashable
+            Identifies the state read.
+
+        """
+        frames = getattr(_tracking, 'frames', None)
+        if frames:
+            frames[-1].append((obj, dependency))
+
+    @classmethod
+    def invalidate(cls, obj, dependency):
+        """
+        Evict the results depending on some state of an object from the cache
+
+        Results of methods with dependency tracking are evicted if they were
+        computed reading `dependency` on `obj` (see `record_read`), or calling
+        a memoized method whose results are evicted, transitively. Results of
+        methods without dependency tracking are cleared on `obj` and its
+        friends, as with `clear_cache`.
+
+        Parameters
+        ----------
+        obj : object
+            The object whose state changed.
+        dependency : hashable
+            Identifies the state that changed.
+
+        """
+        pending = getattr(_deferred, 'pending', None)
+        if pending is not None:
+            pending.dependencies[(id(obj), dependency)] = (obj, dependency)
+            pending.invalidated[id(obj)] = obj
+            return
+        cls._invalidate_dependents([(obj, dependency)])
+        cls._clear_caches(((obj,), (cls.cache_name,)))
+
+    @classmethod
+    @contextmanager
+    def deferred_invalidation(cls):
+        """
+        Context manager deferring cache clearance and invalidation to the end
+        of a block
+
+        Within the block, calls to `clear_cache` and `invalidate` in the
+        current thread, including those made by `Memparams` when set, mutated
+        or deleted, are only recorded. On exit, even by an exception, the
+        recorded objects and dependencies are deduplicated and processed in a
+        single pass over the graph of friends. Results read from the caches
+        within the block may therefore be stale. Nested blocks are processed
+        on exit from the outermost block. Other threads are not affected.
+
+        Examples
+        --------
+        >>> with memoize_method.deferred_invalidation():
+        >>>     model.alpha = 1.0  # Memparams
+        >>>     model.grid.extend(points)
+        >>> # caches on 'model' and its friends cleared once
+
+        """
+        pending = getattr(_deferred, 'pending', None)
+        if pending is not None:
+            yield
+            return
+        pending = _deferred.pending = _PendingInvalidation()
+        try:
+            yield
+        finally:
+            _deferred.pending = None
+            cls._invalidate_dependents(list(pending.dependencies.values()))
+            # Objects reached from the cleared ones are visited first, so the
+            # invalidated ones among them are not visited again
+            cls._clear_caches(
+                (list(pending.cleared.values()),
+                 (cls.cache_name, cls.tracked_cache_name)),
+                (list(pending.invalidated.values()), (cls.cache_name,)))
 
-        if hasattr(obj, cls.friend_list_name):
-            for friend in getattr(obj, cls.friend_list_name):
-                if friend is not obj:
-                    cls.clear_cache(friend)
+    @classmethod
+    def _invalidate_dependents(cls, worklist):
+        # worklist: list of (object, dependency) pairs whose dependent results
+        # are to be evicted
+        while worklist:
+            obj, dependency = worklist.pop()
+            dependents = getattr(obj, cls.dependents_name, None)
+            if not dependents:
+                continue
+            records = dependents.pop(dependency, None)
+            if not records:
+                continue
+            for (hostref, name, key) in records.values():
+                host = hostref()
+                if host is None:
+                    continue
+                cache = getattr(host, cls.tracked_cache_name, {}).get(name)
+                if cache is None:
+                    continue
+                try:
+                    del cache[key]
+                except KeyError:
+                    # Already evicted, along with its dependents
+                    continue
+                getattr(host, cls.tracked_cache_name).forget(name, key)
+                worklist.append((host, ('method', name)))
 
     @classmethod
     def register_friend(cls, host, friend):
@@ -286,7 +1056,8 @@ class memoize_method(object):
         Register a new friend to an object for cache clearance
 
         Whenever cache is cleared on `host`, it will also be cleared on
-        `friend`.
+        `friend`. Friends are held by weak reference where possible, so the
+        registration does not keep `friend` alive, and need not be hashable.
 
         Parameters
         ----------
@@ -300,7 +1071,9 @@ class memoize_method(object):
             if hasattr(host, cls.friend_list_name):
                 getattr(host, cls.friend_list_name).add(friend)
             else:
-                setattr(host, cls.friend_list_name, set([friend]))
+                friends = _FriendSet()
+                friends.add(friend)
+                setattr(host, cls.friend_list_name, friends)
 
     @classmethod
     def unregister_friend(cls, host, friend):
@@ -322,55 +1095,1334 @@ class memoize_method(object):
             if hasattr(host, cls.friend_list_name):
                 getattr(host, cls.friend_list_name).remove(friend)
 
+    @classmethod
+    def set_transport(cls, obj, transport, names=None):
+        """
+        Set how the caches of memoized methods are pickled along with an
+        object
 
-class _HashableDict(Hashable, Mapping):
-    """
-    An immutable, hashable mapping type. The hash is computed using both keys
-    and values.
+        Caches with the 'compact' transport are pickled separately from the
+        rest of the object, so objects that their results share with it are
+        copied. Caches with results referring back to the object are pickled
+        as with 'full' instead. Caches of methods with dependency tracking are
+        never pickled.
+
+        Parameters
+        ----------
+        obj : object
+            The object whose caches to set the transport of.
+        transport : str
+            'full' to pickle the caches as they are, 'compact' to pickle each
+            as a single compressed blob, or 'none' to leave them out.
+        names : iterable of str, optional
+            Names of the methods whose caches to set the transport of. By
+            default, the transport applies to all caches on `obj`, replacing
+            the `transport` option of the methods and earlier settings.
+
+        Examples
+        --------
+        >>> # Ship only the results of 'spectrum' to the workers
+        >>> memoize_method.set_transport(model, 'none')
+        >>> memoize_method.set_transport(model, 'compact', ['spectrum'])
+        >>> pool.map(fit, [model] * 8)
+
+        """
+        if transport not in _TRANSPORTS:
+            raise ValueError("Unknown transport: {!r}".format(transport))
+        for cache_attr in (cls.cache_name, cls.lazy_cache_name):
+            caches = getattr(obj, cache_attr, None)
+            if caches is None:
+                caches = _Caches()
+            elif not isinstance(caches, _Caches):
+                # Unpickled from an older version
+                caches = _Caches(caches)
+            caches.set_transport(transport, names)
+            _setattr(obj, cache_attr, caches)
+
+
+class memoize_property(object):
+    """Cache the value of a property
+
+    This class is meant to be used as a decorator of methods taking no
+    arguments besides `self`. The value is computed on first access and
+    stored in the instance `__dict__` under the name of the property, or, for
+    classes with `__slots__`, in the slot named by `slot`. Every read goes
+    through the descriptor, so that methods with dependency tracking record
+    it (see `memoize_method.record_read`) with `dependency` equal to
+    `('property', name)`. Assigning to the property replaces the stored
+    value, and deleting it drops the value.
 
-    Inspired by Raymond Hettinger's contribution at
-    http://stackoverflow.com/questions/1151658/python-hashable-dicts
+    The value is dropped by `memoize_method.clear_cache` and
+    `memoize_method.invalidate`, including when called on the friends of an
+    object or by `Memparams` on mutation, and recomputed on next access.
+    Results of methods with dependency tracking that read the property are
+    evicted along with it.
 
     Parameters
     ----------
-    *args, **kwargs
-        Any argument list that can initialize a regular dict with only hashable
-        entries.
+    f : method
+        Method computing the value. If omitted, a decorator accepting `f` and
+        using the remaining options is returned.
+    slot : str, optional
+        Name of the slot to store the value in.
+
+    Examples
+    --------
+    >>> class Circle(object):
+    >>>     radius = Memparams(float, 'radius')
+    >>>
+    >>>     @memoize_property
+    >>>     def area(self):
+    >>>         return math.pi * self.radius ** 2
+    >>>
+    >>> circle = Circle()
+    >>> circle.radius = 1.0
+    >>> circle.area  # computed and stored in circle.__dict__
+    3.141592653589793
+    >>> circle.radius = 2.0  # 'area' dropped
+    >>> circle.area
+    12.566370614359172
+
+    >>> class Point(MemoizeSlots):
+    >>>     __slots__ = ('x', 'y', '_norm')
+    >>>
+    >>>     @memoize_property(slot='_norm')
+    >>>     def norm(self):
+    >>>         return math.hypot(self.x, self.y)
 
     """
-    # Copyright (c) 2015 Daniel Wennberg
-    #
-    # Permission is hereby granted, free of charge, to any person obtaining
-    # a copy of this software and associated documentation files (the
-    # "Software"), to deal in the Software without restriction, including
-    # without limitation the rights to use, copy, modify, merge, publish,
-    # distribute, sublicense, and/or sell copies of the Software, and to permit
-    # persons to whom the Software is furnished to do so, subject to the
-    # following conditions:
-    #
-    # The above copyright notice and this permission notice shall be included
-    # in all copies or substantial portions of the Software.
-    #
-    # THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
-    # OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
-    # MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN
-    # NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
-    # DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
-    # OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE
-    # USE OR OTHER DEALINGS IN THE SOFTWARE.
 
-    def __init__(self, *args, **kwargs):
-        self._dict = dict(*args, **kwargs)
+    def __new__(cls, f=None, *args, **kwargs):
+        if f is None:
+            return partial(cls, *args, **kwargs)
+        return super(memoize_property, cls).__new__(cls)
 
-    def __getitem__(self, key):
-        return self._dict.__getitem__(key)
+    def __init__(self, f, slot=None):
+        global _properties_enabled
+        self.f = f
+        self.name = f.__name__
+        self.slot = slot
+        update_wrapper(self, f)
+        _properties_enabled = True
+        # The properties of classes defined earlier are looked up anew
+        _class_properties.clear()
+
+    def __set_name__(self, owner, name):
+        # Python >= 3.6
+        self.name = name
+
+    def __get__(self, obj, otype=None):
+        if obj is None:
+            return self
+        if _tracking_active:
+            memoize_method.record_read(obj, ('property', self.name))
+        slot = self.slot
+        if slot is None:
+            values = obj.__dict__
+            try:
+                return values[self.name]
+            except KeyError:
+                value = values[self.name] = self.f(obj)
+                return value
+        try:
+            return getattr(obj, slot)
+        except AttributeError:
+            value = self.f(obj)
+            setattr(obj, slot, value)
+            return value
+
+    def __set__(self, obj, value):
+        if self.slot is None:
+            obj.__dict__[self.name] = value
+        else:
+            setattr(obj, self.slot, value)
+        memoize_method._invalidate_dependents([(obj, ('property',
+                                                      self.name))])
+
+    def __delete__(self, obj):
+        self._clear(obj)
+        memoize_method._invalidate_dependents([(obj, ('property',
+                                                      self.name))])
+
+    def _clear(self, obj):
+        if self.slot is None:
+            getattr(obj, '__dict__', {}).pop(self.name, None)
+        else:
+            try:
+                delattr(obj, self.slot)
+            except AttributeError:
+                pass
+
+
+def _properties(cls):
+    """
+    Return the tuple of `memoize_property` descriptors of class `cls`
+
+    """
+    try:
+        return _class_properties[cls]
+    except KeyError:
+        pass
+    properties = []
+    seen = set()
+    for base in cls.__mro__:
+        for (name, value) in vars(base).items():
+            if name not in seen:
+                seen.add(name)
+                if isinstance(value, memoize_property):
+                    properties.append(value)
+    properties = _class_properties[cls] = tuple(properties)
+    return properties
+
+
+class _FriendSet(object):
+    """
+    Set of cache clearance friends, identified by id and held by weak
+    reference
+
+    Friends that do not support weak references are held by strong reference.
+    Pickles as the list of live friends.
+
+    """
+    __slots__ = ('_refs', '__weakref__')
+
+    def __init__(self, friends=()):
+        # id(friend) -> reference to friend
+        self._refs = {}
+        for friend in friends:
+            self.add(friend)
+
+    def add(self, friend):
+        key = id(friend)
+        refs = self._refs
+        if key in refs and refs[key]() is friend:
+            return
+        try:
+            refs[key] = ref(friend, partial(_discard_ref, ref(self), key))
+        except TypeError:
+            refs[key] = partial(_identity, friend)
+
+    def remove(self, friend):
+        if friend not in self:
+            raise KeyError(friend)
+        del self._refs[id(friend)]
+
+    def discard(self, friend):
+        try:
+            self.remove(friend)
+        except KeyError:
+            pass
+
+    def __contains__(self, friend):
+        friendref = self._refs.get(id(friend))
+        return friendref is not None and friendref() is friend
 
     def __iter__(self):
-        return self._dict.__iter__()
+        for friendref in list(self._refs.values()):
+            friend = friendref()
+            if friend is not None:
+                yield friend
 
     def __len__(self):
-        return self._dict.__len__()
+        return len(self._refs)
 
-    def __hash__(self):
-        return hash((frozenset(self._dict.keys()),
-                     frozenset(self._dict.values())))
+    def __reduce__(self):
+        return _FriendSet, (list(self),)
+
+
+def _discard_ref(setref, key, friendref):
+    # Weak reference callback removing a dead friend
+    friends = setref()
+    if friends is not None and friends._refs.get(key) is friendref:
+        del friends._refs[key]
+
+
+_MISSING = object()
+
+
+class _SingleFlight(object):
+    """
+    Synchronized cache lookup where concurrent callers for the same missing key
+    share a single computation
+
+    The lock is only held while reading and writing caches, never while
+    computing, so computations for different keys run concurrently.
+
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+        # flight key -> _Flight
+        self.flights = {}
+
+    def __call__(self, cache, key, f, args, kwargs, stats=None):
+        """
+        Return the result for `key` in `cache`, computing it as `f(*args,
+        **kwargs)` if missing
+
+        Computations are identified by the cache object and `key`, so calls
+        arriving after a cache was replaced do not join computations for the
+        old one. The cache is kept alive by the computing caller while in
+        flight, so its id is unique for the duration. Waiting for another
+        thread's computation counts as a hit in `stats`.
+
+        """
+        lock, flights = self.lock, self.flights
+        flight_key = (id(cache), key)
+        with lock:
+            try:
+                res = cache.get(key, _MISSING)
+                flight = None if res is not _MISSING else flights.get(
+                    flight_key)
+            except TypeError:
+                res = flight = _MISSING
+            if res is _MISSING and flight is None:
+                flight = flights[flight_key] = _Flight()
+                owner = True
+            else:
+                owner = False
+        if res is not _MISSING:
+            if stats is not None:
+                stats.hit()
+            return res
+        if flight is _MISSING:
+            # Unhashable argument list
+            if stats is not None:
+                return stats.call(f, args, kwargs, cacheable=False)
+            return f(*args, **kwargs)
+        if not owner:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            if stats is not None:
+                stats.hit()
+            return flight.result
+
+        try:
+            if stats is not None:
+                res = stats.call(f, args, kwargs)
+            else:
+                res = f(*args, **kwargs)
+            flight.result = res
+        except BaseException as error:
+            flight.error = error
+            raise
+        else:
+            with lock:
+                if flights.get(flight_key) is flight:
+                    cache[key] = res
+            return res
+        finally:
+            with lock:
+                if flights.get(flight_key) is flight:
+                    del flights[flight_key]
+            flight.event.set()
+
+    def forget(self):
+        """
+        Forget the computations in flight, so that their results are not
+        cached and later calls do not wait for them
+
+        Must be called with `lock` held.
+
+        """
+        self.flights.clear()
+
+
+class MemoizeSlots(object):
+    """
+    Mixin providing the slots for the instance attributes used by
+    `memoize_method`, for classes with `__slots__`
+
+    Examples
+    --------
+    >>> class Point(MemoizeSlots):
+    >>>     __slots__ = ('x', 'y')
+    >>>
+    >>>     @memoize_method
+    >>>     def norm(self):
+    >>>         return math.hypot(self.x, self.y)
+
+    """
+    __slots__ = memoize_method.slots
+
+
+class _BoundMethod(object):
+    """
+    Memoized method bound to an instance
+
+    Calls with positional arguments only look up the instance's cache directly
+    for methods without options that require the full call path of
+    `memoize_method`.
+
+    """
+    __slots__ = ('__func__', '__self__')
+
+    def __init__(self, memoizer, obj):
+        self.__func__ = memoizer
+        self.__self__ = obj
+
+    def __call__(self, *args, **kwargs):
+        memoizer = self.__func__
+        obj = self.__self__
+        if kwargs or len(args) != memoizer._nbound or _tracking_active:
+            return memoizer(obj, *args, **kwargs)
+        caches = getattr(obj, memoizer.cache_name, None)
+        cache = caches.get(memoizer._name) if caches is not None else None
+        if cache is None:
+            cache = memoizer._get_cache(obj)
+        try:
+            res = cache.get(args, _MISSING)
+        except TypeError:
+            return memoizer.f(obj, *args)
+        if res is _MISSING:
+            cache[args] = res = memoizer.f(obj, *args)
+        return res
+
+    def map(self, args_list, **kwargs):
+        """
+        Return the results of calls with each of a sequence of argument
+        tuples, see `memoize_method.map`
+
+        """
+        return self.__func__.map(self.__self__, args_list, **kwargs)
+
+    def cache_info(self):
+        """
+        Return the statistics of the method's cache, see
+        `memoize_method.cache_info`
+
+        """
+        return self.__func__.cache_info(self.__self__)
+
+    def storage_info(self):
+        """
+        Return the storage statistics of the method's cache, see
+        `memoize_method.storage_info`
+
+        """
+        return self.__func__.storage_info(self.__self__)
+
+    def __repr__(self):
+        return '<memoized bound method {} of {!r}>'.format(
+            self.__func__._name, self.__self__)
+
+
+def _storage_info(cache):
+    if isinstance(cache, _WeakArgsCache):
+        cache = cache._cache
+    if isinstance(cache, CompressedCache):
+        return cache.storage_info()
+    return None
+
+
+@contextmanager
+def _open(file, mode):
+    # Use a path or an open file
+    if isinstance(file, (type(''), bytes)) or hasattr(file, '__fspath__'):
+        with open(file, mode) as fileobj:
+            yield fileobj
+    else:
+        yield file
+
+
+def _cache_items(cache):
+    # (key, value) pairs of cache, skipping entries evicted meanwhile
+    for key in list(cache):
+        value = cache.get(key, _MISSING)
+        if value is not _MISSING:
+            yield key, value
+
+
+def _setattr(obj, name, value):
+    try:
+        setattr(obj, name, value)
+    except AttributeError:
+        raise TypeError(
+            "Cannot store memoize caches on {!r}: classes with __slots__ must "
+            "derive from MemoizeSlots or include memoize_method.slots"
+            .format(obj))
+
+
+def _map(cache, make_key, args_list, compute, stats=None):
+    """
+    Return the results for each argument tuple in `args_list`, looking them up
+    in `cache` and computing all missing ones as `compute(calls_args,
+    calls_keys)`
+
+    Each distinct missing key is computed once, and arguments whose key is
+    unhashable are computed without being cached.
+
+    """
+    get = cache.get
+    # Argument tuples of this length are their own keys
+    nfast = getattr(make_key, 'nfast', -1)
+    nokwargs = {}
+    results = []
+    # Argument tuples and keys to compute, and the result position of each
+    calls_args, calls_keys, calls_positions = [], [], []
+    # key -> index in calls
+    missing = {}
+    # (result position, index in calls) of repeated missing keys
+    repeated = []
+    for args in args_list:
+        if type(args) is not tuple:
+            args = tuple(args)
+        key = args if len(args) == nfast else make_key(args, nokwargs)
+        try:
+            res = get(key, _MISSING)
+            if res is _MISSING:
+                index = missing.get(key)
+                if index is None:
+                    missing[key] = len(calls_args)
+                else:
+                    # Computed along with an earlier call in the batch
+                    repeated.append((len(results), index))
+                    res = None
+        except TypeError:
+            # Unhashable argument list, computed but not cached
+            res = _MISSING
+        if res is _MISSING:
+            calls_args.append(args)
+            calls_keys.append(key)
+            calls_positions.append(len(results))
+        elif stats is not None:
+            stats.hit()
+        results.append(res)
+    if not calls_args:
+        return results
+
+    start = _timer()
+    computed = list(compute(calls_args, calls_keys))
+    if stats is not None:
+        duration = (_timer() - start) / len(calls_args)
+        for _ in range(len(missing)):
+            stats.miss(duration)
+        for _ in range(len(calls_args) - len(missing)):
+            stats.uncached(duration)
+    for index in missing.values():
+        cache[calls_keys[index]] = computed[index]
+    for (position, res) in zip(calls_positions, computed):
+        results[position] = res
+    for (position, index) in repeated:
+        results[position] = computed[index]
+    return results
+
+
+def _call_batch(f, calls_args, calls_keys, vectorized=None, executor=None):
+    """
+    Return the list of results of `f` for each argument tuple in `calls_args`,
+    computed by `vectorized`, on `executor`, or in turn
+
+    """
+    if vectorized is not None:
+        results = list(vectorized(calls_args))
+        if len(results) != len(calls_args):
+            raise ValueError(
+                "Vectorized implementation returned {} results for {} calls"
+                .format(len(results), len(calls_args)))
+        return results
+    if executor is not None:
+        return list(executor.map(partial(_apply, f), calls_args))
+    return [f(*args) for args in calls_args]
+
+
+def _call_batch_keyed(f, calls_args, calls_keys, executor):
+    # Call f(key, *args) for each call on executor
+    return list(executor.map(
+        partial(_apply, f),
+        [(key,) + args for (key, args) in zip(calls_keys, calls_args)]))
+
+
+def _call_batch_tracked(f, obj, name, vectorized, calls_args, calls_keys):
+    # Every dependency read during the batch is recorded for every result
+    return _compute_tracked_batch(
+        partial(_call_batch, f, calls_args, calls_keys, vectorized),
+        obj, name, calls_keys)
+
+
+def _apply(f, args):
+    return f(*args)
+
+
+def _call_undecorated(memoizer, *args):
+    return memoizer.f(*args)
+
+
+def _lookup(module, qualname):
+    # The object at qualname in module
+    obj = __import__(module, fromlist=[str('__name__')])
+    try:
+        for name in qualname.split('.'):
+            obj = getattr(obj, name)
+    except AttributeError:
+        return None
+    return obj
+
+
+def _strip_first(f, calls_args):
+    # Call f on the argument tuples without their first element
+    return f([args[1:] for args in calls_args])
+
+
+class _PendingInvalidation(object):
+    """
+    Clearances and invalidations recorded by
+    `memoize_method.deferred_invalidation`, keyed by object id
+
+    """
+    __slots__ = ('cleared', 'invalidated', 'dependencies')
+
+    def __init__(self):
+        self.cleared = {}
+        self.invalidated = {}
+        # (id(obj), dependency) -> (obj, dependency)
+        self.dependencies = {}
+
+
+_deferred = local()
+_tracking = local()
+# Ids of the _Caches whose compact blobs are being pickled
+_compacting = local()
+# Number of results of methods with dependency tracking being computed, in
+# any thread. Reads need only be recorded while it is nonzero.
+_tracking_active = 0
+_tracking_lock = Lock()
+# Set once any memoize_property is created
+_properties_enabled = False
+# class -> tuple of its memoize_property descriptors
+_class_properties = WeakKeyDictionary()
+
+
+def _compute_tracked(f, obj, name, key, *args, **kwargs):
+    """
+    Return `f(*args, **kwargs)`, recording what it reads as the dependencies
+    of the result cached under `key` for method `name` on `obj`
+
+    """
+    return _compute_tracked_batch(partial(f, *args, **kwargs), obj, name,
+                                  (key,))
+
+
+def _compute_tracked_batch(compute, obj, name, keys):
+    """
+    Return `compute()`, recording what it reads as the dependencies of each
+    of the results cached under `keys` for method `name` on `obj`
+
+    """
+    try:
+        frames = _tracking.frames
+    except AttributeError:
+        frames = _tracking.frames = []
+    global _tracking_active
+    frame = []
+    frames.append(frame)
+    with _tracking_lock:
+        _tracking_active += 1
+    try:
+        res = compute()
+    finally:
+        frames.pop()
+        with _tracking_lock:
+            _tracking_active -= 1
+
+    caches = getattr(obj, memoize_method.tracked_cache_name)
+    hostref = caches.hostref
+    if hostref is None:
+        hostref = caches.bind(obj)
+    dependents_name = memoize_method.dependents_name
+    for key in keys:
+        try:
+            record = (id(obj), name, key)
+            hash(record)
+        except TypeError:
+            # Unhashable argument list, so the result is not cached
+            continue
+        # Records of an earlier result under the same key
+        caches.forget(name, key)
+        sources = caches.sources[(name, key)] = {}
+        for (dep_obj, dependency) in frame:
+            if hasattr(dep_obj, dependents_name):
+                dependents = getattr(dep_obj, dependents_name)
+            else:
+                dependents = _Dependents()
+                setattr(dep_obj, dependents_name, dependents)
+            dependents.setdefault(dependency, {})[record] = (hostref, name,
+                                                             key)
+            if (id(dep_obj), dependency) not in sources:
+                sources[(id(dep_obj), dependency)] = (_weak(dep_obj),
+                                                      dependency)
+    return res
+
+
+def _identity(obj):
+    return obj
+
+
+class _Caches(dict):
+    """
+    Caches of the memoized methods of an instance, by name
+
+    Pickled according to the transport of each cache, see
+    `memoize_method.set_transport`.
+
+    """
+    __slots__ = ('transports',)
+
+    def set_transport(self, transport, names=None):
+        transports = getattr(self, 'transports', None) or {}
+        if names is None:
+            # None: default for all caches
+            transports = {None: transport}
+        else:
+            for name in names:
+                transports[name] = transport
+        self.transports = transports
+
+    def set_default_transport(self, name, transport):
+        # Transport option of a method, unless set for the instance
+        transports = getattr(self, 'transports', None)
+        if transports is None:
+            self.transports = {name: transport}
+        elif None not in transports:
+            transports.setdefault(name, transport)
+
+    def __reduce__(self):
+        transports = getattr(self, 'transports', None)
+        if not transports:
+            return _Caches, (), None, None, iter(self.items())
+        default = transports.get(None, 'full')
+        full = {}
+        compact = {}
+        compacting = getattr(_compacting, 'ids', None)
+        if compacting is None:
+            compacting = _compacting.ids = set()
+        if id(self) in compacting:
+            # A result being compacted refers back to the instance holding
+            # these caches
+            raise _SelfReference(id(self))
+        compacting.add(id(self))
+        try:
+            for (name, cache) in self.items():
+                transport = transports.get(name, default)
+                if transport == 'compact':
+                    try:
+                        # Fast compression, the blob is usually sent right
+                        # away
+                        compact[name] = zlib.compress(
+                            pickle.dumps(cache, pickle.HIGHEST_PROTOCOL), 1)
+                        continue
+                    except _SelfReference as exc:
+                        if exc.args[0] != id(self):
+                            raise
+                    # The outer pickle handles the cycle
+                    transport = 'full'
+                if transport == 'full':
+                    full[name] = cache
+        finally:
+            compacting.discard(id(self))
+        return _restore_caches, (full, compact, transports)
+
+
+class _SelfReference(Exception):
+    """
+    Raised when the caches with the given id are reached again while one of
+    them is pickled for the 'compact' transport
+
+    """
+
+
+def _restore_caches(full, compact, transports):
+    caches = _Caches(full)
+    for (name, data) in compact.items():
+        caches[name] = pickle.loads(zlib.decompress(data))
+    caches.transports = transports
+    return caches
+
+
+_TRANSPORTS = ('full', 'compact', 'none')
+
+
+class _TrackedCaches(dict):
+    """
+    Caches of methods with dependency tracking
+
+    Also indexes the dependency records of the cached results, so that the
+    records are removed along with the results when these are evicted or
+    cleared, or when the instance is garbage collected, rather than only when
+    a dependency changes. Since the dependency records are not pickled,
+    neither are these caches.
+
+    """
+    __slots__ = ('hostref', 'host_id', 'sources', '__weakref__')
+
+    def __init__(self):
+        dict.__init__(self)
+        self.hostref = self.host_id = None
+        # (name, key) -> {(id(dep_obj), dependency): (ref to dep_obj,
+        #                                            dependency)}
+        self.sources = {}
+
+    def bind(self, obj):
+        """
+        Return a reference to the instance `obj` holding the caches, for use
+        in dependency records
+
+        """
+        sources = self.sources
+        host_id = self.host_id = id(obj)
+        try:
+            self.hostref = ref(
+                obj, lambda _: _forget_sources(sources, host_id,
+                                               list(sources)))
+        except TypeError:
+            self.hostref = partial(_identity, obj)
+        return self.hostref
+
+    def forget(self, name, key):
+        """
+        Remove the dependency records of the result for `key` of method
+        `name`
+
+        """
+        if self.sources:
+            _forget_sources(self.sources, self.host_id, [(name, key)])
+
+    def clear(self):
+        if self.sources:
+            _forget_sources(self.sources, self.host_id, list(self.sources))
+        dict.clear(self)
+
+    def __reduce__(self):
+        return _TrackedCaches, ()
+
+
+def _forget_sources(sources, host_id, names_keys):
+    """
+    Remove the dependency records of the results of an instance with id
+    `host_id` for each (name, key) in `names_keys`, indexed by `sources`
+
+    """
+    dependents_name = memoize_method.dependents_name
+    for (name, key) in names_keys:
+        entries = sources.pop((name, key), None)
+        if not entries:
+            continue
+        record = (host_id, name, key)
+        for (depref, dependency) in entries.values():
+            dependents = getattr(depref(), dependents_name, None)
+            if not dependents:
+                continue
+            records = dependents.get(dependency)
+            if records is not None:
+                records.pop(record, None)
+                if not records:
+                    del dependents[dependency]
+
+
+def _evicted_tracked(cachesref, name, on_evict, key):
+    # on_evict hook of the caches of methods with dependency tracking
+    caches = cachesref()
+    if caches is not None:
+        caches.forget(name, key)
+    if on_evict is not None:
+        on_evict(key)
+
+
+def _weak(obj):
+    # Reference to obj, weak if possible
+    try:
+        return ref(obj)
+    except TypeError:
+        return partial(_identity, obj)
+
+
+class _Dependents(dict):
+    """
+    Records of the results depending on the state of an object, by dependency
+
+    Not pickled, since they refer to other objects by weak reference.
+
+    """
+
+    def __reduce__(self):
+        return _Dependents, ()
+
+
+class _Flight(object):
+    """
+    A computation in progress, possibly awaited by other threads
+
+    """
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = Event()
+        self.result = None
+        self.error = None
+
+
+def _positional_arity(f):
+    """
+    Return the number of parameters of `f` if they can all be passed by
+    position and none are variadic, and otherwise -1
+
+    """
+    try:
+        spec = _argspec(f)
+    except TypeError:
+        return -1
+    if (spec[1] is not None or spec[2] is not None or
+            getattr(spec, 'kwonlyargs', None)):
+        return -1
+    return len(spec[0])
+
+
+def _make_key_builder(f, skip_first=False, content_keys=False, ignore=(),
+                      key_transforms=None, key=None):
+    """
+    Analyze the signature of `f` once and return a specialized key builder
+
+    See `_make_signature_key_builder`. If `content_keys` is True, unhashable
+    elements of the key are replaced by their content fingerprints. If `key`
+    is given, the key is a 1-tuple of its return value instead.
+
+    """
+    if key is not None:
+        if ignore or key_transforms or content_keys:
+            raise ValueError("A custom key cannot be combined with ignore, "
+                             "key_transforms or content_keys")
+        return _make_custom_key_builder(key, skip_first)
+    make_key = _make_signature_key_builder(f, skip_first, ignore,
+                                           key_transforms)
+    if not content_keys:
+        return make_key
+
+    def make_content_key(args, kwargs):
+        key = make_key(args, kwargs)
+        try:
+            return content_key(key)
+        except Exception:
+            # Any failure to fingerprint leaves the key unhashable, so that
+            # the call is not cached
+            return key
+
+    return make_content_key
+
+
+def _make_custom_key_builder(key, skip_first=False):
+    """
+    Return a key builder calling the user-supplied `key` with the arguments
+    of a call, leaving out the first one if `skip_first` is True
+
+    """
+    if skip_first:
+        def make_key(args, kwargs):
+            return (key(*args[1:], **kwargs),)
+    else:
+        def make_key(args, kwargs):
+            return (key(*args, **kwargs),)
+
+    return make_key
+
+
+def _make_key_selector(fields, ignore, transforms):
+    """
+    Return a function taking a key whose elements are the values of the
+    parameters named in `fields` and returning it with the parameters in
+    `ignore` left out and the functions in `transforms` applied, or None if
+    there is nothing to do
+
+    """
+    picks = [(index, transforms.get(name))
+             for (index, name) in enumerate(fields) if name not in ignore]
+    transformed = [index for (index, transform) in picks
+                   if transform is not None]
+    if not transformed:
+        if len(picks) == len(fields):
+            return None
+        indices = [index for (index, _) in picks]
+        if len(indices) == 1:
+            (index,) = indices
+            return lambda key: (key[index],)
+        return itemgetter(*indices)
+
+    def select(key):
+        return tuple([key[index] if transform is None
+                      else transform(key[index])
+                      for (index, transform) in picks])
+
+    return select
+
+
+def _check_key_options(f, names, ignore, transforms):
+    unknown = set(ignore).union(transforms).difference(names)
+    if unknown:
+        raise ValueError("{} has no parameters named {}".format(
+            getattr(f, '__name__', f), ', '.join(sorted(unknown))))
+
+
+def _make_weak_key_builder(make_key, identity=False):
+    """
+    Wrap the key builder `make_key` so that elements of the key that support
+    weak references are replaced by weak references, to be used with a
+    `_WeakArgsCache`
+
+    If `identity` is True, the weak references compare by identity.
+
+    """
+    weak = _IdentityRef if identity else ref
+
+    def make_weak_key(args, kwargs):
+        return tuple([weak(value) if type(value).__weakrefoffset__ else value
+                      for value in make_key(args, kwargs)])
+
+    return make_weak_key
+
+
+class _IdentityRef(ref):
+    """
+    Weak reference comparing equal to weak references to the same object
+
+    Only meaningful while the object is alive, which `_WeakArgsCache` ensures
+    for its keys.
+
+    """
+    __slots__ = ('_id',)
+
+    def __init__(self, obj):
+        super(_IdentityRef, self).__init__(obj)
+        self._id = id(obj)
+
+    def __hash__(self):
+        return self._id
+
+    def __eq__(self, other):
+        return type(other) is _IdentityRef and self._id == other._id
+
+    def __ne__(self, other):
+        return not self == other
+
+
+class _WeakArgsCache(_Cache):
+    """
+    Wrapper of a cache whose keys may contain weak references, evicting the
+    entries whose keys refer to an object when it is garbage collected
+
+    """
+
+    def __init__(self, cache):
+        self._cache = cache
+        # Lookups go straight to the wrapped cache
+        self.get = cache.get
+        # id(object) -> (weak reference with callback, keys referring to it)
+        self._referents = {}
+        if hasattr(cache, 'on_evict'):
+            cache.on_evict = self._evicted_inner
+
+    def __getitem__(self, key):
+        return self._cache[key]
+
+    def __setitem__(self, key, value):
+        self._cache[key] = value
+        if key not in self._cache:
+            # Refused or evicted straight away, so nothing to watch
+            return
+        referents = self._referents
+        for element in key:
+            if not isinstance(element, ref):
+                continue
+            obj = element()
+            if obj is None:
+                continue
+            record = referents.get(id(obj))
+            if record is None:
+                callback = partial(_drop_referent, ref(self), id(obj))
+                record = referents[id(obj)] = (ref(obj, callback), set())
+            record[1].add(key)
+
+    def __delitem__(self, key):
+        del self._cache[key]
+        self._forget(key)
+
+    def __contains__(self, key):
+        return key in self._cache
+
+    def __iter__(self):
+        return iter(self._cache)
+
+    def __len__(self):
+        return len(self._cache)
+
+    def clear(self):
+        self._cache.clear()
+        self._referents.clear()
+
+    def _forget(self, key):
+        referents = self._referents
+        for element in key:
+            if not isinstance(element, ref):
+                continue
+            obj = element()
+            record = None if obj is None else referents.get(id(obj))
+            if record is not None:
+                record[1].discard(key)
+                if not record[1]:
+                    del referents[id(obj)]
+
+    def _evicted_inner(self, key):
+        self._forget(key)
+        self._evicted(key)
+
+    def _drop(self, obj_id):
+        record = self._referents.pop(obj_id, None)
+        if record is None:
+            return
+        for key in record[1]:
+            try:
+                del self._cache[key]
+            except KeyError:
+                continue
+            self._forget(key)
+            self._evicted(key)
+
+
+def _drop_referent(cacheref, obj_id, objref):
+    # Weak reference callback evicting the entries referring to a dead object
+    cache = cacheref()
+    if cache is not None:
+        cache._drop(obj_id)
+
+
+def _make_signature_key_builder(f, skip_first=False, ignore=(),
+                                transforms=None):
+    """
+    Analyze the signature of `f` once and return a specialized key builder
+
+    The returned function takes the tuple of positional arguments and the dict
+    of keyword arguments of a call to `f` and returns a hashable cache key
+    that identifies the call irrespective of whether arguments were passed by
+    position, by keyword or left at their defaults.
+
+    The key is a flat tuple of the argument values in the order of the
+    parameters of `f`, so each value is hashed together with its position and
+    permuted argument values give different keys. Calls using only positional
+    arguments take a fast path where the argument tuple itself serves as the
+    key, calls with keywords or defaults a normalizing path, while functions
+    with `*args` or `**kwargs` in their signature go through `getcallargs` on
+    every call. Positional-only parameters cannot be passed by keyword.
+
+    Parameters
+    ----------
+    f : callable
+        Function to build cache keys for.
+    skip_first : bool, optional
+        If True, the first positional argument (the 'self' parameter of a
+        method) is left out of the key.
+    ignore : iterable of str, optional
+        Names of parameters left out of the key.
+    transforms : dict, optional
+        Mapping of parameter names to functions applied to the argument
+        values in the key.
+
+    Returns
+    -------
+    callable
+        Key builder with signature `make_key(args, kwargs)`. Invalid argument
+        lists raise the same TypeError as a call to `f` would.
+
+    """
+    try:
+        spec = _argspec(f)
+    except TypeError:
+        # Not introspectable until called (e.g., some builtins). Defer to
+        # getcallargs, which will raise the appropriate error if needed.
+        spec = None
+
+    if isinstance(ignore, (type(''), bytes)):
+        ignore = (ignore,)
+    ignore = frozenset(ignore)
+    transforms = dict(transforms or {})
+    if spec is None or spec[1] is not None or spec[2] is not None:
+        return _make_full_key_builder(f, spec, skip_first, ignore, transforms)
+
+    callargs_of = _make_callargs(f)
+    names = tuple(spec[0])
+    defaults = spec[3] or ()
+    params = list(zip(names[len(names) - len(defaults):], defaults))
+    kwonlyargs = tuple(getattr(spec, 'kwonlyargs', None) or ())
+    kwonlydefaults = getattr(spec, 'kwonlydefaults', None) or {}
+    params.extend((name, kwonlydefaults[name]) for name in kwonlyargs
+                  if name in kwonlydefaults)
+    defaults = tuple(params)
+    allnames = frozenset(names + kwonlyargs)
+    nparams = len(allnames)
+    # Names that may be passed by keyword
+    kwnames = allnames.difference(names[:_positional_only_count(f)])
+    nargs = len(names)
+    first = 1 if skip_first and nargs else 0
+    keynames = (names + kwonlyargs)[first:]
+    # Keyword-only parameters must always be merged in by name
+    nfast = -1 if kwonlyargs else nargs
+    # Defaults of the trailing positional parameters, and the number of
+    # parameters without defaults
+    posdefaults = tuple(spec[3] or ()) if nfast >= 0 else ()
+    nrequired = nargs - len(posdefaults)
+
+    def make_key(args, kwargs):
+        nargs_passed = len(args)
+        if not kwargs:
+            if nargs_passed == nfast:
+                # Fast path: every parameter passed by position
+                return args[first:] if first else args
+            if nrequired <= nargs_passed < nfast:
+                # Trailing parameters left at their defaults
+                args += posdefaults[nargs_passed - nrequired:]
+                return args[first:] if first else args
+
+        # Normalizing path: merge keywords and defaults
+        callargs = dict(zip(names, args))
+        for (name, value) in kwargs.items():
+            if name not in kwnames or name in callargs:
+                callargs_of(*args, **kwargs)  # raises the TypeError
+            callargs[name] = value
+        for (name, default) in defaults:
+            if name not in callargs:
+                callargs[name] = default
+        if len(args) > nargs or len(callargs) != nparams:
+            callargs_of(*args, **kwargs)  # raises the TypeError
+        return tuple([callargs[name] for name in keynames])
+
+    _check_key_options(f, keynames, ignore, transforms)
+    select = _make_key_selector(keynames, ignore, transforms)
+    if select is None:
+        if not first:
+            # Calls with this many positional arguments are their own key,
+            # which batch lookups rely on to skip the key builder
+            make_key.nfast = nfast
+        return make_key
+    return lambda args, kwargs: select(make_key(args, kwargs))
+
+
+def _make_full_key_builder(f, spec, skip_first, ignore=frozenset(),
+                           transforms=None):
+    """
+    Return a key builder for `f` based on `inspect.getcallargs`
+
+    Used for signatures with `*args` or `**kwargs` and for callables that
+    cannot be introspected in advance. See `_make_signature_key_builder`.
+
+    The key consists of the named arguments in parameter order, followed by
+    the tuple of extra positional arguments and the sorted items of extra
+    keyword arguments. Names in `ignore` and `transforms` that are not
+    parameters apply to the extra keyword arguments.
+
+    """
+    transforms = transforms or {}
+    if spec is None:
+        def make_key(args, kwargs):
+            callargs = getcallargs(f, *args, **kwargs)
+            if skip_first:
+                obj = args[0]
+                for (name, value) in callargs.items():
+                    if value is obj:
+                        del callargs[name]
+                        break
+            if ignore or transforms:
+                callargs = _select_items(callargs, ignore, transforms)
+            return tuple(sorted(callargs.items()))
+
+        return make_key
+
+    callargs_of = _make_callargs(f)
+    names = tuple(spec[0]) + tuple(getattr(spec, 'kwonlyargs', None) or ())
+    varargs, varkw = spec[1], spec[2]
+    skip_varargs = 0
+    if skip_first:
+        if spec[0]:
+            names = names[1:]
+        elif varargs is not None:
+            skip_varargs = 1
+
+    fields = names + tuple(name for name in (varargs, varkw)
+                           if name is not None)
+    if varkw is None:
+        _check_key_options(f, fields, ignore, transforms)
+    kwignore = ignore.difference(fields)
+    kwtransforms = dict((name, transform)
+                        for (name, transform) in transforms.items()
+                        if name not in fields)
+
+    def make_key(args, kwargs):
+        callargs = callargs_of(*args, **kwargs)
+        key = [callargs[name] for name in names]
+        if varargs is not None:
+            key.append(callargs[varargs][skip_varargs:])
+        if varkw is not None:
+            extra = callargs[varkw]
+            if kwignore or kwtransforms:
+                extra = _select_items(extra, kwignore, kwtransforms)
+            key.append(tuple(sorted(extra.items())))
+        return tuple(key)
+
+    select = _make_key_selector(fields, ignore, transforms)
+    if select is None:
+        return make_key
+    return lambda args, kwargs: select(make_key(args, kwargs))
+
+
+def _argspec(f):
+    """
+    Return `getfullargspec(f)`, without the first parameter if `f` is a bound
+    method, which is already bound to the instance or class
+
+    """
+    spec = getfullargspec(f)
+    if ismethod(f) and f.__self__ is not None and spec[0]:
+        spec = spec._replace(args=spec[0][1:])
+    return spec
+
+
+def _positional_only_count(f):
+    """
+    Return the number of positional-only parameters of `f`
+
+    """
+    if signature is None:
+        return 0
+    try:
+        params = signature(f).parameters.values()
+    except (TypeError, ValueError):
+        return 0
+    return sum(1 for param in params
+               if param.kind == Parameter.POSITIONAL_ONLY)
+
+
+def _make_callargs(f):
+    """
+    Return a function binding the arguments of a call to `f` to its parameter
+    names like `getcallargs`, and raising TypeError for invalid argument
+    lists
+
+    `getcallargs` treats positional-only parameters as ordinary ones, so the
+    arguments of functions that have some are bound by `inspect.signature`.
+
+    """
+    if not _positional_only_count(f):
+        return partial(getcallargs, f)
+    sig = signature(f)
+
+    def callargs_of(*args, **kwargs):
+        bound = sig.bind(*args, **kwargs)
+        bound.apply_defaults()
+        return dict(bound.arguments)
+
+    return callargs_of
+
+
+def _select_items(values, ignore, transforms):
+    # Copy of the dict values with the keys in ignore left out and the
+    # functions in transforms applied
+    return dict((name, value if name not in transforms
+                 else transforms[name](value))
+                for (name, value) in values.items() if name not in ignore)
@@ -7,8 +7,17 @@ Module providing a data descriptor for use with `memoize_method`
 
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
+from . import memoize as _memoize
 from .memoize import memoize_method, memoize_function
-from collections import Callable
+try:
+    # Python >= 3.3
+    from collections.abc import Callable
+except ImportError:
+    # Python 2
+    from collections import Callable
+
+__all__ = [str(name) for name in ('Memparams', 'memparamstorage',
+                                  'compact_memparamstorage')]
 
 
 class Memparams(object):
@@ -16,6 +25,9 @@ class Memparams(object):
     Data descriptor that triggers memoize cache clearance on containing object
     when set, mutated or deleted
 
+    Use `memoize_method.deferred_invalidation` to clear the cache once after
+    many updates.
+
     Parameters
     ----------
     base : type
@@ -29,18 +41,28 @@ class Memparams(object):
         descriptor data on objects.  ..note:: If multiple instances of
         Memparams are assoicated members of the same class and have identical
         base and name, they will end up pointing to the same data.
+    compact : bool, optional
+        If True, values of immutable built-in types such as `int`, `float`,
+        `str` and `tuple` are stored as plain instances of `base`, and other
+        values as instances of a subclass of `base` with `__slots__`, so
+        that they take less memory and are faster to assign. Unlike the
+        default storage, the stored values then do not support setting
+        attributes unless `base` does.
 
     """
     _storage_name = "_memparams_storage"
 
-    def __init__(self, base, name):
+    def __init__(self, base, name, compact=False):
         self.base = base
         self.name = name
         self.key = (base, name)
+        self.compact = compact
 
     def __get__(self, obj, objtype=None):
         if obj is None:
             return self
+        if _memoize._tracking_active:
+            memoize_method.record_read(obj, ('memparams', self.key))
         if hasattr(obj, self._storage_name):
             storage = getattr(obj, self._storage_name)
             if self.key in storage:
@@ -48,27 +70,91 @@ class Memparams(object):
         raise AttributeError("Attribute not set on {}".format(obj))
 
     def __set__(self, obj, value):
-        value = memparamstorage(self.base, obj, value)
+        if self.compact:
+            value = compact_memparamstorage(self.base, obj, self.key, value)
+        else:
+            value = memparamstorage(self.base, obj, value)
         storage_name = self._storage_name
         if hasattr(obj, storage_name):
             storage = getattr(obj, storage_name)
             storage[self.key] = value
         else:
             setattr(obj, storage_name, {self.key: value})
-        memoize_method.clear_cache(obj)
+        memoize_method.invalidate(obj, ('memparams', self.key))
 
     def __delete__(self, obj):
         storage_name = self._storage_name
         if hasattr(obj, storage_name):
             storage = getattr(obj, storage_name)
-            del storage[self]
+            del storage[self.key]
             if not storage:
                 delattr(obj, storage_name)
+        memoize_method.invalidate(obj, ('memparams', self.key))
+
+
+def _invalidate(obj, value):
+    """
+    Invalidate the memoize cache on `obj` after mutation of the Memparams data
+    `value`
+
+    """
+    storage = getattr(obj, Memparams._storage_name, {})
+    for (key, stored) in storage.items():
+        if stored is value:
+            memoize_method.invalidate(obj, ('memparams', key))
+            return
+    # No longer stored on obj
+    memoize_method.clear_cache(obj)
+
+
+def _invalidate_key(obj, key, value):
+    """
+    Invalidate the memoize cache on `obj` after mutation of the Memparams data
+    `value`, stored under `key` unless it has since been replaced
+
+    """
+    storage = getattr(obj, Memparams._storage_name, {})
+    if storage.get(key) is value:
+        memoize_method.invalidate(obj, ('memparams', key))
+    else:
         memoize_method.clear_cache(obj)
 
 
+def compact_memparamstorage(base, obj, key, *args, **kwargs):
+    """
+    Return a compact copy of a value to store as Memparams data under `key` on
+    `obj`
+
+    See the `compact` parameter of `Memparams`.
+
+    """
+    if base in _IMMUTABLE_TYPES:
+        return base(*args, **kwargs)
+    if base is _NoneType:
+        # NoneType takes no arguments, and None is stored as it is
+        (value,) = args
+        return value
+    return _storage_class(_compact_memparamstorage, base)(obj, key, *args,
+                                                          **kwargs)
+
+
 def memparamstorage(base, obj, *args, **kwargs):
-    return _memparamstorage(base)(obj, *args, **kwargs)
+    return _storage_class(_memparamstorage, base)(obj, *args, **kwargs)
+
+
+def _storage_class(factory, base):
+    """
+    Return the storage class `factory(base)`
+
+    Storage classes are built once per process by the memoized `factory`.
+    Since they are also looked up whenever Memparams data is unpickled, the
+    factory's cache is read directly rather than through a call.
+
+    """
+    cls = getattr(factory, factory.cache_name).get((base,))
+    if cls is None:
+        cls = factory(base)
+    return cls
 
 
 @memoize_function
@@ -143,47 +229,6 @@ def _memparamstorage(base):
         def __reduce__(self):
             return memparamstorage, (self.base, self.obj, self.base(self))
 
-    class Mutators():
-        names = (
-            '__setattr__',
-            '__delattr__',
-            '__setitem__',
-            '__delitem__',
-            '__setslice__',
-            '__delslice__',
-            '__iadd__',
-            '__isub__',
-            '__imul__',
-            '__imatmul__',
-            '__idiv__',
-            '__itruediv__',
-            '__ifloordiv__',
-            '__imod__',
-            '__ipow__',
-            '__ilshift__',
-            '__irshift__',
-            '__iand__',
-            '__ixor__',
-            '__ior__',
-            'append',
-            'appendleft',
-            'clear',
-            'discard',
-            'extend',
-            'extendleft',
-            'insert',
-            'pop',
-            'popleft',
-            'popitem',
-            'remove',
-            'reverse',
-            'rotate',
-            'setdefault',
-            'sort',
-            'subtract',
-            'update',
-        )
-
     def _make_new_mutator(mutator):
         def new_mutator(self, *args, **kwargs):
             res = mutator(self, *args, **kwargs)
@@ -191,15 +236,124 @@ def _memparamstorage(base):
             # self.obj (this should really never be done, but no one will stop
             # anyone), the cache on the old self.obj is left intact, while the
             # cache on the new self.obj is cleared.
-            memoize_method.clear_cache(self.obj)
+            _invalidate(self.obj, self)
             return res
         return new_mutator
 
-    for mutator_name in Mutators.names:
-        if hasattr(_MemparamStorage, mutator_name):
-            mutator = getattr(_MemparamStorage, mutator_name)
-            if isinstance(mutator, Callable):
-                setattr(_MemparamStorage, mutator_name,
-                        _make_new_mutator(mutator))
+    _intercept_mutators(_MemparamStorage, _make_new_mutator)
 
     return _MemparamStorage
+
+
+@memoize_function
+def _compact_memparamstorage(base):
+    """
+    Return a compact storage class derived from `base`, see
+    `compact_memparamstorage`
+
+    Instances refer to the object to manage memoize cache on and the key they
+    are stored under through slots rather than an instance dict, and mutations
+    invalidate the cache without searching the object's Memparams storage.
+
+    """
+    def __new__(cls, obj, key, *args, **kwargs):
+        if base.__new__ is object.__new__:
+            new = object.__new__(cls)
+        else:
+            new = base.__new__(cls, *args, **kwargs)
+        # Set through the slot descriptors, bypassing the intercepted
+        # __setattr__
+        if obj_slot is None:
+            new.__dict__.update(obj=obj, key=key)
+        else:
+            obj_slot.__set__(new, obj)
+            key_slot.__set__(new, key)
+        return new
+
+    def __init__(self, obj, key, *args, **kwargs):
+        baseinit = base.__init__
+        if baseinit is not object.__init__:
+            baseinit(self, *args, **kwargs)
+
+    def __reduce__(self):
+        return compact_memparamstorage, (base, self.obj, self.key, base(self))
+
+    namespace = {'__new__': __new__, '__init__': __init__,
+                 '__reduce__': __reduce__, '__slots__': ('obj', 'key')}
+    name = str('_CompactMemparamStorage')
+    try:
+        cls = type(name, (base,), namespace)
+    except TypeError:
+        # Bases such as subclasses of int do not support nonempty __slots__
+        del namespace['__slots__']
+        cls = type(name, (base,), namespace)
+    obj_slot = cls.__dict__.get('obj')
+    key_slot = cls.__dict__.get('key')
+
+    def _make_new_mutator(mutator):
+        def new_mutator(self, *args, **kwargs):
+            res = mutator(self, *args, **kwargs)
+            _invalidate_key(self.obj, self.key, self)
+            return res
+        return new_mutator
+
+    _intercept_mutators(cls, _make_new_mutator)
+    return cls
+
+
+def _intercept_mutators(cls, make_new_mutator):
+    """
+    Replace the methods of `cls` named like mutating methods by the results of
+    `make_new_mutator`
+
+    """
+    for mutator_name in _MUTATOR_NAMES:
+        if hasattr(cls, mutator_name):
+            mutator = getattr(cls, mutator_name)
+            if isinstance(mutator, Callable):
+                setattr(cls, mutator_name, make_new_mutator(mutator))
+
+
+_MUTATOR_NAMES = (
+    '__setattr__',
+    '__delattr__',
+    '__setitem__',
+    '__delitem__',
+    '__setslice__',
+    '__delslice__',
+    '__iadd__',
+    '__isub__',
+    '__imul__',
+    '__imatmul__',
+    '__idiv__',
+    '__itruediv__',
+    '__ifloordiv__',
+    '__imod__',
+    '__ipow__',
+    '__ilshift__',
+    '__irshift__',
+    '__iand__',
+    '__ixor__',
+    '__ior__',
+    'append',
+    'appendleft',
+    'clear',
+    'discard',
+    'extend',
+    'extendleft',
+    'insert',
+    'pop',
+    'popleft',
+    'popitem',
+    'remove',
+    'reverse',
+    'rotate',
+    'setdefault',
+    'sort',
+    'subtract',
+    'update',
+)
+
+_IMMUTABLE_TYPES = frozenset([bool, int, float, complex, bytes, type(''),
+                              tuple, frozenset])
+_NoneType = type(None)
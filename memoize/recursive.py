@@ -0,0 +1,211 @@
+#!/usr/bin/env python
+
+"""recursive.py
+Module providing a memoize decorator for recursive functions, such as
+dynamic programming recurrences
+
+"""
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+from functools import partial
+from inspect import isgeneratorfunction
+from .memoize import (_MISSING, _call_batch, _map, _positional_arity,
+                      memoize_function)
+
+__all__ = [str('memoize_recursive')]
+
+
+class memoize_recursive(memoize_function):
+    """Cache the return value of a recursive function
+
+    Works like `memoize_function`, with two differences suited to recursive
+    functions with many small subproblems.
+
+    Calls passing every parameter by position, as recursive calls usually
+    do, look up the argument tuple directly in the cache, without building a
+    key. Other calls are normalized to that form first.
+
+    If `f` is a generator function, it is evaluated by a trampoline instead
+    of by recursion, so that the depth of the recurrence is not limited by
+    the Python stack. Instead of calling itself, `f` yields the arguments of
+    each subproblem, as a tuple or, if `f` takes a single parameter, as the
+    argument itself, and receives its result. The generator's return value is
+    the result. Exceptions raised by a subproblem are thrown into the
+    generator that yielded it.
+
+    Alternatively, `bottom_up` evaluates a recurrence of either kind in an
+    order where every subproblem is already cached when it is needed.
+
+    Parameters
+    ----------
+    f : callable
+        Function or generator function to memoize. Its parameters must be
+        positional, unless it is a plain function. If omitted, a decorator
+        accepting `f` and using the remaining options is returned.
+    maxsize, policy, ttl, sizeof
+        Cache eviction options, see `memoize_function`.
+
+    Examples
+    --------
+    >>> @memoize_recursive
+    >>> def paths(m, n):
+    >>>     # Number of monotonic lattice paths on an m x n grid
+    >>>     if m == 0 or n == 0:
+    >>>         return 1
+    >>>     return (yield m - 1, n) + (yield m, n - 1)
+    >>>
+    >>> paths(2000, 2000)  # 4 million states, no RecursionError
+    >>> paths(2000, 2001)  # reuses the cached states
+
+    """
+
+    def __init__(self, f, maxsize=None, policy=None, ttl=None, sizeof=None):
+        super(memoize_recursive, self).__init__(
+            f, maxsize=maxsize, policy=policy, ttl=ttl, sizeof=sizeof)
+        # The cache is only ever cleared, never replaced
+        self._lookup = getattr(self, self.cache_name).get
+        self._nargs = _positional_arity(f)
+        self._trampoline = isgeneratorfunction(f)
+        if self._trampoline and self._nargs < 0:
+            raise ValueError("Generator functions memoized with "
+                             "memoize_recursive must take positional "
+                             "parameters only")
+
+    def __call__(self, *args, **kwargs):
+        if kwargs or len(args) != self._nargs:
+            if self._nargs < 0:
+                return super(memoize_recursive, self).__call__(*args,
+                                                               **kwargs)
+            # Keys of functions without variadic parameters are the full
+            # argument tuples
+            args = self._make_key(args, kwargs)
+
+        try:
+            res = self._lookup(args, _MISSING)
+        except TypeError:
+            if self._trampoline:
+                return self._evaluate(args, False)
+            return self.f(*args)
+        if res is _MISSING:
+            if self._trampoline:
+                return self._evaluate(args)
+            getattr(self, self.cache_name)[args] = res = self.f(*args)
+        return res
+
+    def map(self, args_list, vectorized=None, executor=None):
+        """
+        Return the results of calling the memoized function with each of a
+        sequence of argument tuples
+
+        Works like `memoize_function.map`. Missing results of generator
+        functions are evaluated by the trampoline, and `vectorized` is passed
+        the full argument tuples, defaults included.
+
+        """
+        if not self._trampoline:
+            return super(memoize_recursive, self).map(
+                args_list, vectorized=vectorized, executor=executor)
+        evaluate = partial(_call_batch, self._evaluate_uncached,
+                           vectorized=vectorized, executor=executor)
+        # The keys are the full argument tuples
+        return _map(getattr(self, self.cache_name), self._make_key, args_list,
+                    lambda calls_args, calls_keys: evaluate(calls_keys,
+                                                            calls_keys),
+                    self._stats)
+
+    def bottom_up(self, args_list):
+        """
+        Compute and cache the results for a sequence of argument lists in
+        turn, and return the last result
+
+        If the subproblems of each problem come earlier in `args_list`, every
+        recursive call is answered from the cache, so the recurrence is
+        evaluated without deep recursion and at little more than the cost of
+        a cache lookup per problem.
+
+        Parameters
+        ----------
+        args_list : iterable
+            Tuples of positional arguments or, if `f` takes a single
+            parameter, the arguments themselves.
+
+        Examples
+        --------
+        >>> @memoize_recursive
+        >>> def fib_mod(n):
+        >>>     if n < 2:
+        >>>         return n
+        >>>     return (fib_mod(n - 1) + fib_mod(n - 2)) % 1000000007
+        >>>
+        >>> fib_mod.bottom_up(range(10 ** 6))
+
+        """
+        res = None
+        if self._nargs == 1:
+            for arg in args_list:
+                res = self(arg)
+        else:
+            for args in args_list:
+                res = self(*args)
+        return res
+
+    def _evaluate_uncached(self, *args):
+        # The result for args, which the caller caches if it can
+        return self._evaluate(args, False)
+
+    def _evaluate(self, args, cacheable=True):
+        """
+        Return the result of the generator function for `args`, evaluating
+        the subproblems it yields on an explicit stack and caching their
+        results
+
+        """
+        f = self.f
+        single = self._nargs == 1
+        cache = getattr(self, self.cache_name)
+        get = cache.get
+        # Stack of (key, generator), where key is None for an unhashable
+        # argument tuple
+        stack = [(args if cacheable else None, f(*args))]
+        push, pop = stack.append, stack.pop
+        value = error = None
+        while stack:
+            key, gen = stack[-1]
+            try:
+                if error is None:
+                    subargs = gen.send(value)
+                else:
+                    exc, error = error, None
+                    subargs = gen.throw(exc)
+            except StopIteration as stop:
+                pop()
+                value = stop.args[0] if stop.args else None
+                if key is not None:
+                    cache[key] = value
+                continue
+            except BaseException as exc:
+                pop()
+                if not stack:
+                    raise
+                error = exc
+                continue
+
+            if single:
+                subargs = (subargs,)
+            elif type(subargs) is not tuple:
+                subargs = tuple(subargs)
+            subkey = subargs
+            try:
+                value = get(subargs, _MISSING)
+            except TypeError:
+                value = _MISSING
+                subkey = None
+            if value is _MISSING:
+                value = None
+                try:
+                    push((subkey, f(*subargs)))
+                except Exception as exc:
+                    # Invalid argument list
+                    error = exc
+        return value
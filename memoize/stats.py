@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+
+"""stats.py
+Module providing cache statistics and a registry of memoized callables
+
+"""
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+from collections import namedtuple
+from weakref import WeakSet
+try:
+    # Python >= 3.3
+    from time import perf_counter as _timer
+except ImportError:
+    # Python 2
+    from timeit import default_timer as _timer
+
+__all__ = [str(name) for name in ('CacheInfo', 'memoized_callables',
+                                  'cache_infos', 'add_stats_hook',
+                                  'remove_stats_hook')]
+
+
+class CacheInfo(namedtuple('CacheInfo', ['hits', 'misses', 'uncacheable',
+                                         'evictions', 'maxsize', 'currsize',
+                                         'time'])):
+    """
+    Statistics of a memoized callable
+
+    Counters are None if statistics are not tracked.
+
+    Attributes
+    ----------
+    hits : int
+        Number of calls answered from the cache.
+    misses : int
+        Number of calls whose result was computed and cached.
+    uncacheable : int
+        Number of calls whose arguments could not be used as a cache key.
+    evictions : int
+        Number of entries evicted or expired by the cache policy.
+    maxsize : number
+        The configured `maxsize`, or None.
+    currsize : int
+        Current number of cache entries, or None if unknown.
+    time : float
+        Cumulative time in seconds spent in the memoized callable.
+
+    """
+    __slots__ = ()
+
+
+_registry = WeakSet()
+_hooks = []
+
+
+def memoized_callables():
+    """
+    Return a list of all existing memoized functions and methods
+
+    """
+    return list(_registry)
+
+
+def cache_infos():
+    """
+    Return a dict mapping all existing memoized functions and methods to their
+    `CacheInfo`
+
+    """
+    return dict((memoized, memoized.cache_info())
+                for memoized in memoized_callables())
+
+
+def add_stats_hook(hook):
+    """
+    Add a function to call on every event tracked by memoize statistics
+
+    Parameters
+    ----------
+    hook : callable
+        Function called as `hook(memoized, event, duration)`, where
+        `memoized` is the memoized function or method, `event` is one of
+        'hit', 'miss', 'uncacheable' and 'eviction', and `duration` is the
+        time in seconds spent in the memoized callable for 'miss' and
+        'uncacheable' events, and None otherwise. Only memoized callables
+        with statistics enabled call hooks.
+
+    """
+    _hooks.append(hook)
+
+
+def remove_stats_hook(hook):
+    """
+    Remove a function added with `add_stats_hook`
+
+    """
+    _hooks.remove(hook)
+
+
+class _Stats(object):
+    """
+    Counters of a memoized callable
+
+    Counters are updated without synchronization, so under concurrent use
+    they are approximate.
+
+    """
+    __slots__ = ('owner', 'hits', 'misses', 'uncacheable', 'evictions',
+                 'time')
+
+    def __init__(self, owner):
+        self.owner = owner
+        self.hits = self.misses = self.uncacheable = self.evictions = 0
+        self.time = 0.0
+
+    def info(self, maxsize, currsize):
+        return CacheInfo(self.hits, self.misses, self.uncacheable,
+                         self.evictions, maxsize, currsize, self.time)
+
+    def lookup(self, cache, key, f, args, kwargs):
+        """
+        Return the result for `key` in `cache`, computing it as `f(*args,
+        **kwargs)` if missing, and count what happened
+
+        """
+        try:
+            res = cache.get(key, _MISSING)
+        except TypeError:
+            return self.call(f, args, kwargs, cacheable=False)
+        if res is _MISSING:
+            cache[key] = res = self.call(f, args, kwargs)
+        else:
+            self.hit()
+        return res
+
+    def call(self, f, args, kwargs, cacheable=True):
+        """
+        Return `f(*args, **kwargs)`, counted as a miss or as uncacheable
+
+        """
+        start = _timer()
+        try:
+            return f(*args, **kwargs)
+        finally:
+            duration = _timer() - start
+            if cacheable:
+                self.miss(duration)
+            else:
+                self.uncached(duration)
+
+    def hit(self):
+        self.hits += 1
+        if _hooks:
+            self._notify('hit', None)
+
+    def miss(self, duration):
+        self.misses += 1
+        self.time += duration
+        if _hooks:
+            self._notify('miss', duration)
+
+    def uncached(self, duration):
+        self.uncacheable += 1
+        self.time += duration
+        if _hooks:
+            self._notify('uncacheable', duration)
+
+    def evicted(self, key):
+        self.evictions += 1
+        if _hooks:
+            self._notify('eviction', None)
+
+    def _notify(self, event, duration):
+        for hook in list(_hooks):
+            hook(self.owner, event, duration)
+
+
+_MISSING = object()
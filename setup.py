@@ -16,4 +16,5 @@ setup(
     author='Daniel Wennberg',
     author_email='daniel.wennberg@gmail.com',
     packages=find_packages(),
+    extras_require={'numpy': ['numpy']},
 )
@@ -0,0 +1,56 @@
+"""Fixtures shared by the tests"""
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Run as a separate process: prints square(x), counting the calls in a file
+SCRIPT = """
+import os
+import sys
+from memoize import DiskBackend, SharedMemoryBackend, memoize_function
+
+kind, location, calls_path, x = sys.argv[1:]
+if kind == 'disk':
+    backend = DiskBackend(location)
+else:
+    backend = SharedMemoryBackend(location, size=2 ** 20, slots=2 ** 10)
+
+
+@memoize_function(backend=backend)
+def square(x):
+    with open(calls_path, 'a') as calls:
+        calls.write('.')
+    return x * x
+
+
+print(square(int(x)))
+"""
+
+
+@pytest.fixture
+def run_square(tmp_path):
+    script = tmp_path / 'square.py'
+    script.write_text(SCRIPT)
+    calls = tmp_path / 'calls'
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        [ROOT] + [path for path in [env.get('PYTHONPATH')] if path])
+
+    def run(kind, location, x):
+        output = subprocess.check_output(
+            [sys.executable, str(script), kind, location, str(calls),
+             str(x)], env=env)
+        return int(output)
+
+    def count():
+        return len(calls.read_text()) if calls.exists() else 0
+
+    run.count = count
+    return run
@@ -0,0 +1,69 @@
+"""Tests of memoized methods accessed through instances"""
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+import gc
+import weakref
+
+from memoize import MemoizeSlots, memoize_method
+
+
+class Adder(object):
+    def __init__(self, base):
+        self.base = base
+        self.calls = []
+
+    @memoize_method
+    def add(self, x, y=0):
+        self.calls.append((x, y))
+        return self.base + x + y
+
+
+class SlottedAdder(MemoizeSlots):
+    __slots__ = ('base', 'calls')
+
+    def __init__(self, base):
+        self.base = base
+        self.calls = []
+
+    @memoize_method
+    def add(self, x, y=0):
+        self.calls.append((x, y))
+        return self.base + x + y
+
+
+def test_bound_method_attributes():
+    adder = Adder(1)
+    bound = adder.add
+    assert bound.__self__ is adder
+    assert bound.__func__ is Adder.__dict__['add']
+    assert Adder.add(adder, 2) == 3
+
+
+def test_positional_and_keyword_calls_share_cache():
+    for cls in (Adder, SlottedAdder):
+        adder = cls(1)
+        assert adder.add(2) == adder.add(2) == 3
+        assert adder.add(2, 0) == adder.add(x=2) == adder.add(2, y=0) == 3
+        assert adder.add(2, 1) == 4
+        assert adder.calls == [(2, 0), (2, 1)]
+
+
+def test_caches_are_per_instance():
+    first, second = Adder(1), Adder(10)
+    assert first.add(1) == 2
+    assert second.add(1) == 11
+    assert first.calls == second.calls == [(1, 0)]
+
+
+def test_bound_method_does_not_keep_instance_alive():
+    gc.disable()
+    try:
+        adder = Adder(1)
+        adder.add(1)
+        ref = weakref.ref(adder)
+        del adder
+        # Freed by reference counting alone
+        assert ref() is None
+    finally:
+        gc.enable()
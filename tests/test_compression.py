@@ -0,0 +1,52 @@
+"""Tests of the compressed storage of cached results"""
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+from memoize import memoize_function
+
+
+def make_text(**options):
+    calls = []
+
+    @memoize_function(compress='zlib', compress_threshold=64, **options)
+    def text(n):
+        calls.append(n)
+        return 'x' * n
+
+    return text, calls
+
+
+def test_compressed_results_round_trip():
+    text, calls = make_text()
+    assert text(10000) == text(10000) == 'x' * 10000
+    assert text(8) == text(8) == 'x' * 8
+    assert calls == [10000, 8]
+    info = text.storage_info()
+    assert (info.entries, info.compressed) == (2, 1)
+    assert info.stored_size < info.raw_size
+
+
+def test_sizeof_weighs_uncompressed_results():
+    text, calls = make_text(maxsize=2500, sizeof=len)
+    text(1000)
+    text(1000)
+    text(1000)
+    assert calls == [1000]
+    # Weighs 2000 with the first, so the first is evicted
+    text(2000)
+    text(1000)
+    assert calls == [1000, 2000, 1000]
+    # Weighs more than maxsize alone, so it is not stored
+    text(3000)
+    text(3000)
+    assert calls[-2:] == [3000, 3000]
+
+
+def test_refused_results_leave_no_sizes():
+    text, calls = make_text(maxsize=2500, sizeof=len)
+    text(3000)
+    text(8)
+    cache = getattr(text, text.cache_name)
+    assert list(cache._sizes) == list(cache.entry_sizes())
+    info = text.storage_info()
+    assert (info.entries, info.raw_size) == (1, cache._sizes[(8,)][0])
@@ -0,0 +1,61 @@
+"""Tests of the content keys of unhashable arguments"""
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+import pytest
+
+from memoize import memoize_function
+
+
+def make_total():
+    calls = []
+
+    @memoize_function(content_keys=True)
+    def total(values):
+        calls.append(values)
+        return len(values)
+
+    return total, calls
+
+
+def test_equal_content_hits():
+    total, calls = make_total()
+    assert total([1.0, 2.0]) == total([1.0, 2.0]) == 2
+    assert total({'a': [1], 'b': {2}}) == total({'b': {2}, 'a': [1]}) == 2
+    assert len(calls) == 2
+    total([2.0, 1.0])
+    assert len(calls) == 3
+
+
+def test_nested_objects_compare_by_equality():
+    class Marker(object):
+        def __init__(self, x):
+            self.x = x
+
+    total, calls = make_total()
+    first, second = Marker(1), Marker(1)
+    total([first])
+    total([second])
+    total([first])
+    assert calls == [[first], [second]]
+
+
+def test_unfingerprintable_arguments_are_not_cached():
+    class Unhashable(object):
+        __hash__ = None
+
+    total, calls = make_total()
+    values = [Unhashable()]
+    assert total(values) == total(values) == 1
+    assert len(calls) == 2
+
+
+def test_unfingerprintable_arrays_are_not_cached():
+    numpy = pytest.importorskip('numpy')
+    total, calls = make_total()
+    dates = numpy.array(['2020-01-01', '2020-01-02'], dtype='datetime64[D]')
+    assert total(dates) == total(dates) == 2
+    assert len(calls) == 2
+    array = numpy.arange(3.0)
+    assert total(array) == total(array.copy()) == 3
+    assert len(calls) == 3
@@ -0,0 +1,122 @@
+"""Tests of the memoize decorators for coroutine functions and methods"""
+
+import asyncio
+
+import pytest
+
+from memoize import memoize_async_function, memoize_async_method
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def test_concurrent_awaiters_share_task():
+    calls = []
+
+    @memoize_async_function
+    async def fetch(x):
+        calls.append(x)
+        await asyncio.sleep(0.01)
+        return x * 2
+
+    async def main():
+        return await asyncio.gather(*[fetch(1) for _ in range(5)])
+
+    assert run(main()) == [2] * 5
+    assert calls == [1]
+    assert run(fetch(1)) == 2
+    assert calls == [1]
+
+
+def test_exception_reaches_every_awaiter():
+    calls = []
+
+    @memoize_async_function
+    async def failing(x):
+        calls.append(x)
+        await asyncio.sleep(0.01)
+        raise ValueError(x)
+
+    async def main():
+        return await asyncio.gather(*[failing(1) for _ in range(3)],
+                                    return_exceptions=True)
+
+    errors = run(main())
+    assert all(isinstance(error, ValueError) for error in errors)
+    assert calls == [1]
+    # The exception is not cached
+    with pytest.raises(ValueError):
+        run(failing(1))
+    assert calls == [1, 1]
+
+
+def test_cancelled_awaiter_does_not_cancel_others():
+    calls = []
+
+    @memoize_async_function
+    async def slow(x):
+        calls.append(x)
+        await asyncio.sleep(0.05)
+        return x
+
+    async def main():
+        first = asyncio.ensure_future(slow(1))
+        second = asyncio.ensure_future(slow(1))
+        await asyncio.sleep(0)
+        first.cancel()
+        result = await second
+        return first.cancelled(), result
+
+    assert run(main()) == (True, 1)
+    assert calls == [1]
+    assert run(slow(1)) == 1
+    assert calls == [1]
+
+
+def test_method_tasks_per_instance():
+    calls = []
+
+    class Client(object):
+        def __init__(self, name):
+            self.name = name
+
+        @memoize_async_method
+        async def fetch(self, x):
+            calls.append((self.name, x))
+            await asyncio.sleep(0.01)
+            return self.name, x
+
+    first, second = Client('a'), Client('b')
+
+    async def main():
+        return await asyncio.gather(first.fetch(1), first.fetch(1),
+                                    second.fetch(1))
+
+    assert run(main()) == [('a', 1), ('a', 1), ('b', 1)]
+    assert sorted(calls) == [('a', 1), ('b', 1)]
+
+
+def test_prefill():
+    calls = []
+    running = [0, 0]  # current, peak
+
+    @memoize_async_function
+    async def square(x):
+        calls.append(x)
+        running[0] += 1
+        running[1] = max(running)
+        await asyncio.sleep(0.01)
+        running[0] -= 1
+        return x * x
+
+    run(square.prefill([(x,) for x in range(6)], max_workers=2))
+    assert sorted(calls) == list(range(6))
+    assert running[1] == 2
+    assert run(square.map([(x,) for x in range(6)])) == [
+        x * x for x in range(6)]
+    assert len(calls) == 6
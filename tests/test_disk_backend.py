@@ -0,0 +1,63 @@
+"""Tests of results stored on disk through DiskBackend"""
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+import pytest
+
+from memoize import DiskBackend, DiskCache, memoize_function
+
+
+def test_disk_backend_shares_results(run_square, tmp_path):
+    location = str(tmp_path / 'cache')
+    assert run_square('disk', location, 3) == 9
+    assert run_square('disk', location, 3) == 9
+    assert run_square('disk', location, 4) == 16
+    assert run_square.count() == 2
+
+
+def test_disk_cache_returns_stored_types(tmp_path):
+    cache = DiskCache(str(tmp_path), mmap_threshold=16)
+    cache['bytes'] = b'x' * 64
+    cache['small'] = b'x'
+    cache['bytearray'] = bytearray(b'x' * 64)
+    assert type(cache['bytes']) is bytes
+    assert cache['bytes'] == b'x' * 64
+    assert type(cache['small']) is bytes
+    assert type(cache['bytearray']) is bytearray
+
+    view = DiskCache(str(tmp_path), mmap_threshold=16, zero_copy=True)
+    assert bytes(view['bytes']) == b'x' * 64
+
+
+def test_disk_cache_arrays(tmp_path):
+    numpy = pytest.importorskip('numpy')
+    cache = DiskCache(str(tmp_path), mmap_threshold=16)
+    cache['array'] = numpy.arange(12.0).reshape(3, 4)
+    array = cache['array']
+    assert array.shape == (3, 4)
+    array[0, 0] = -1
+    assert cache['array'][0, 0] == 0
+
+    view = DiskCache(str(tmp_path), mmap_threshold=16, zero_copy=True)
+    assert not view['array'].flags.writeable
+
+
+def test_disk_cache_fingerprint_clears(tmp_path):
+    cache = DiskCache(str(tmp_path), fingerprint='1')
+    cache['key'] = 'value'
+    assert DiskCache(str(tmp_path), fingerprint='1')['key'] == 'value'
+    assert 'key' not in DiskCache(str(tmp_path), fingerprint='2')
+
+
+def test_disk_backend_function(tmp_path):
+    calls = []
+
+    def square(x):
+        calls.append(x)
+        return x * x
+
+    first = memoize_function(square, backend=DiskBackend(str(tmp_path)))
+    second = memoize_function(square, backend=DiskBackend(str(tmp_path)))
+    assert first(3) == 9
+    assert second(3) == 9
+    assert calls == [3]
@@ -0,0 +1,90 @@
+"""Tests of the eviction policies of bounded caches"""
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+import pytest
+
+from memoize import (LFUCache, LRUCache, TTLCache, WeightedCache,
+                     memoize_function)
+
+
+class Clock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(2)
+    cache['a'] = 1
+    cache['b'] = 2
+    cache.get('a')
+    cache['c'] = 3
+    assert sorted(cache) == ['a', 'c']
+
+
+def test_lfu_evicts_least_frequently_used():
+    cache = LFUCache(2)
+    cache['a'] = 1
+    cache['b'] = 2
+    cache.get('a')
+    cache.get('a')
+    cache.get('b')
+    cache['c'] = 3
+    assert sorted(cache) == ['a', 'c']
+    # Ties go to the least recently used
+    cache['d'] = 4
+    assert sorted(cache) == ['a', 'd']
+
+
+def test_ttl_expires_and_evicts_oldest():
+    clock = Clock()
+    cache = TTLCache(2, ttl=10, timer=clock)
+    cache['a'] = 1
+    clock.now = 5
+    cache['b'] = 2
+    clock.now = 8
+    cache['c'] = 3
+    assert sorted(cache) == ['b', 'c']
+    clock.now = 15
+    assert 'b' not in cache
+    assert cache['c'] == 3
+    clock.now = 18
+    assert cache.get('c') is None
+
+
+def test_weight_evicts_least_recently_used():
+    evicted = []
+    cache = WeightedCache(10, sizeof=len)
+    cache.on_evict = evicted.append
+    cache['a'] = 'x' * 4
+    cache['b'] = 'x' * 4
+    cache.get('a')
+    cache['c'] = 'x' * 4
+    assert sorted(cache) == ['a', 'c']
+    assert cache.weight == 8
+    assert evicted == ['b']
+    # Too heavy to be stored at all
+    cache['d'] = 'x' * 11
+    assert sorted(cache) == ['a', 'c']
+
+
+@pytest.mark.parametrize('cache', [LRUCache(0), LFUCache(0), TTLCache(0, 10),
+                                   WeightedCache(0, sizeof=len)])
+def test_zero_maxsize_stores_nothing(cache):
+    cache['a'] = 'x'
+    assert len(cache) == 0
+
+
+def test_function_zero_maxsize_disables_cache():
+    calls = []
+
+    @memoize_function(maxsize=0)
+    def square(x):
+        calls.append(x)
+        return x * x
+
+    assert square(2) == square(2) == 4
+    assert calls == [2, 2]
@@ -0,0 +1,99 @@
+"""Tests of cache clearance through friend graphs"""
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+import gc
+import sys
+
+from memoize import memoize_method
+
+
+class Node(object):
+    def __init__(self):
+        self.calls = 0
+
+    @memoize_method
+    def value(self):
+        self.calls += 1
+        return self.calls
+
+
+class Unhashable(Node):
+    __hash__ = None
+
+    def __eq__(self, other):
+        # All equal, so friends must be told apart by identity
+        return isinstance(other, Unhashable)
+
+
+class Counting(Node):
+    """Counts how often cache clearance looks up its caches"""
+    visits = 0
+
+    def __getattr__(self, name):
+        if name == memoize_method.cache_name:
+            Counting.visits += 1
+        raise AttributeError(name)
+
+
+def friends_of(obj):
+    return getattr(obj, memoize_method.friend_list_name)
+
+
+def test_mutual_friends():
+    first, second = Node(), Node()
+    memoize_method.register_friend(first, second)
+    memoize_method.register_friend(second, first)
+    first.value()
+    second.value()
+    memoize_method.clear_cache(first)
+    assert (first.value(), second.value()) == (2, 2)
+    memoize_method.clear_cache(second)
+    assert (first.value(), second.value()) == (3, 3)
+
+
+def test_chain_deeper_than_recursion_limit():
+    nodes = [Node() for _ in range(3 * sys.getrecursionlimit())]
+    for (host, friend) in zip(nodes, nodes[1:]):
+        memoize_method.register_friend(host, friend)
+    for node in nodes:
+        node.value()
+    memoize_method.clear_cache(nodes[0])
+    assert nodes[-1].value() == 2
+
+
+def test_unhashable_friends():
+    host = Node()
+    friends = [Unhashable(), Unhashable()]
+    for friend in friends:
+        memoize_method.register_friend(host, friend)
+    assert len(friends_of(host)) == 2
+    for friend in friends:
+        friend.value()
+    memoize_method.clear_cache(host)
+    assert [friend.value() for friend in friends] == [2, 2]
+    memoize_method.unregister_friend(host, friends[0])
+    assert friends[0] not in friends_of(host)
+    assert friends[1] in friends_of(host)
+
+
+def test_collected_friends_drop_out():
+    host, friend = Node(), Node()
+    memoize_method.register_friend(host, friend)
+    assert len(friends_of(host)) == 1
+    del friend
+    gc.collect()
+    assert len(friends_of(host)) == 0
+    assert list(friends_of(host)) == []
+    memoize_method.clear_cache(host)
+
+
+def test_shared_friends_visited_once():
+    first, second = Node(), Node()
+    shared = Counting()
+    memoize_method.register_friend(first, shared)
+    memoize_method.register_friend(second, shared)
+    memoize_method.register_friend(shared, first)
+    Counting.visits = 0
+    memoize_method.clear_cache(first, second)
+    assert Counting.visits == 1
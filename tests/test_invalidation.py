@@ -0,0 +1,166 @@
+"""Tests of cache clearance and invalidation of memoized methods"""
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+import pytest
+
+from memoize import Memparams, memoize_function, memoize_method
+
+
+def make_model(**options):
+    calls = []
+
+    class Model(object):
+        alpha = Memparams(float, 'alpha')
+        beta = Memparams(float, 'beta')
+
+        def __init__(self, alpha, beta):
+            self.alpha = alpha
+            self.beta = beta
+
+        @memoize_method(**options)
+        def scaled(self, x):
+            calls.append(('scaled', x))
+            return self.alpha * x
+
+        @memoize_method(**options)
+        def shifted(self, x):
+            calls.append(('shifted', x))
+            return self.beta + x
+
+        @memoize_method(**options)
+        def combined(self, x):
+            calls.append(('combined', x))
+            return self.scaled(x) + self.beta
+
+    return Model(2.0, 1.0), calls
+
+
+@pytest.mark.parametrize('options', [{}, {'lazy': True},
+                                     {'track_dependencies': True}])
+def test_setting_memparams_invalidates(options):
+    model, calls = make_model(**options)
+    assert model.combined(3) == 7.0
+    assert model.combined(3) == 7.0
+    assert len(calls) == 2
+
+    model.alpha = 3.0
+    assert model.combined(3) == 10.0
+    assert calls[2:] == [('combined', 3), ('scaled', 3)]
+
+
+def test_tracking_evicts_only_dependents():
+    model, calls = make_model(track_dependencies=True)
+    model.scaled(1)
+    model.shifted(1)
+    model.combined(1)
+    del calls[:]
+
+    # shifted and combined read beta, scaled does not
+    model.beta = 5.0
+    assert model.scaled(1) == 2.0
+    assert model.shifted(1) == 6.0
+    assert model.combined(1) == 7.0
+    assert sorted(calls) == [('combined', 1), ('shifted', 1)]
+
+    # combined depends on scaled, which reads alpha
+    del calls[:]
+    model.alpha = 4.0
+    model.shifted(1)
+    assert model.combined(1) == 9.0
+    assert sorted(calls) == [('combined', 1), ('scaled', 1)]
+
+
+def test_mutation_invalidates():
+    calls = []
+
+    class Grid(object):
+        points = Memparams(list, 'points')
+
+        def __init__(self, points):
+            self.points = points
+
+        @memoize_method
+        def total(self):
+            calls.append(None)
+            return sum(self.points)
+
+    grid = Grid([1, 2])
+    assert grid.total() == 3
+    grid.points.append(3)
+    assert grid.total() == 6
+    assert len(calls) == 2
+
+
+def test_clear_cache_reaches_friends():
+    host, host_calls = make_model()
+    friend, friend_calls = make_model()
+    memoize_method.register_friend(host, friend)
+    host.scaled(1)
+    friend.scaled(1)
+
+    memoize_method.clear_cache(host)
+    host.scaled(1)
+    friend.scaled(1)
+    assert len(host_calls) == 2
+    assert len(friend_calls) == 2
+
+
+def test_function_clear_cache():
+    calls = []
+
+    @memoize_function
+    def square(x):
+        calls.append(x)
+        return x * x
+
+    square(2)
+    square(2)
+    square.clear_cache()
+    square(2)
+    assert calls == [2, 2]
+
+
+def test_deferred_invalidation():
+    model, calls = make_model(track_dependencies=True)
+    model.combined(1)
+    with memoize_method.deferred_invalidation():
+        model.alpha = 5.0
+        model.beta = 0.0
+        # Not yet invalidated
+        assert model.combined(1) == 3.0
+    assert model.combined(1) == 5.0
+
+
+
+def test_deferred_invalidation_visits_objects_once():
+    host, host_calls = make_model(lazy=True)
+    friend, friend_calls = make_model(lazy=True)
+    memoize_method.register_friend(host, friend)
+    host.scaled(1)
+    friend.scaled(1)
+    with memoize_method.deferred_invalidation():
+        friend.alpha = 3.0
+        memoize_method.clear_cache(host)
+        host.beta = 2.0
+    # Each visit bumps the generation of lazy caches
+    assert getattr(host, memoize_method.generation_name) == 1
+    assert getattr(friend, memoize_method.generation_name) == 1
+    assert friend.scaled(1) == 3.0
+    assert len(friend_calls) == 2
+
+def test_reads_recorded_only_while_tracking(monkeypatch):
+    reads = []
+    record_read = memoize_method.record_read
+
+    def recording(obj, dependency):
+        reads.append(dependency)
+        record_read(obj, dependency)
+
+    monkeypatch.setattr(memoize_method, 'record_read',
+                        staticmethod(recording))
+    model, calls = make_model(track_dependencies=True)
+    model.alpha
+    model.shifted(1)
+    model.shifted(1)
+    assert reads == [('memparams', (float, 'beta'))]
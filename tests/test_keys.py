@@ -0,0 +1,140 @@
+"""Tests of the cache keys of memoized calls"""
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+import sys
+
+import pytest
+
+from memoize import memoize_function
+
+
+def test_equivalent_calls_share_result():
+    calls = []
+
+    @memoize_function
+    def f(a, b=2, c=3):
+        calls.append((a, b, c))
+        return a + b + c
+
+    assert f(1) == f(1, 2) == f(1, 2, 3) == f(a=1) == f(1, c=3) == 6
+    assert calls == [(1, 2, 3)]
+    assert f(1, 3) == 7
+    assert len(calls) == 2
+
+
+def test_invalid_calls_raise():
+    @memoize_function
+    def f(a, b=2):
+        return a + b
+
+    f(1)
+    for (args, kwargs) in [((), {}), ((1, 2, 3), {}), ((1,), {'a': 1}),
+                           ((1,), {'c': 1})]:
+        with pytest.raises(TypeError):
+            f(*args, **kwargs)
+
+
+@pytest.mark.skipif(sys.version_info < (3, 8),
+                    reason="positional-only parameters need Python >= 3.8")
+def test_positional_only_by_keyword_raises():
+    namespace = {}
+    exec("def f(a, /, b=2, **kwargs):\n"
+         "    return a, b, kwargs\n", namespace)
+    f = memoize_function(namespace['f'])
+    assert f(1) == (1, 2, {})
+    with pytest.raises(TypeError):
+        f(a=1)
+    # Passed on to **kwargs
+    assert f(1, a=5) == (1, 2, {'a': 5})
+
+
+def test_unhashable_arguments_are_not_cached():
+    calls = []
+
+    @memoize_function
+    def total(values):
+        calls.append(values)
+        return sum(values)
+
+    assert total([1, 2]) == total([1, 2]) == 3
+    assert len(calls) == 2
+
+
+def test_bound_methods():
+    class Point(object):
+        def __init__(self, x):
+            self.x = x
+
+        def shifted(self, dx, dy=0):
+            return (self.x + dx, dy)
+
+        @classmethod
+        def origin(cls, dx):
+            return (cls.__name__, dx)
+
+    shifted = memoize_function(Point(1).shifted)
+    assert shifted(2) == shifted(dx=2) == shifted(2, dy=0) == (3, 0)
+    assert shifted(2, dy=1) == (3, 1)
+    origin = memoize_function(Point.origin)
+    assert origin(1) == origin(dx=1) == ('Point', 1)
+
+
+def test_permuted_arguments_get_distinct_keys():
+    calls = []
+
+    @memoize_function
+    def f(a, b):
+        calls.append((a, b))
+        return a - b
+
+    assert f(a=1, b=2) == -1
+    assert f(a=2, b=1) == 1
+    assert f(b=2, a=1) == f(1, 2) == -1
+    assert calls == [(1, 2), (2, 1)]
+    make_key = f._make_key
+    assert make_key((), {'a': 1, 'b': 2}) != make_key((), {'a': 2, 'b': 1})
+
+
+def test_ignore():
+    calls = []
+
+    @memoize_function(ignore=['verbose'])
+    def square(x, verbose=False):
+        calls.append((x, verbose))
+        return x * x
+
+    assert square(2) == square(2, verbose=True) == square(2, True) == 4
+    assert calls == [(2, False)]
+    with pytest.raises(ValueError):
+        memoize_function(square.f, ignore=['y'])
+
+
+def test_key_transforms():
+    calls = []
+
+    @memoize_function(key_transforms={'x': lambda x: round(x, 1)})
+    def double(x):
+        calls.append(x)
+        return 2 * x
+
+    assert double(1.01) == 2.02
+    # Shares the result of the nearby input, but receives the argument as
+    # passed when computed
+    assert double(1.04) == 2.02
+    assert double(1.26) == 2.52
+    assert calls == [1.01, 1.26]
+
+
+def test_custom_key():
+    calls = []
+
+    @memoize_function(key=lambda name, **options: name.lower())
+    def greet(name, **options):
+        calls.append(name)
+        return 'Hello, ' + name
+
+    assert greet('Ada') == greet('ADA', punctuation='!') == 'Hello, Ada'
+    assert calls == ['Ada']
+    with pytest.raises(ValueError):
+        memoize_function(greet.f, key=len, ignore=['name'])
@@ -0,0 +1,89 @@
+"""Tests of lazy invalidation of memoized methods by generation counting"""
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+import pickle
+
+import pytest
+
+from memoize import Memparams, memoize_method
+
+
+class Model(object):
+    scale = Memparams(float, 'scale')
+
+    def __init__(self, scale):
+        self.scale = scale
+        self.calls = 0
+
+    @memoize_method(lazy=True)
+    def scaled(self, x):
+        self.calls += 1
+        return self.scale * x
+
+
+def lazy_caches(obj):
+    return getattr(obj, memoize_method.lazy_cache_name)
+
+
+def generation(obj):
+    return getattr(obj, memoize_method.generation_name, 0)
+
+
+def test_stale_cache_replaced_on_lookup():
+    model = Model(2.0)
+    model.scaled(1)
+    model.scaled(2)
+    stale = lazy_caches(model)['scaled']
+    model.scale = 3.0
+    # Only the generation changed
+    assert lazy_caches(model)['scaled'] is stale
+    assert generation(model) == stale[0] + 1
+    assert model.scaled(1) == 3.0
+    fresh = lazy_caches(model)['scaled']
+    assert fresh is not stale
+    assert fresh[0] == generation(model)
+    assert len(fresh[1]) == 1
+    assert model.calls == 3
+
+
+def test_generation_bump_reaches_friends():
+    host, friend = Model(1.0), Model(2.0)
+    memoize_method.register_friend(host, friend)
+    friend.scaled(1)
+    before = generation(friend)
+    memoize_method.clear_cache(host)
+    assert generation(friend) == before + 1
+    assert friend.scaled(1) == 2.0
+    assert friend.calls == 2
+
+
+def test_cache_info_after_bump():
+    model = Model(2.0)
+    model.scaled(1)
+    model.scaled(2)
+    memoizer = vars(Model)['scaled']
+    assert memoizer.cache_info(model).currsize == 2
+    model.scale = 3.0
+    assert memoizer.cache_info(model).currsize == 0
+    model.scaled(1)
+    assert memoizer.cache_info(model).currsize == 1
+
+
+def test_pickle_with_generation():
+    model = Model(2.0)
+    model.scaled(1)
+    model.scale = 3.0
+    model.scaled(1)
+    copy = pickle.loads(pickle.dumps(model))
+    assert generation(copy) == generation(model)
+    assert copy.scaled(1) == 3.0
+    assert copy.calls == model.calls == 2
+    copy.scale = 4.0
+    assert copy.scaled(1) == 4.0
+    assert copy.calls == 3
+
+
+def test_lazy_with_tracking_raises():
+    with pytest.raises(ValueError):
+        memoize_method(lambda self: None, lazy=True, track_dependencies=True)
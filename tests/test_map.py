@@ -0,0 +1,67 @@
+"""Tests of batch calls of memoized functions and methods"""
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+from concurrent.futures import ThreadPoolExecutor
+
+from memoize import memoize_function, memoize_method
+
+
+def make_power():
+    calls = []
+
+    @memoize_function
+    def power(x, n=2):
+        calls.append((x, n))
+        return x ** n
+
+    return power, calls
+
+
+def test_map_computes_missing_once():
+    power, calls = make_power()
+    power(3)
+    assert power.map([(1,), (3,), (1,), (2, 3)]) == [1, 9, 1, 8]
+    assert calls == [(3, 2), (1, 2), (2, 3)]
+    assert power(2, 3) == 8
+    assert len(calls) == 3
+
+
+def test_map_vectorized():
+    power, calls = make_power()
+    batches = []
+
+    def vectorized(args_list):
+        batches.append(list(args_list))
+        return [args[0] ** 2 for args in args_list]
+
+    assert power.map([(1,), (2,), (1,)], vectorized=vectorized) == [1, 4, 1]
+    assert batches == [[(1,), (2,)]]
+    assert power.map([(2,), (3,)], vectorized=vectorized) == [4, 9]
+    assert batches[1:] == [[(3,)]]
+    assert calls == []
+
+
+def test_map_executor():
+    power, calls = make_power()
+    with ThreadPoolExecutor(2) as executor:
+        assert power.map([(x,) for x in range(5)],
+                         executor=executor) == [0, 1, 4, 9, 16]
+    assert sorted(calls) == [(x, 2) for x in range(5)]
+
+
+def test_method_map():
+    class Scaler(object):
+        def __init__(self, factor):
+            self.factor = factor
+            self.calls = []
+
+        @memoize_method
+        def scale(self, x):
+            self.calls.append(x)
+            return self.factor * x
+
+    scaler = Scaler(3)
+    scaler.scale(1)
+    assert scaler.scale.map([(1,), (2,), (2,)]) == [3, 6, 6]
+    assert scaler.calls == [1, 2]
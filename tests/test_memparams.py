@@ -0,0 +1,43 @@
+"""Tests of the storage of Memparams data"""
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+import pytest
+
+from memoize import Memparams, memoize_method
+
+
+def make_holder(base, compact):
+    class Holder(object):
+        value = Memparams(base, 'value', compact=compact)
+
+        @memoize_method
+        def read(self):
+            return self.value
+
+    return Holder()
+
+
+@pytest.mark.parametrize('compact', [False, True])
+def test_mutation_invalidates(compact):
+    holder = make_holder(list, compact)
+    holder.value = [1]
+    assert holder.read() == [1]
+    holder.value.append(2)
+    assert holder.read() == [1, 2]
+
+
+def test_compact_immutable_values_are_plain():
+    holder = make_holder(float, True)
+    holder.value = 2
+    assert type(holder.value) is float
+    assert holder.read() == 2.0
+    holder.value = 3
+    assert holder.read() == 3.0
+
+
+def test_compact_none():
+    holder = make_holder(type(None), True)
+    holder.value = None
+    assert holder.value is None
+    assert holder.read() is None
@@ -0,0 +1,91 @@
+"""Tests of memoized properties"""
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+from memoize import (MemoizeSlots, Memparams, memoize_method,
+                     memoize_property)
+
+
+class Circle(object):
+    radius = Memparams(float, 'radius')
+
+    def __init__(self, radius):
+        self.radius = radius
+        self.calls = 0
+
+    @memoize_property
+    def area(self):
+        self.calls += 1
+        return 3 * self.radius ** 2
+
+
+class SlottedCircle(MemoizeSlots):
+    __slots__ = ('_memparams_storage', 'calls', '_area')
+    radius = Memparams(float, 'radius')
+
+    def __init__(self, radius):
+        self.radius = radius
+        self.calls = 0
+
+    @memoize_property(slot='_area')
+    def area(self):
+        self.calls += 1
+        return 3 * self.radius ** 2
+
+
+def test_cleared_on_memparams_assignment():
+    for cls in (Circle, SlottedCircle):
+        circle = cls(1.0)
+        assert circle.area == circle.area == 3.0
+        assert circle.calls == 1
+        circle.radius = 2.0
+        assert circle.area == 12.0
+        assert circle.calls == 2
+
+
+def test_cleared_on_mutation_and_clear_cache():
+    class Polygon(object):
+        sides = Memparams(list, 'sides')
+
+        def __init__(self, sides):
+            self.sides = sides
+
+        @memoize_property
+        def perimeter(self):
+            return sum(self.sides)
+
+    polygon = Polygon([1, 2, 3])
+    assert polygon.perimeter == 6
+    polygon.sides.append(4)
+    assert polygon.perimeter == 10
+    polygon.__dict__['perimeter'] = 0
+    memoize_method.clear_cache(polygon)
+    assert polygon.perimeter == 10
+
+
+class Report(object):
+    radius = Memparams(float, 'radius')
+
+    def __init__(self, radius):
+        self.radius = radius
+
+    @memoize_property
+    def area(self):
+        return 3 * self.radius ** 2
+
+    @memoize_method(track_dependencies=True)
+    def summary(self):
+        return 'area {}'.format(self.area)
+
+
+def test_tracked_methods_depend_on_property():
+    report = Report(1.0)
+    # Computed outside the tracked method, which then reads the stored value
+    assert report.area == 3.0
+    assert report.summary() == 'area 3.0'
+    report.radius = 2.0
+    assert report.summary() == 'area 12.0'
+    report.area = 0.0
+    assert report.summary() == 'area 0.0'
+    del report.area
+    assert report.summary() == 'area 12.0'
@@ -0,0 +1,74 @@
+"""Tests of memoized recursive functions"""
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+import sys
+
+import pytest
+
+from memoize import memoize_recursive
+
+
+def test_trampoline_depth():
+    @memoize_recursive
+    def depth(n):
+        if n == 0:
+            return 0
+        return (yield n - 1) + 1
+
+    n = 10 * sys.getrecursionlimit()
+    assert depth(n) == n
+    # Every level is cached
+    assert depth.cache_info().currsize == n + 1
+
+
+def test_trampoline_multiple_arguments():
+    calls = []
+
+    @memoize_recursive
+    def paths(m, n):
+        calls.append((m, n))
+        if m == 0 or n == 0:
+            return 1
+        return (yield m - 1, n) + (yield m, n - 1)
+
+    assert paths(300, 300) == paths(n=300, m=300)
+    assert paths(2, 2) == 6
+    assert len(calls) == len(set(calls)) == 301 * 301 - 1
+
+
+def test_trampoline_exceptions_reach_yielding_generator():
+    @memoize_recursive
+    def checked(n):
+        if n < 0:
+            raise ValueError(n)
+        try:
+            return (yield n - 2)
+        except ValueError:
+            return 'odd' if n == 1 else 'caught'
+
+    assert checked(1) == 'odd'
+    assert checked(5) == 'odd'
+    with pytest.raises(ValueError):
+        checked(-1)
+
+
+def test_plain_recursion_and_bottom_up():
+    calls = []
+
+    @memoize_recursive
+    def fib(n):
+        calls.append(n)
+        return n if n < 2 else fib(n - 1) + fib(n - 2)
+
+    fib.bottom_up(range(5000))
+    assert fib(4999) % 1000 == 501
+    assert len(calls) == 5000
+
+
+def test_trampoline_map():
+    @memoize_recursive
+    def triangle(n):
+        return n if n == 0 else n + (yield n - 1)
+
+    assert triangle.map([(10,), (3,), (10,)]) == [55, 6, 55]
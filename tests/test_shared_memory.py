@@ -0,0 +1,110 @@
+"""Tests of results shared between processes through SharedMemoryBackend"""
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+import multiprocessing
+import uuid
+
+import pytest
+
+from memoize import SharedMemoryBackend
+
+
+def test_shared_memory_backend_shares_results(run_square):
+    pytest.importorskip('multiprocessing.shared_memory')
+    backend = SharedMemoryBackend('memoize-test-{}'.format(uuid.uuid4().hex),
+                                  size=2 ** 20, slots=2 ** 10)
+    # Created here, so that it outlives the processes attaching to it
+    backend.arena
+    try:
+        assert run_square('shm', backend.name, 3) == 9
+        assert run_square('shm', backend.name, 3) == 9
+        assert run_square('shm', backend.name, 4) == 16
+        assert run_square.count() == 2
+    finally:
+        backend.unlink()
+
+
+def test_shared_memory_namespaces():
+    pytest.importorskip('multiprocessing.shared_memory')
+    backend = SharedMemoryBackend('memoize-test-{}'.format(uuid.uuid4().hex),
+                                  size=2 ** 20, slots=2 ** 10)
+    try:
+        first = _cache(backend, 'first')
+        second = _cache(backend, 'second')
+        first[1] = 'one'
+        first[2] = 'two'
+        second[1] = 'uno'
+        assert (first[1], second[1]) == ('one', 'uno')
+        assert (len(first), len(second)) == (2, 1)
+        del first[1]
+        assert 1 not in first
+        assert (len(first), len(second)) == (1, 1)
+    finally:
+        backend.unlink()
+
+
+def _cache(backend, name):
+    def f():
+        pass
+    f.__qualname__ = name
+    return backend(f)
+
+
+# Inherited by forked workers, so that they use the parent's arena object
+_forked_cache = None
+
+
+def _write_keys(args):
+    worker, count = args
+    cache = _forked_cache
+    for key in range(count):
+        cache[(worker, key)] = [worker, key] * 8
+    return worker
+
+
+def test_shared_memory_forked_writers():
+    global _forked_cache
+    pytest.importorskip('multiprocessing.shared_memory')
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        pytest.skip("needs the fork start method")
+    backend = SharedMemoryBackend('memoize-test-{}'.format(uuid.uuid4().hex),
+                                  size=2 ** 24, slots=2 ** 15)
+    workers, count = 6, 1000
+    try:
+        cache = _forked_cache = _cache(backend, 'concurrent')
+        # The parent uses the arena, and so its lock, before forking
+        cache['warm'] = 'up'
+        pool = multiprocessing.get_context('fork').Pool(workers)
+        try:
+            pool.map(_write_keys, [(worker, count)
+                                   for worker in range(workers)])
+        finally:
+            pool.close()
+            pool.join()
+        assert len(cache) == workers * count + 1
+        for worker in range(workers):
+            for key in range(count):
+                assert cache[(worker, key)] == [worker, key] * 8
+    finally:
+        _forked_cache = None
+        backend.unlink()
+
+
+def test_shared_memory_clear_keeps_other_namespaces():
+    pytest.importorskip('multiprocessing.shared_memory')
+    backend = SharedMemoryBackend('memoize-test-{}'.format(uuid.uuid4().hex),
+                                  size=2 ** 20, slots=2 ** 10)
+    try:
+        first = _cache(backend, 'first')
+        second = _cache(backend, 'second')
+        first[1] = 'one'
+        second[1] = 'uno'
+        first.clear()
+        assert 1 not in first
+        assert len(first) == 0
+        assert second[1] == 'uno'
+        first[1] = 'ein'
+        assert first[1] == 'ein'
+    finally:
+        backend.unlink()
@@ -0,0 +1,53 @@
+"""Tests of cache export, import and prefill"""
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+import pytest
+
+from memoize import memoize_function
+
+calls = []
+
+
+def cube(x):
+    calls.append(x)
+    return x ** 3
+
+
+def test_export_import_round_trip(tmp_path):
+    path = str(tmp_path / 'cube.snapshot')
+    first = memoize_function(cube)
+    first.map([(1,), (2,), (3,)])
+    assert first.export_cache(path, version='1') == 3
+
+    del calls[:]
+    second = memoize_function(cube)
+    assert second.import_cache(path, version='1') == 3
+    assert [second(x) for x in (1, 2, 3)] == [1, 8, 27]
+    assert calls == []
+
+
+def test_import_version_mismatch(tmp_path):
+    path = str(tmp_path / 'cube.snapshot')
+    first = memoize_function(cube)
+    first(2)
+    first.export_cache(path, version='1')
+    with pytest.raises(ValueError):
+        memoize_function(cube).import_cache(path, version='2')
+
+
+def test_import_other_function(tmp_path):
+    path = str(tmp_path / 'cube.snapshot')
+    memoize_function(cube).export_cache(path)
+    with pytest.raises(ValueError):
+        memoize_function(abs).import_cache(path)
+
+
+def test_prefill():
+    del calls[:]
+    memoized = memoize_function(cube)
+    memoized(1)
+    memoized.prefill([(1,), (2,), (3,)], max_workers=2)
+    assert sorted(calls) == [1, 2, 3]
+    assert memoized(3) == 27
+    assert len(calls) == 3
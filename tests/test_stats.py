@@ -0,0 +1,68 @@
+"""Tests of cache statistics and the registry of memoized callables"""
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+from memoize import (add_stats_hook, memoize_function, memoize_method,
+                     memoized_callables, remove_stats_hook)
+
+
+def test_function_counters():
+    @memoize_function(stats=True, maxsize=1)
+    def identity(x):
+        return x
+
+    identity(2)
+    identity(2)
+    identity([3])
+    identity(3)
+    info = identity.cache_info()
+    assert (info.hits, info.misses, info.uncacheable) == (1, 2, 1)
+    assert (info.evictions, info.maxsize, info.currsize) == (1, 1, 1)
+    assert info.time >= 0
+
+
+def test_counters_off_by_default():
+    @memoize_function
+    def square(x):
+        return x * x
+
+    square(2)
+    info = square.cache_info()
+    assert info.hits is None
+    assert info.currsize == 1
+
+
+def test_method_counters_and_registry():
+    class Adder(object):
+        @memoize_method(stats=True)
+        def add(self, x):
+            return x + 1
+
+    first, second = Adder(), Adder()
+    first.add(1)
+    first.add(1)
+    second.add(1)
+    info = Adder.__dict__['add'].cache_info(first)
+    assert (info.hits, info.misses, info.currsize) == (1, 2, 1)
+    assert first.add.cache_info() == info
+    assert Adder.__dict__['add'] in memoized_callables()
+
+
+def test_hooks():
+    events = []
+
+    def hook(memoized, event, duration):
+        events.append((memoized, event))
+
+    @memoize_function(stats=True)
+    def square(x):
+        return x * x
+
+    add_stats_hook(hook)
+    try:
+        square(2)
+        square(2)
+    finally:
+        remove_stats_hook(hook)
+    square(2)
+    assert events == [(square, 'miss'), (square, 'hit')]
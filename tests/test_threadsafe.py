@@ -0,0 +1,203 @@
+"""Tests of the single-flight computation of threadsafe memoize decorators"""
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+import threading
+import time
+
+import pytest
+
+from memoize import Memparams, memoize_function, memoize_method
+
+THREADS = 8
+TIMEOUT = 10
+
+
+def run_threads(target, count=THREADS):
+    """
+    Call `target` in `count` threads started together, returning the results
+    and the exceptions raised, in thread order
+
+    """
+    barrier = threading.Barrier(count)
+    results, errors = [None] * count, [None] * count
+
+    def run(index):
+        barrier.wait()
+        try:
+            results[index] = target()
+        except Exception as exc:
+            errors[index] = exc
+
+    threads = [threading.Thread(target=run, args=(index,))
+               for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(TIMEOUT)
+        assert not thread.is_alive()
+    return results, errors
+
+
+def test_function_computes_once():
+    calls = []
+
+    @memoize_function(threadsafe=True)
+    def slow_square(x):
+        calls.append(x)
+        time.sleep(0.05)
+        return x * x
+
+    results, errors = run_threads(lambda: slow_square(3))
+    assert results == [9] * THREADS
+    assert errors == [None] * THREADS
+    assert calls == [3]
+
+
+def test_method_computes_once_per_instance():
+    calls = []
+
+    class Model(object):
+        def __init__(self, scale):
+            self.scale = scale
+
+        @memoize_method(threadsafe=True)
+        def slow_scaled(self, x):
+            calls.append((self.scale, x))
+            time.sleep(0.05)
+            return self.scale * x
+
+    first, second = Model(2), Model(3)
+    results, _ = run_threads(lambda: (first.slow_scaled(5),
+                                      second.slow_scaled(5)))
+    assert results == [(10, 15)] * THREADS
+    assert sorted(calls) == [(2, 5), (3, 5)]
+
+
+def test_waiters_receive_exception():
+    calls = []
+
+    @memoize_function(threadsafe=True)
+    def failing(x):
+        calls.append(x)
+        time.sleep(0.05)
+        raise ValueError(x)
+
+    results, errors = run_threads(lambda: failing(1))
+    assert calls == [1]
+    assert all(isinstance(error, ValueError) for error in errors)
+
+    # The exception is not cached
+    with pytest.raises(ValueError):
+        failing(1)
+    assert calls == [1, 1]
+
+
+def test_other_keys_do_not_wait():
+    release = threading.Event()
+    started = threading.Event()
+
+    @memoize_function(threadsafe=True)
+    def compute(key):
+        if key == 'slow':
+            started.set()
+            assert release.wait(TIMEOUT)
+        return key
+
+    slow = threading.Thread(target=compute, args=('slow',))
+    slow.start()
+    try:
+        assert started.wait(TIMEOUT)
+        # Answered while the computation for 'slow' is in flight
+        assert compute('fast') == 'fast'
+    finally:
+        release.set()
+        slow.join(TIMEOUT)
+    assert compute('slow') == 'slow'
+
+
+def test_unhashable_arguments_are_computed():
+    calls = []
+
+    @memoize_function(threadsafe=True)
+    def total(values):
+        calls.append(values)
+        return sum(values)
+
+    assert total([1, 2]) == 3
+    assert total([1, 2]) == 3
+    assert len(calls) == 2
+
+
+
+def run_in_flight(compute, started, release, during):
+    """
+    Call `compute()` in a thread and `during()` once `started` is set, then
+    set `release` and return the result of `compute()`
+
+    """
+    results = []
+    thread = threading.Thread(target=lambda: results.append(compute()))
+    thread.start()
+    try:
+        assert started.wait(TIMEOUT)
+        during()
+    finally:
+        release.set()
+        thread.join(TIMEOUT)
+    return results[0]
+
+
+def test_function_clear_during_flight():
+    started, release = threading.Event(), threading.Event()
+    state = {'value': 1}
+
+    @memoize_function(threadsafe=True)
+    def read(x):
+        value = state['value']
+        started.set()
+        assert release.wait(TIMEOUT)
+        return value
+
+    def clear():
+        state['value'] = 2
+        read.clear_cache()
+
+    assert run_in_flight(lambda: read(0), started, release, clear) == 1
+    # The result computed before the clear is not cached
+    assert read(0) == 2
+
+
+@pytest.mark.parametrize('change', ['set', 'clear'])
+def test_method_calls_after_invalidation_do_not_join_flight(change):
+    started, release = threading.Event(), threading.Event()
+
+    class Model(object):
+        value = Memparams(int, 'value')
+
+        @memoize_method(threadsafe=True)
+        def read(self):
+            value = self.value
+            if value == 1:
+                # Only the computation started before the change waits
+                started.set()
+                assert release.wait(TIMEOUT)
+            return value
+
+    model = Model()
+    model.value = 1
+    late = []
+
+    def invalidate():
+        if change == 'set':
+            model.value = 2
+        else:
+            storage = getattr(model, Memparams._storage_name)
+            storage[(int, 'value')] = 2
+            memoize_method.clear_cache(model)
+        # Arrives while the computation for the old value is in flight
+        late.append(model.read())
+
+    assert run_in_flight(model.read, started, release, invalidate) == 1
+    assert late == [2]
+    assert model.read() == 2
@@ -0,0 +1,104 @@
+"""Tests of how the caches of memoized methods are pickled"""
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+import pickle
+
+from memoize import memoize_method
+
+calls = []
+
+
+class Model(object):
+    def __init__(self, scale):
+        self.scale = scale
+
+    @memoize_method
+    def full(self, x):
+        calls.append(('full', x))
+        return self.scale * x
+
+    @memoize_method(transport='compact')
+    def compact(self, x):
+        calls.append(('compact', x))
+        return [self.scale * x] * 100
+
+    @memoize_method(transport='none')
+    def dropped(self, x):
+        calls.append(('dropped', x))
+        return self.scale + x
+
+    @memoize_method(track_dependencies=True)
+    def tracked(self, x):
+        calls.append(('tracked', x))
+        return self.scale - x
+
+
+def warm(model):
+    for method in (model.full, model.compact, model.dropped, model.tracked):
+        method(1)
+    del calls[:]
+
+
+def call_all(model):
+    return [method(1) for method in (model.full, model.compact,
+                                     model.dropped, model.tracked)]
+
+
+def test_method_transports():
+    model = Model(2)
+    warm(model)
+    copy = pickle.loads(pickle.dumps(model))
+    assert call_all(copy) == call_all(model)
+    assert sorted(calls) == [('dropped', 1), ('tracked', 1)]
+
+
+def test_instance_transport_overrides_methods():
+    model = Model(2)
+    memoize_method.set_transport(model, 'none')
+    memoize_method.set_transport(model, 'compact', ['full'])
+    warm(model)
+    copy = pickle.loads(pickle.dumps(model))
+    call_all(copy)
+    assert sorted(calls) == [('compact', 1), ('dropped', 1), ('tracked', 1)]
+
+
+def test_compact_blob_is_smaller():
+    model = Model(2)
+    warm(model)
+    full = Model(2)
+    memoize_method.set_transport(full, 'full')
+    warm(full)
+    assert len(pickle.dumps(model)) < len(pickle.dumps(full))
+
+
+class Node(object):
+    def __init__(self, name):
+        self.name = name
+
+    @memoize_method(transport='compact')
+    def itself(self):
+        return self
+
+    @memoize_method(transport='compact')
+    def child(self):
+        child = Node(self.name + '.child')
+        child.parent = self
+        child.itself()
+        return child
+
+    @memoize_method(transport='compact')
+    def label(self):
+        return self.name * 10
+
+
+def test_compact_results_referring_to_owner():
+    node = Node('root')
+    node.itself()
+    node.child()
+    node.label()
+    copy = pickle.loads(pickle.dumps(node))
+    assert copy.itself() is copy
+    assert copy.child().parent is copy
+    assert copy.child().itself() is copy.child()
+    assert copy.label() == 'root' * 10
@@ -0,0 +1,83 @@
+"""Tests of caches holding their arguments by weak reference"""
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+import gc
+
+from memoize import memoize_function
+
+
+class Point(object):
+    def __init__(self, x):
+        self.x = x
+
+    def __eq__(self, other):
+        return isinstance(other, Point) and self.x == other.x
+
+    def __hash__(self):
+        return hash(self.x)
+
+
+class Mutable(object):
+    __hash__ = None
+
+    def __init__(self, x):
+        self.x = x
+
+
+def test_entries_evicted_on_collection():
+    @memoize_function(weak_keys=True)
+    def norm(point, scale=1):
+        return abs(point.x) * scale
+
+    first, second = Point(3), Point(-4)
+    assert norm(first) == 3
+    assert norm(second, 2) == 8
+    assert norm.cache_info().currsize == 2
+    del first
+    gc.collect()
+    assert norm.cache_info().currsize == 1
+    del second
+    gc.collect()
+    assert norm.cache_info().currsize == 0
+
+
+def test_weak_keys_compare_by_value():
+    calls = []
+
+    @memoize_function(weak_keys=True)
+    def norm(point):
+        calls.append(point)
+        return abs(point.x)
+
+    first, second = Point(3), Point(3)
+    assert norm(first) == norm(second) == 3
+    assert len(calls) == 1
+
+
+def test_identity_keys():
+    calls = []
+
+    @memoize_function(identity_keys=True)
+    def value(obj):
+        calls.append(id(obj))
+        return obj.x
+
+    first, second = Mutable(1), Mutable(1)
+    assert value(first) == value(first) == value(second) == 1
+    assert calls == [id(first), id(second)]
+    del first
+    gc.collect()
+    assert value.cache_info().currsize == 1
+
+
+def test_refused_entries_not_watched():
+    @memoize_function(weak_keys=True, maxsize=0)
+    def norm(point):
+        return abs(point.x)
+
+    point = Point(3)
+    assert norm(point) == 3
+    cache = getattr(norm, norm.cache_name)
+    assert len(cache) == 0
+    assert not cache._referents